@@ -0,0 +1,14 @@
+#!/bin/bash
+# Regenerate the betterproto bindings in src/talos_mcp/proto from the .proto
+# subsets in this directory.
+#
+# Requires: pip install grpcio-tools "betterproto[compiler]>=2.0.0b6"
+set -e
+
+cd "$(dirname "$0")"
+OUT=../src/talos_mcp/proto
+mkdir -p "$OUT"
+
+python -m grpc_tools.protoc -I . \
+    --python_betterproto_out="$OUT" \
+    common/common.proto machine/machine.proto resource/resource.proto
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Many MCP clients against one shared HTTP server vs. one stdio server each
+
+Simulates N concurrent MCP clients running the same mix of tool calls
+against benchmarks/bin/talosctl, either all connected to a single server
+started with --http, or each with its own server process over stdio as IDEs
+and agents do today. A few clients can be made greedy (several calls in
+flight at once) to show whether the others keep their latency. Reports per
+mode the time to a client's first result, call latency percentiles for
+polite and greedy clients, total throughput, Jain's fairness index over the
+polite clients' throughput, talosctl processes spawned and the servers'
+combined peak RSS.
+
+Usage:
+    python benchmarks/bench_clients.py [--mode http|stdio|both] [--clients N]
+        [--calls N] [--greedy N] [--greedy-concurrency N] [--latency S]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+SERVER = BENCH_DIR.parent / "src" / "talos_mcp" / "server.py"
+NODE = "10.5.0.2"
+
+# Calls each client cycles through; the cached tools are where sharing a server pays
+WORKLOAD = [
+    ("talos_get_version", {"nodes": NODE}),
+    ("talos_get_services", {"nodes": NODE}),
+    ("talos_get_resources", {"resource": "disks", "nodes": NODE, "output": "json"}),
+    ("talos_etcd_members", {"nodes": NODE}),
+]
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+
+def jain(values: list[float]) -> float:
+    """Jain's fairness index: 1.0 when every value is equal, 1/n when one takes all"""
+    if not values or not any(values):
+        return 1.0
+    return round(sum(values) ** 2 / (len(values) * sum(v * v for v in values)), 3)
+
+
+def server_env(spawn_log: Path, latency: float) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "PATH": f"{BENCH_DIR / 'bin'}{os.pathsep}{env['PATH']}",
+            "TALOS_MCP_TRANSPORT": "subprocess",
+            "TALOS_MCP_SNAPSHOT_DB": "off",
+            "TALOSCONFIG": str(spawn_log.parent / "talosconfig"),
+            "FAKE_TALOSCTL_SPAWN_LOG": str(spawn_log),
+            "FAKE_TALOSCTL_DELAY": str(latency),
+            "PYTHONPATH": str(BENCH_DIR.parent / "src"),
+        }
+    )
+    return env
+
+
+def server_pids() -> list[int]:
+    """Server processes started by this benchmark"""
+    pids = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        if ppid == os.getpid() and str(SERVER).encode() in cmdline:
+            pids.append(int(entry.name))
+    return pids
+
+
+def peak_rss_mib(pids: list[int]) -> float:
+    total = 0
+    for pid in pids:
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return round(total / 2**20, 1)
+
+
+def spawned(spawn_log: Path) -> int:
+    try:
+        return sum(1 for _ in spawn_log.open())
+    except FileNotFoundError:
+        return 0
+
+
+async def run_client(connect, index: int, opts, start: float) -> dict:
+    """One client: connect, initialize, then run its calls"""
+    from mcp import ClientSession
+
+    greedy = index < opts.greedy
+    concurrency = opts.greedy_concurrency if greedy else 1
+    latencies: list[float] = []
+    errors = 0
+    async with connect() as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            first = None
+            remaining = opts.calls * concurrency
+            cursor = index
+
+            async def worker():
+                nonlocal remaining, cursor, first, errors
+                while remaining > 0:
+                    remaining -= 1
+                    name, arguments = WORKLOAD[cursor % len(WORKLOAD)]
+                    cursor += 1
+                    began = time.perf_counter()
+                    result = await session.call_tool(name, arguments)
+                    latencies.append(time.perf_counter() - began)
+                    if first is None:
+                        first = time.perf_counter() - start
+                    errors += bool(result.isError)
+
+            began = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - began
+    return {
+        "greedy": greedy,
+        "latencies": latencies,
+        "errors": errors,
+        "first_result_s": first or 0.0,
+        "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def summarize(clients: list[dict], wall: float, spawns: int, rss: float) -> dict:
+    polite = [c for c in clients if not c["greedy"]]
+    greedy = [c for c in clients if c["greedy"]]
+    calls = sum(len(c["latencies"]) for c in clients)
+    return {
+        "clients": len(clients),
+        "calls": calls,
+        "errors": sum(c["errors"] for c in clients),
+        "wall_s": round(wall, 2),
+        "throughput_per_s": round(calls / wall, 1),
+        "first_result_p50_ms": percentile([c["first_result_s"] for c in clients], 0.5),
+        "polite_p50_ms": percentile([x for c in polite for x in c["latencies"]], 0.5),
+        "polite_p99_ms": percentile([x for c in polite for x in c["latencies"]], 0.99),
+        "greedy_p50_ms": percentile([x for c in greedy for x in c["latencies"]], 0.5),
+        "fairness": jain([c["throughput_per_s"] for c in polite]),
+        "talosctl_spawned": spawns,
+        "servers_peak_rss_mib": rss,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def bench_http(opts, workdir: Path) -> dict:
+    """All clients share one server started with --http"""
+    from mcp.client.streamable_http import streamablehttp_client
+
+    spawn_log = workdir / "spawns-http"
+    port = free_port()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(SERVER),
+        "--http",
+        "--port",
+        str(port),
+        env=server_env(spawn_log, opts.latency),
+        stdin=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        # The server is warm before the clients arrive: that is the point of sharing it
+        for _ in range(200):
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.05)
+        url = f"http://127.0.0.1:{port}/mcp"
+        start = time.perf_counter()
+        clients = await asyncio.gather(
+            *(
+                run_client(lambda: streamablehttp_client(url), i, opts, time.perf_counter())
+                for i in range(opts.clients)
+            )
+        )
+        wall = time.perf_counter() - start
+        rss = peak_rss_mib(server_pids())
+    finally:
+        process.terminate()
+        await process.wait()
+    return summarize(clients, wall, spawned(spawn_log), rss)
+
+
+async def bench_stdio(opts, workdir: Path) -> dict:
+    """Every client starts its own server over stdio"""
+    from mcp.client.stdio import StdioServerParameters, stdio_client
+
+    spawn_log = workdir / "spawns-stdio"
+    params = StdioServerParameters(
+        command=sys.executable, args=[str(SERVER)], env=server_env(spawn_log, opts.latency)
+    )
+    rss = 0.0
+    sampling = True
+
+    async def sample_rss():
+        nonlocal rss
+        while sampling:
+            rss = max(rss, peak_rss_mib(server_pids()))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample_rss())
+    with open(os.devnull, "w") as devnull:
+        start = time.perf_counter()
+        clients = await asyncio.gather(
+            *(
+                run_client(
+                    lambda: stdio_client(params, errlog=devnull), i, opts, time.perf_counter()
+                )
+                for i in range(opts.clients)
+            )
+        )
+        wall = time.perf_counter() - start
+    sampling = False
+    await sampler
+    return summarize(clients, wall, spawned(spawn_log), rss)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["http", "stdio", "both"], default="both")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent MCP clients")
+    parser.add_argument("--calls", type=int, default=20, help="Calls per client worker")
+    parser.add_argument("--greedy", type=int, default=1, help="Clients with many calls in flight")
+    parser.add_argument(
+        "--greedy-concurrency", type=int, default=8, help="Calls in flight per greedy client"
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake talosctl latency (s)")
+    opts = parser.parse_args()
+
+    modes = ["http", "stdio"] if opts.mode == "both" else [opts.mode]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="talos-mcp-clients-") as tmp:
+        for mode in modes:
+            bench = bench_http if mode == "http" else bench_stdio
+            results[mode] = await bench(opts, Path(tmp))
+            line = " ".join(f"{k}={v}" for k, v in results[mode].items())
+            print(f"{mode:<6} {line}", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Response size and parse cost of normalized output
+
+Runs the normalization layer over recorded talosctl output in
+benchmarks/fixtures and reports the size of each output mode in bytes and
+tokens, the parse time, and how long the event loop stalls while a large
+resource dump is parsed inline versus in a worker thread.
+
+Usage:
+    python benchmarks/bench_normalize.py [--iterations N]
+"""
+
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+FIXTURES = BENCH_DIR / "fixtures"
+
+# Add src to path for imports
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+from talos_mcp import normalize  # noqa: E402
+
+CASES = [
+    ("services", "services.txt", normalize.services_from_table),
+    ("etcd members", "etcd_members.txt", normalize.members_from_table),
+    ("disks", "disks.json", normalize.disks_from_documents),
+    ("rd", "rd.json", normalize.resources_from_documents),
+]
+
+
+def _load_tokenizer():
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "cl100k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        # tiktoken missing, or unable to fetch its vocabulary offline
+        pattern = re.compile(r"\w+|[^\w\s]")
+        return "word/punctuation estimate", lambda text: len(pattern.findall(text))
+
+
+TOKENIZER, count_tokens = _load_tokenizer()
+
+
+def best_of(iterations: int, fn) -> float:
+    """Fastest of several runs of fn, in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return min(samples) * 1000
+
+
+async def max_loop_stall(work) -> float:
+    """Longest gap between event loop ticks while awaiting work, in milliseconds"""
+    gaps = []
+    running = True
+
+    async def ticker():
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    await work()
+    running = False
+    await task
+    return max(gaps) * 1000
+
+
+async def bench_stall(text: str, parser) -> dict:
+    async def inline():
+        normalize.convert(text, parser, "json")
+
+    async def threaded():
+        await asyncio.to_thread(normalize.convert, text, parser, "json")
+
+    inline_ms = statistics.median([await max_loop_stall(inline) for _ in range(5)])
+    threaded_ms = statistics.median([await max_loop_stall(threaded) for _ in range(5)])
+    return {"inline_ms": inline_ms, "threaded_ms": threaded_ms}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20)
+    opts = parser.parse_args()
+
+    print(f"tokens counted with: {TOKENIZER}\n")
+    print(f"{'fixture':<14} {'mode':<8} {'bytes':>8} {'tokens':>8} {'vs raw':>8} {'parse ms':>9}")
+    for name, fixture, parse in CASES:
+        raw = (FIXTURES / fixture).read_text()
+        raw_tokens = count_tokens(raw)
+        print(f"{name:<14} {'raw':<8} {len(raw):>8} {raw_tokens:>8} {'':>8} {'':>9}")
+        for mode in ("json", "compact"):
+            text = normalize.convert(raw, parse, mode)
+            tokens = count_tokens(text)
+            parse_ms = best_of(opts.iterations, lambda: normalize.convert(raw, parse, mode))
+            change = (tokens - raw_tokens) / raw_tokens * 100
+            print(
+                f"{'':<14} {mode:<8} {len(text):>8} {tokens:>8} {change:>+7.0f}% {parse_ms:>9.2f}"
+            )
+
+    # A ten-node rd dump, about the size of a machineconfig listing across a cluster
+    raw = (FIXTURES / "rd.json").read_text() * 10
+    stall = await bench_stall(raw, normalize.resources_from_documents)
+    print(
+        f"\nlongest event loop stall parsing {len(raw) // 1024} KiB of resources: "
+        f"{stall['inline_ms']:.2f} ms inline, {stall['threaded_ms']:.2f} ms in a worker thread"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
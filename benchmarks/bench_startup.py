@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: time to initialize, to the tool list and to a first result
+
+Launches the server over stdio the way an MCP client does, both through the
+fast entry point (`python -m talos_mcp`, which answers the handshake from the
+precomputed manifest) and as `python src/talos_mcp/server.py`, and times from
+process start to the initialize response, to the tools/list response and to
+the result of a first tool call against benchmarks/bin/talosctl. Each
+entry point is launched --runs times and the median is reported. With
+--importtime it also lists the modules that take longest to import, as
+`python -X importtime` measures them. It exits non-zero when the fast entry
+point's median time to the tool list exceeds --target-ms (0: no target).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--entry launcher|script|both]
+        [--importtime N] [--target-ms MS]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+SRC_DIR = BENCH_DIR.parent / "src"
+NODE = "10.5.0.2"
+# Milliseconds from launch to the tool list the fast entry point must stay under
+TARGET_LIST_TOOLS_MS = 250.0
+
+ENTRIES = {
+    "launcher": [sys.executable, "-m", "talos_mcp"],
+    "script": [sys.executable, str(SRC_DIR / "talos_mcp" / "server.py")],
+}
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench-startup", "version": "0"},
+    },
+}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+LIST_TOOLS = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+CALL_TOOL = {
+    "jsonrpc": "2.0",
+    "id": 3,
+    "method": "tools/call",
+    "params": {"name": "talos_get_version", "arguments": {"nodes": NODE}},
+}
+
+
+def server_env(workdir: Path) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "PATH": f"{BENCH_DIR / 'bin'}{os.pathsep}{env['PATH']}",
+            "TALOS_MCP_TRANSPORT": "subprocess",
+            "TALOS_MCP_SNAPSHOT_DB": "off",
+            "TALOSCONFIG": str(workdir / "talosconfig"),
+            "FAKE_TALOSCTL_DELAY": "0",
+            "PYTHONPATH": str(SRC_DIR),
+        }
+    )
+    return env
+
+
+def exchange(process: subprocess.Popen, *messages: dict) -> dict:
+    """Send messages and return the response to the last one"""
+    for message in messages:
+        process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+    process.stdin.flush()
+    expected = messages[-1]["id"]
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError("server exited during the handshake")
+        response = json.loads(line)
+        if response.get("id") == expected:
+            return response
+
+
+def launch(command: list[str], env: dict[str, str]) -> dict:
+    """One cold start: milliseconds to each response, and the tools listed"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        exchange(process, INITIALIZE)
+        initialize = time.perf_counter() - start
+        tools = exchange(process, INITIALIZED, LIST_TOOLS)["result"]["tools"]
+        list_tools = time.perf_counter() - start
+        result = exchange(process, CALL_TOOL)["result"]
+        first_call = time.perf_counter() - start
+    finally:
+        process.stdin.close()
+        process.wait(timeout=10)
+    return {
+        "initialize_ms": initialize * 1000,
+        "list_tools_ms": list_tools * 1000,
+        "first_call_ms": first_call * 1000,
+        "tools": [tool["name"] for tool in tools],
+        "call_error": bool(result.get("isError")),
+    }
+
+
+def bench_entry(command: list[str], runs: int, env: dict[str, str]) -> tuple[dict, list[str]]:
+    """Median timings over cold starts, and the tools the entry point lists"""
+    samples = [launch(command, env) for _ in range(runs)]
+    summary = {
+        key: round(statistics.median(s[key] for s in samples), 1)
+        for key in ("initialize_ms", "list_tools_ms", "first_call_ms")
+    }
+    summary["min_list_tools_ms"] = round(min(s["list_tools_ms"] for s in samples), 1)
+    summary["tools"] = len(samples[0]["tools"])
+    summary["call_errors"] = sum(s["call_error"] for s in samples)
+    return summary, samples[0]["tools"]
+
+
+def import_times(env: dict[str, str], top: int) -> list[tuple[str, float, float]]:
+    """Modules with the largest cumulative import time under talos_mcp.server"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import talos_mcp.server"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        # Top-level imports and what they import directly
+        depth = (len(name) - len(name.lstrip()) - 3) // 2
+        if depth <= 1:
+            rows.append((name.strip(), int(cumulative) / 1000, int(own) / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per entry point")
+    parser.add_argument("--entry", choices=["launcher", "script", "both"], default="both")
+    parser.add_argument(
+        "--importtime", type=int, default=0, metavar="N", help="Show the N slowest imports"
+    )
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=TARGET_LIST_TOOLS_MS,
+        help="Fail if the launcher's median time to the tool list exceeds this",
+    )
+    opts = parser.parse_args()
+
+    entries = list(ENTRIES) if opts.entry == "both" else [opts.entry]
+    if opts.target_ms and "launcher" not in entries:
+        entries.insert(0, "launcher")
+    results = {}
+    listed = {}
+    with tempfile.TemporaryDirectory(prefix="talos-mcp-startup-") as tmp:
+        env = server_env(Path(tmp))
+        for entry in entries:
+            results[entry], listed[entry] = bench_entry(ENTRIES[entry], opts.runs, env)
+            line = " ".join(f"{k}={v}" for k, v in results[entry].items())
+            print(f"{entry:<9} {line}", file=sys.stderr)
+        if len(listed) > 1 and len({tuple(tools) for tools in listed.values()}) > 1:
+            print("entry points list different tools", file=sys.stderr)
+            results["tools_differ"] = True
+        if opts.importtime:
+            results["imports"] = []
+            print(f"{'cumulative ms':>14} {'self ms':>8}  module", file=sys.stderr)
+            for name, cumulative, own in import_times(env, opts.importtime):
+                results["imports"].append({"module": name, "cumulative_ms": cumulative})
+                print(f"{cumulative:>14.1f} {own:>8.1f}  {name}", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+    if results.get("tools_differ"):
+        sys.exit(1)
+    if opts.target_ms and results["launcher"]["list_tools_ms"] > opts.target_ms:
+        print(
+            f"launcher took {results['launcher']['list_tools_ms']} ms to list tools, "
+            f"target {opts.target_ms:g} ms",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
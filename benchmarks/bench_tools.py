@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+End-to-end tool benchmark through an MCP client session
+
+Connects an in-memory MCP client session to the server and calls each tool
+repeatedly, against benchmarks/bin/talosctl for the subprocess transport and
+the in-process stub API for the gRPC transport. Both fakes take the same
+latency, output size and failure rate. For every tool it reports throughput,
+p50/p99 latency, errors, peak RSS and the number of talosctl processes
+spawned, and it can save the results as JSON and compare them with a saved
+baseline, exiting non-zero on a regression.
+
+Usage:
+    python benchmarks/bench_tools.py [--transport subprocess|grpc|both] [--calls N]
+        [--concurrency N] [--latency S] [--output-bytes N] [--failure-rate F]
+        [--tools a,b] [--output results.json] [--baseline old.json] [--tolerance F]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+BENCH_DIR = Path(__file__).parent
+NODE = "127.0.0.1"
+CONTEXT = "bench"
+
+# Tool arguments per benchmarked tool; cache is off so every call does the work
+TOOLS = {
+    "talos_config_info": {},
+    "talos_get_version": {"nodes": NODE},
+    "talos_get_services": {"nodes": NODE},
+    "talos_get_disks": {"nodes": NODE},
+    "talos_get_resources": {"resource": "disks", "nodes": NODE, "output": "json"},
+    "talos_etcd_members": {"nodes": NODE},
+    "talos_logs": {"service": "etcd", "nodes": NODE, "tail": 100},
+    "talos_list": {"path": "/var/log", "nodes": NODE},
+    "talos_read": {"path": "/proc/meminfo", "nodes": NODE},
+    "talos_health": {"nodes": NODE},
+}
+
+# Reported figures compared with a baseline, and whether higher is better
+COMPARED = {"throughput_per_s": True, "p50_ms": False, "p99_ms": False}
+
+# The fake CLI is found on PATH and appends to the spawn log per invocation
+SPAWN_LOG = Path(tempfile.mkdtemp(prefix="talos-mcp-bench-")) / "spawns"
+TALOSCONFIG = SPAWN_LOG.parent / "talosconfig"
+os.environ["PATH"] = f"{BENCH_DIR / 'bin'}{os.pathsep}{os.environ['PATH']}"
+os.environ["FAKE_TALOSCTL_SPAWN_LOG"] = str(SPAWN_LOG)
+os.environ["TALOSCONFIG"] = str(TALOSCONFIG)
+
+# Add src to path for imports
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+
+def write_talosconfig(port: int):
+    """A context pointing at the stub server, without credentials"""
+    config = {
+        "context": CONTEXT,
+        "contexts": {CONTEXT: {"endpoints": [f"{NODE}:{port}"], "nodes": [NODE]}},
+    }
+    TALOSCONFIG.write_text(yaml.safe_dump(config))
+
+
+def spawned() -> int:
+    """talosctl processes started so far"""
+    try:
+        with open(SPAWN_LOG) as f:
+            return sum(1 for _ in f)
+    except FileNotFoundError:
+        return 0
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # No procfs: fall back to the lifetime peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def bench_tool(session, name: str, arguments: dict, opts) -> dict:
+    """Call one tool calls times from concurrency workers"""
+    from talos_mcp.metrics import call_metrics
+
+    def errors() -> int:
+        counters = call_metrics.snapshot(tool=name)["tools"].get(name, {}).get("counters", {})
+        return counters.get("errors", 0) + counters.get("timeouts", 0)
+
+    latencies: list[float] = []
+    remaining = opts.calls
+    errors_before, spawned_before = errors(), spawned()
+    peak_rss = current_rss()
+    sampling = True
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while sampling:
+            peak_rss = max(peak_rss, current_rss())
+            await asyncio.sleep(0.005)
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await session.call_tool(name, {**arguments, "cache": False})
+            latencies.append(time.perf_counter() - start)
+
+    sampler = asyncio.create_task(sample_rss())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(opts.concurrency)))
+    elapsed = time.perf_counter() - start
+    sampling = False
+    await sampler
+
+    return {
+        "calls": len(latencies),
+        "errors": errors() - errors_before,
+        "throughput_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "peak_rss_mib": round(peak_rss / 2**20, 1),
+        "spawned": spawned() - spawned_before,
+    }
+
+
+async def bench_transport(transport: str, tools: list[str], opts) -> dict:
+    """Run every tool through a fresh MCP session on one transport"""
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from stub_server import start_stub_server
+
+    from talos_mcp import server
+    from talos_mcp.grpc_transport import GrpcTransport
+
+    stub, port = await start_stub_server(
+        latency=opts.latency, output_bytes=opts.output_bytes, failure_rate=opts.failure_rate
+    )
+    write_talosconfig(port)
+    client = server.talos_client
+    client.transport = transport
+    client.reload_config()
+    if transport == "grpc":
+        # The stub speaks plaintext, so install the transport the context cannot describe
+        fingerprint = client._fingerprints.get(CONTEXT, "")
+        plaintext = GrpcTransport([f"{NODE}:{port}"], pool=client.pool, context=CONTEXT)
+        client._transports[CONTEXT] = (fingerprint, plaintext)
+
+    results = {}
+    try:
+        async with create_connected_server_and_client_session(server.app) as session:
+            for name in tools:
+                results[name] = await bench_tool(session, name, TOOLS[name], opts)
+                line = " ".join(f"{k}={v}" for k, v in results[name].items())
+                print(f"{transport:<10} {name:<22} {line}", file=sys.stderr)
+    finally:
+        client.pool.close()
+        client._transports.clear()
+        stub.close()
+        await stub.wait_closed()
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Figures that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for transport, tools in results["results"].items():
+        for name, stats in tools.items():
+            old = baseline.get("results", {}).get(transport, {}).get(name)
+            if not old:
+                continue
+            for key, higher_is_better in COMPARED.items():
+                if not old.get(key):
+                    continue
+                change = (stats[key] - old[key]) / old[key]
+                if (-change if higher_is_better else change) > tolerance:
+                    regressions.append(
+                        f"{transport} {name} {key}: {old[key]} -> {stats[key]} ({change:+.0%})"
+                    )
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transport", choices=["subprocess", "grpc", "both"], default="both")
+    parser.add_argument("--calls", type=int, default=50, help="Calls per tool")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent calls per tool")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake per-call latency (s)")
+    parser.add_argument("--output-bytes", type=int, default=4096, help="Fake logs/read/list size")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of fake failures")
+    parser.add_argument("--tools", default=",".join(TOOLS), help="Comma-separated tools to run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="Allowed relative regression vs. baseline"
+    )
+    opts = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    tools = [name for name in opts.tools.split(",") if name]
+    unknown = [name for name in tools if name not in TOOLS]
+    if unknown:
+        parser.error(f"unknown tools: {', '.join(unknown)}")
+
+    # Fake CLI settings; the stub server takes the same ones as arguments
+    os.environ["FAKE_TALOSCTL_DELAY"] = str(opts.latency)
+    os.environ["FAKE_TALOSCTL_OUTPUT_BYTES"] = str(opts.output_bytes)
+    os.environ["FAKE_TALOSCTL_FAILURE_RATE"] = str(opts.failure_rate)
+
+    transports = ["subprocess", "grpc"] if opts.transport == "both" else [opts.transport]
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": {
+                "calls": opts.calls,
+                "concurrency": opts.concurrency,
+                "latency": opts.latency,
+                "output_bytes": opts.output_bytes,
+                "failure_rate": opts.failure_rate,
+            },
+        },
+        "results": {},
+    }
+    try:
+        for transport in transports:
+            results["results"][transport] = await bench_transport(transport, tools, opts)
+    finally:
+        shutil.rmtree(SPAWN_LOG.parent, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    if opts.output:
+        Path(opts.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if opts.baseline:
+        regressions = compare(results, json.loads(Path(opts.baseline).read_text()), opts.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Per-call latency: talosctl subprocess vs. native gRPC transport
+
+Runs `version` repeatedly through both paths of TalosClient against offline
+fakes: benchmarks/bin/talosctl for the subprocess path and an in-process stub
+MachineService for the gRPC path.
+
+Usage:
+    python benchmarks/bench_transport.py [--iterations N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+
+# Add src to path for imports
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from stub_server import start_stub_server  # noqa: E402
+
+from talos_mcp.grpc_transport import GrpcTransport  # noqa: E402
+from talos_mcp.server import TalosClient  # noqa: E402
+
+
+def summarize(samples: list[float]) -> dict:
+    """Reduce latency samples (seconds) to milliseconds statistics"""
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.mean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+    }
+
+
+async def bench_subprocess(iterations: int) -> list[float]:
+    os.environ["PATH"] = f"{BENCH_DIR / 'bin'}{os.pathsep}{os.environ['PATH']}"
+    client = TalosClient(config_path=str(BENCH_DIR / "no-talosconfig"), transport="subprocess")
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = await client.execute_talosctl(["version"])
+        samples.append(time.perf_counter() - start)
+        assert result["success"], result
+    return samples
+
+
+async def bench_grpc(iterations: int) -> list[float]:
+    server, port = await start_stub_server()
+    transport = GrpcTransport([f"127.0.0.1:{port}"])
+
+    samples = []
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result = await transport.version(["127.0.0.1"])
+            samples.append(time.perf_counter() - start)
+            assert result["success"], result
+    finally:
+        transport.close()
+        server.close()
+        await server.wait_closed()
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    opts = parser.parse_args()
+
+    results = {
+        "subprocess": summarize(await bench_subprocess(opts.iterations)),
+        "grpc": summarize(await bench_grpc(opts.iterations)),
+    }
+
+    print(f"{'transport':<12} {'mean ms':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for name, stats in results.items():
+        print(
+            f"{name:<12} {stats['mean_ms']:>10.3f} {stats['p50_ms']:>10.3f} {stats['p99_ms']:>10.3f}"
+        )
+    speedup = results["subprocess"]["mean_ms"] / results["grpc"]["mean_ms"]
+    print(f"\ngRPC transport is {speedup:.1f}x faster per call")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Light-call latency under a flood of heavy operations
+
+Drives the server's call_tool with a few workers issuing cheap
+talos_get_version calls while many more keep slow talos_health checks in
+flight, all against benchmarks/bin/talosctl. Runs the same load with no limit,
+with a plain first-come-first-served cap, and with the priority scheduler,
+and reports light-call latency percentiles and how many talosctl processes
+were alive at once.
+
+Usage:
+    python benchmarks/load_test.py [--duration S] [--heavy N] [--light N] [--heavy-delay S]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent
+NODES = ["10.5.0.2", "10.5.0.3", "10.5.0.4"]
+
+# Subprocess transport against the fake CLI, with no talosconfig
+os.environ["PATH"] = f"{BENCH_DIR / 'bin'}{os.pathsep}{os.environ['PATH']}"
+os.environ["TALOS_MCP_TRANSPORT"] = "subprocess"
+
+# Add src to path for imports
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+from talos_mcp import server  # noqa: E402
+from talos_mcp.scheduler import Scheduler  # noqa: E402
+
+SCENARIOS = {
+    "unbounded": lambda: Scheduler(max_in_flight=10**6, max_per_node=10**6),
+    # Same caps, but oldest first with nothing held back for reads
+    "fifo": lambda: Scheduler(reserved_for_reads=0, reserved_per_node=0, aging=1e-9),
+    "priority": lambda: Scheduler(),
+}
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def run_scenario(name: str, opts) -> dict:
+    scheduler = SCENARIOS[name]()
+    server.talos_client.scheduler = scheduler
+    deadline = time.monotonic() + opts.duration
+    light_latencies: list[float] = []
+    heavy_done = 0
+
+    async def heavy_worker(i: int):
+        nonlocal heavy_done
+        while time.monotonic() < deadline:
+            await server.call_tool("talos_health", {"nodes": NODES[i % len(NODES)]})
+            heavy_done += 1
+
+    async def light_worker(i: int):
+        # Let the heavy flood build up first
+        await asyncio.sleep(0.5)
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            await server.call_tool(
+                "talos_get_version", {"nodes": NODES[i % len(NODES)], "cache": False}
+            )
+            light_latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(
+        *(heavy_worker(i) for i in range(opts.heavy)),
+        *(light_worker(i) for i in range(opts.light)),
+    )
+    stats = scheduler.stats()
+    return {
+        "light_calls": len(light_latencies),
+        "p50_ms": percentile(light_latencies, 0.50),
+        "p99_ms": percentile(light_latencies, 0.99),
+        "max_ms": max(light_latencies) * 1000,
+        "heavy_calls": heavy_done,
+        "peak_processes": stats["peak_in_flight"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--heavy", type=int, default=32, help="concurrent heavy workers")
+    parser.add_argument("--light", type=int, default=2, help="concurrent light workers")
+    parser.add_argument("--heavy-delay", type=float, default=1.0, help="seconds per health check")
+    opts = parser.parse_args()
+
+    os.environ["FAKE_TALOSCTL_DELAY_HEALTH"] = str(opts.heavy_delay)
+    logging.getLogger("talos-mcp-server").setLevel(logging.WARNING)
+
+    print(
+        f"{opts.heavy} heavy workers ({opts.heavy_delay:g}s each), {opts.light} light workers, "
+        f"{opts.duration:g}s per scenario\n"
+    )
+    print(
+        f"{'scheduler':<10} {'light':>6} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} "
+        f"{'heavy':>6} {'peak procs':>11}"
+    )
+    for name in SCENARIOS:
+        r = await run_scenario(name, opts)
+        print(
+            f"{name:<10} {r['light_calls']:>6} {r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} "
+            f"{r['max_ms']:>9.1f} {r['heavy_calls']:>6} {r['peak_processes']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
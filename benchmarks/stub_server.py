@@ -0,0 +1,232 @@
+"""
+In-process stub of the Talos apid MachineService and ResourceService
+
+Answers with canned responses over a plaintext HTTP/2 channel so the native
+gRPC transport can be benchmarked without a cluster. Latency, the size of
+streamed output (logs, read, list) and the fraction of calls that fail can be
+tuned per server.
+"""
+
+import asyncio
+import random
+import sys
+from pathlib import Path
+from typing import AsyncIterator
+
+from grpclib.server import Server
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from talos_mcp.proto import common, machine, resource
+
+# Data messages are streamed in chunks of this size, like apid does
+DATA_CHUNK_SIZE = 4096
+
+# Listed entries are one minute apart, back from this time (2025-10-01 09:00 UTC)
+LIST_BASE_TIME = 1759309200
+
+
+class StubMachineService(machine.MachineServiceBase):
+    """MachineService returning generated data for a single fake node"""
+
+    def __init__(
+        self,
+        hostname: str = "127.0.0.1",
+        latency: float = 0.0,
+        output_bytes: int = 4096,
+        failure_rate: float = 0.0,
+    ):
+        """
+        Initialize the service
+
+        Args:
+            hostname: Node name reported in response metadata
+            latency: Seconds to wait before answering each call
+            output_bytes: Approximate size of logs, read and list output
+            failure_rate: Fraction of calls answered with a per-node error (0-1)
+        """
+        self.hostname = hostname
+        self.latency = latency
+        self.output_bytes = output_bytes
+        self.failure_rate = failure_rate
+
+    async def _metadata(self) -> common.Metadata:
+        """Wait out the latency, then pick the call's metadata: success or a node error"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            return common.Metadata(
+                hostname=self.hostname,
+                error=f"rpc error: code = Unavailable desc = connection error: {self.hostname}",
+            )
+        return common.Metadata(hostname=self.hostname)
+
+    def _filler(self, line) -> bytes:
+        """Lines built by line(i) until about output_bytes"""
+        out, total, i = [], 0, 0
+        while total < self.output_bytes or not out:
+            text = (line(i) + "\n").encode("utf-8")
+            out.append(text)
+            total += len(text)
+            i += 1
+        return b"".join(out)
+
+    async def _data(self, payload) -> AsyncIterator[common.Data]:
+        metadata = await self._metadata()
+        if metadata.error:
+            yield common.Data(metadata=metadata)
+            return
+        for i in range(0, len(payload), DATA_CHUNK_SIZE):
+            yield common.Data(metadata=metadata, bytes=payload[i : i + DATA_CHUNK_SIZE])
+
+    async def version(self, _request) -> machine.VersionResponse:
+        return machine.VersionResponse(
+            messages=[
+                machine.Version(
+                    metadata=await self._metadata(),
+                    version=machine.VersionInfo(
+                        tag="v1.8.0", sha="0000000", go_version="go1.22.7", os="linux", arch="amd64"
+                    ),
+                )
+            ]
+        )
+
+    async def service_list(self, _request) -> machine.ServiceListResponse:
+        services = [
+            machine.ServiceInfo(
+                id=name,
+                state="Running",
+                health=machine.ServiceHealth(healthy=True),
+            )
+            for name in ("apid", "containerd", "cri", "etcd", "kubelet", "machined", "trustd")
+        ]
+        return machine.ServiceListResponse(
+            messages=[machine.ServiceList(metadata=await self._metadata(), services=services)]
+        )
+
+    async def etcd_member_list(self, _request) -> machine.EtcdMemberListResponse:
+        members = [
+            machine.EtcdMember(
+                id=0x3D9A8079ABD0D7FB + i,
+                hostname=f"talos-default-controlplane-{i + 1}",
+                peer_urls=[f"https://172.20.0.{i + 2}:2380"],
+                client_urls=[f"https://172.20.0.{i + 2}:2379"],
+            )
+            for i in range(3)
+        ]
+        return machine.EtcdMemberListResponse(
+            messages=[machine.EtcdMembers(metadata=await self._metadata(), members=members)]
+        )
+
+    async def logs(self, request: machine.LogsRequest) -> AsyncIterator[common.Data]:
+        payload = self._filler(
+            lambda i: f'{{"level":"info","ts":"2025-10-01T09:12:{i % 60:02d}Z",'
+            f'"msg":"{request.id} event {i}"}}'
+        )
+        async for data in self._data(payload):
+            yield data
+
+    async def read(self, request: machine.ReadRequest) -> AsyncIterator[common.Data]:
+        async for data in self._data(self._filler(lambda i: f"line {i:08d} of {request.path}")):
+            yield data
+
+    async def list(self, request: machine.ListRequest) -> AsyncIterator[machine.FileInfo]:
+        metadata = await self._metadata()
+        if metadata.error:
+            yield machine.FileInfo(metadata=metadata)
+            return
+        root = request.root.rstrip("/")
+        # One entry is about 40 bytes of table output
+        for i in range(max(1, self.output_bytes // 40)):
+            name = f"file-{i:06d}"
+            yield machine.FileInfo(
+                metadata=metadata,
+                name=f"{root}/{name}",
+                relative_name=name,
+                size=i * 7919 % 100003,
+                modified=LIST_BASE_TIME - 60 * i,
+            )
+
+
+class StubResourceService(resource.ResourceServiceBase):
+    """ResourceService listing a few disks for a single fake node, and watching them change"""
+
+    def __init__(self, machine_service: StubMachineService):
+        self.machine = machine_service
+        # Disk name to size; change_disk and remove_disk notify watchers
+        self.disks = {name: 107374182400 for name in ("sda", "sdb", "nvme0n1")}
+        self.versions = {name: 1 for name in self.disks}
+        self._watchers: list[asyncio.Queue] = []
+
+    def _resource(self, namespace: str, kind: str, name: str) -> resource.Resource:
+        spec = f"dev_path: /dev/{name}\nsize: {self.disks.get(name, 0)}\nrotational: false\n"
+        return resource.Resource(
+            metadata=resource.Metadata(
+                namespace=namespace or "runtime",
+                type=kind,
+                id=name,
+                version=str(self.versions[name]),
+                phase="running",
+                labels={"transport": "nvme" if name.startswith("nvme") else "sata"},
+            ),
+            spec=resource.Spec(yaml=spec.encode("utf-8")),
+        )
+
+    def change_disk(self, name: str, size: int):
+        """Add or resize a disk and tell watchers"""
+        event = resource.EventType.UPDATED if name in self.disks else resource.EventType.CREATED
+        self.disks[name] = size
+        self.versions[name] = self.versions.get(name, 0) + 1
+        for queue in self._watchers:
+            queue.put_nowait((event, name))
+
+    def remove_disk(self, name: str):
+        """Remove a disk and tell watchers"""
+        for queue in self._watchers:
+            queue.put_nowait((resource.EventType.DESTROYED, name))
+        self.disks.pop(name, None)
+
+    async def list(self, request: resource.ListRequest) -> AsyncIterator[resource.ListResponse]:
+        metadata = await self.machine._metadata()
+        if metadata.error:
+            yield resource.ListResponse(metadata=metadata)
+            return
+        for name in list(self.disks):
+            yield resource.ListResponse(
+                metadata=metadata,
+                resource=self._resource(request.namespace, request.type, name),
+            )
+
+    async def watch(self, request: resource.WatchRequest) -> AsyncIterator[resource.WatchResponse]:
+        metadata = common.Metadata(hostname=self.machine.hostname)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._watchers.append(queue)
+        try:
+            while True:
+                event, name = await queue.get()
+                res = self._resource(request.namespace, request.type, name)
+                yield resource.WatchResponse(metadata=metadata, event_type=event, resource=res)
+        finally:
+            self._watchers.remove(queue)
+
+
+async def start_stub_server(
+    host: str = "127.0.0.1", port: int = 0, **options
+) -> tuple[Server, int]:
+    """
+    Start the stub server
+
+    Args:
+        host: Address to bind
+        port: Port to bind, 0 picks a free one
+        **options: latency, output_bytes and failure_rate for StubMachineService
+
+    Returns:
+        Tuple of (server, bound port)
+    """
+    machine_service = StubMachineService(**options)
+    server = Server([machine_service, StubResourceService(machine_service)])
+    await server.start(host, port)
+    bound_port = server._server.sockets[0].getsockname()[1]
+    return server, bound_port
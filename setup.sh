@@ -66,7 +66,7 @@ echo "1. Ensure your Talos cluster is configured:"
 echo "   $ talosctl config info"
 echo ""
 echo "2. Test the MCP server:"
-echo "   $ python src/talos_mcp/server.py"
+echo "   $ python -m talos_mcp"
 echo ""
 echo "3. Configure Claude Desktop:"
 echo "   Add the configuration from claude_desktop_config.example.json"
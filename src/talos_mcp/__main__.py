@@ -0,0 +1,6 @@
+"""Run the Talos MCP server: python -m talos_mcp"""
+
+from talos_mcp.launcher import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Batched tool calls
+
+A batch is a list of tool calls answered in one MCP request. Identical calls
+are run once and their result is shared by every operation that asked for
+it. The remaining calls are started together, interleaved across nodes so
+that one node's per-node limit does not hold up calls to the others, and the
+scheduler's global and per-node caps still apply to each of them. A batch
+therefore takes about as long as its slowest call.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Operations accepted in one batch
+MAX_BATCH_OPERATIONS = int(os.environ.get("TALOS_MCP_MAX_BATCH_OPERATIONS", "32"))
+
+# Arguments that do not change what a call returns, ignored when deduplicating
+NON_KEY_ARGUMENTS = {"timeout", "cache"}
+
+
+@dataclass
+class BatchCall:
+    """One distinct tool call and the operations that share its result"""
+
+    tool: str
+    arguments: dict[str, Any]
+    ids: list[str] = field(default_factory=list)
+
+    @property
+    def node(self) -> str:
+        return self.arguments.get("nodes") or ""
+
+
+@dataclass
+class CallResult:
+    """Outcome of one distinct call"""
+
+    status: str
+    latency_ms: float
+    output: str
+
+
+def call_key(tool: str, arguments: dict[str, Any]) -> str:
+    """Identity of a call for deduplication"""
+    relevant = {k: v for k, v in arguments.items() if k not in NON_KEY_ARGUMENTS}
+    return json.dumps([tool, relevant], sort_keys=True, default=str)
+
+
+def plan(operations: Any, defaults: dict[str, Any]) -> tuple[list[BatchCall], list[str]]:
+    """
+    Turn a batch's operations into distinct calls
+
+    Args:
+        operations: List of {"tool", "arguments", "id"} objects from the request
+        defaults: Arguments applied to every operation that does not set them
+            (the batch's context)
+
+    Returns:
+        Distinct calls, interleaved across nodes, each listing the ids of the
+        operations it answers; and all operation ids in request order
+
+    Raises:
+        ValueError: If the operations are malformed or too many, or an operation
+            asks for a response mode
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty list")
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ValueError(f"a batch takes at most {MAX_BATCH_OPERATIONS} operations")
+
+    calls: dict[str, BatchCall] = {}
+    order: list[str] = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or not isinstance(operation.get("tool"), str):
+            raise ValueError(f"operation {index} needs a tool name")
+        arguments = operation.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            raise ValueError(f"operation {index}: arguments must be an object")
+        if "response" in arguments:
+            raise ValueError(
+                f"operation {index}: response modes apply to the whole batch, "
+                "pass response to talos_batch instead"
+            )
+        op_id = str(operation.get("id") or index)
+        if op_id in order:
+            raise ValueError(f"duplicate operation id {op_id!r}")
+        order.append(op_id)
+
+        arguments = {**{k: v for k, v in defaults.items() if v is not None}, **arguments}
+        key = call_key(operation["tool"], arguments)
+        call = calls.get(key)
+        if call is None:
+            call = calls[key] = BatchCall(operation["tool"], arguments)
+        call.ids.append(op_id)
+
+    return interleave_by_node(list(calls.values())), order
+
+
+def interleave_by_node(calls: list[BatchCall]) -> list[BatchCall]:
+    """Order calls round-robin across the nodes they target, keeping each node's order"""
+    by_node: dict[str, list[BatchCall]] = {}
+    for call in calls:
+        by_node.setdefault(call.node, []).append(call)
+    ordered = []
+    queues = list(by_node.values())
+    for depth in range(max((len(q) for q in queues), default=0)):
+        ordered.extend(q[depth] for q in queues if depth < len(q))
+    return ordered
+
+
+async def run_batch(
+    calls: list[BatchCall],
+    execute: Callable[[BatchCall], Awaitable[tuple[str, str]]],
+) -> list[CallResult]:
+    """
+    Run every call concurrently
+
+    Args:
+        calls: Distinct calls, in dispatch order
+        execute: Coroutine function running a call and returning (output, status)
+
+    Returns:
+        Results in the same order as calls
+    """
+
+    async def run_one(call: BatchCall) -> CallResult:
+        start = time.perf_counter()
+        try:
+            output, status = await execute(call)
+        except Exception as e:
+            logger.error(f"Error running batched {call.tool}: {e}")
+            output, status = f"Error: {e}", "error"
+        return CallResult(status, round((time.perf_counter() - start) * 1000, 1), output)
+
+    # Tasks are started in list order, so the scheduler queues them interleaved
+    return list(await asyncio.gather(*(run_one(call) for call in calls)))
+
+
+def _embed(output: str) -> dict[str, Any]:
+    """{"data": parsed} for JSON output, {"output": text} for anything else"""
+    if output[:1] in ("{", "["):
+        try:
+            return {"data": json.loads(output)}
+        except ValueError:
+            pass
+    return {"output": output}
+
+
+def merge_batch(
+    calls: list[BatchCall], results: list[CallResult], order: list[str], wall_ms: float
+) -> dict[str, Any]:
+    """
+    Combine call results into one response, one entry per requested operation
+
+    Output that is JSON (structured output modes, multi-node results) is
+    embedded as data rather than as a string.
+    """
+    by_id: dict[str, dict[str, Any]] = {}
+    for call, result in zip(calls, results):
+        entry: dict[str, Any] = {
+            "tool": call.tool,
+            "status": result.status,
+            "latency_ms": result.latency_ms,
+        }
+        if call.node:
+            entry["nodes"] = call.node
+        entry.update(_embed(result.output))
+        if len(call.ids) > 1:
+            entry["shared_with"] = call.ids
+        for op_id in call.ids:
+            by_id[op_id] = {"id": op_id, **entry}
+
+    operations = [by_id[op_id] for op_id in order]
+    ok = sum(1 for result in results if result.status == "ok")
+    return {
+        "operations": operations,
+        "summary": {
+            "operations": len(operations),
+            "calls": len(calls),
+            "deduplicated": len(operations) - len(calls),
+            "ok": ok,
+            "failed": len(calls) - ok,
+            "wall_ms": round(wall_ms, 1),
+            "slowest_ms": max((r.latency_ms for r in results), default=0.0),
+        },
+    }
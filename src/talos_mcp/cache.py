@@ -0,0 +1,223 @@
+"""
+In-process response cache for read-only tools
+
+Entries are keyed by (context, tool, normalized arguments), expire after a
+per-tool TTL and are evicted least-recently-used once the cache exceeds its
+entry or byte budget. Concurrent identical misses share one in-flight call,
+which runs as its own task: a caller that is cancelled leaves it running for
+the others, and it is only cancelled once every caller has gone.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("talos-mcp-server")
+
+CacheKey = tuple[str, str, str]
+
+# Arguments that change how a call runs but not what it returns; the context
+# is already the first part of the key
+NON_KEY_ARGUMENTS = {"timeout", "context"}
+
+
+def normalize_arguments(arguments: dict[str, Any]) -> str:
+    """
+    Canonical string form of tool arguments
+
+    Drops unset values, trims whitespace (including around commas in node
+    lists) and sorts keys, so equivalent calls map to the same cache entry.
+    """
+    normalized = {}
+    for key, value in arguments.items():
+        if value is None or key in NON_KEY_ARGUMENTS:
+            continue
+        if isinstance(value, str) and key == "nodes":
+            value = ",".join(part.strip() for part in value.split(","))
+        elif isinstance(value, str):
+            value = value.strip()
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _content_size(value: Any) -> int:
+    """Approximate size of a cached tool response in bytes"""
+    if isinstance(value, (list, tuple)):
+        return sum(len(getattr(item, "text", "") or "") for item in value)
+    return len(str(value))
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires: float
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class ResponseCache:
+    """TTL + LRU cache with single-flight coalescing of concurrent misses"""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 16 * 1024 * 1024,
+        sizer: Callable[[Any], int] = _content_size,
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses
+            sizer: Function estimating the size of a value in bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizer = sizer
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._inflight: dict[CacheKey, _Flight] = {}
+        self._generation = 0
+        self._generations: dict[str, int] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.bypasses = 0
+
+    @staticmethod
+    def make_key(context: Optional[str], tool: str, arguments: dict[str, Any]) -> CacheKey:
+        return (context or "", tool, normalize_arguments(arguments))
+
+    async def get_or_compute(
+        self, key: CacheKey, ttl: float, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Return a fresh cached value, or compute and cache it
+
+        Concurrent callers missing on the same key wait for the first caller's
+        computation instead of starting their own. Exceptions are propagated to
+        every waiter and never cached. A cancelled caller stops waiting; the
+        computation is cancelled only when no caller is left waiting for it.
+
+        Args:
+            key: Cache key (see make_key)
+            ttl: Seconds the computed value stays fresh
+            compute: Coroutine function producing the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            self._remove(key)
+            self.expirations += 1
+
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            flight = self._inflight[key] = _Flight(
+                asyncio.create_task(self._compute(key, ttl, compute))
+            )
+            flight.task.add_done_callback(lambda _: self._land(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # The last caller gave up: nobody wants the result any more
+                flight.task.cancel()
+
+    async def _compute(self, key: CacheKey, ttl: float, compute: Callable[[], Awaitable[Any]]):
+        context = key[0]
+        generation = (self._generation, self._generations.get(context, 0))
+        value = await compute()
+        # Results that raced with an invalidation are handed out but not stored
+        if (self._generation, self._generations.get(context, 0)) == generation:
+            self._store(key, value, ttl)
+        return value
+
+    def _land(self, key: CacheKey, flight: _Flight):
+        """Forget a finished computation, marking an exception nobody awaited as retrieved"""
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def _store(self, key: CacheKey, value: Any, ttl: float):
+        size = self.sizer(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, size, time.monotonic() + ttl)
+        self.total_bytes += size
+
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    def invalidate(self, context: Optional[str] = None) -> int:
+        """
+        Drop cached responses
+
+        Args:
+            context: Only drop entries for this context; all entries when omitted
+
+        Returns:
+            Number of entries dropped
+        """
+        if context is None:
+            keys = list(self._entries)
+            self._generation += 1
+        else:
+            keys = [k for k in self._entries if k[0] == (context or "")]
+            self._generations[context or ""] = self._generations.get(context or "", 0) + 1
+
+        for key in keys:
+            self._remove(key)
+        self.invalidations += 1
+        logger.info(f"Invalidated {len(keys)} cached response(s)")
+        return len(keys)
+
+    def stats(self) -> dict[str, Any]:
+        """Cache counters and current occupancy"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "bypasses": self.bypasses,
+            "in_flight": len(self._inflight),
+        }
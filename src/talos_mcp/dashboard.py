@@ -0,0 +1,333 @@
+"""
+Non-interactive dashboard snapshots
+
+Samples CPU, memory, load, disk I/O, network counters and processes from
+every node twice over a short window, concurrently across nodes, and turns
+the two samples into rates. Replaces the interactive `talosctl dashboard` TUI,
+which never returns a usable snapshot.
+"""
+
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+from talos_mcp.fanout import FANOUT_CONCURRENCY, NodeResult, fan_out
+from talos_mcp.normalize import format_table
+
+if TYPE_CHECKING:
+    from talos_mcp.server import TalosClient
+
+PROC_FILES = {
+    "stat": "/proc/stat",
+    "meminfo": "/proc/meminfo",
+    "loadavg": "/proc/loadavg",
+    "diskstats": "/proc/diskstats",
+    "netdev": "/proc/net/dev",
+}
+
+SECTOR_SIZE = 512
+
+# Block devices that never carry interesting I/O
+_IGNORED_DISKS = re.compile(r"^(loop|ram|zram|sr)\d+")
+_IGNORED_INTERFACES = {"lo"}
+
+# NODE PID STATE THREADS CPU-TIME VIRTMEM RESMEM COMMAND, where sizes read like "67 MB"
+_PROCESS_LINE = re.compile(
+    r"^(?P<node>\S+)\s+(?P<pid>\d+)\s+(?P<state>\S+)\s+(?P<threads>\d+)\s+"
+    r"(?P<cpu>[\d.]+)\s+(?P<virt>[\d.]+ ?[kKMGTP]?i?B)\s+(?P<res>[\d.]+ ?[kKMGTP]?i?B)\s+"
+    r"(?P<command>.*)$"
+)
+_SIZE_UNITS = {"": 1, "k": 10**3, "K": 10**3, "M": 10**6, "G": 10**9, "T": 10**12, "P": 10**15}
+
+
+class SampleError(Exception):
+    """A node could not be sampled"""
+
+
+def parse_cpu(text: str) -> dict[str, Any]:
+    """Aggregate CPU jiffies from /proc/stat"""
+    total = idle = 0
+    cpus = 0
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields:
+            continue
+        if fields[0] == "cpu":
+            values = [int(v) for v in fields[1:9]]
+            total = sum(values)
+            # idle + iowait
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+        elif fields[0].startswith("cpu"):
+            cpus += 1
+    return {"total": total, "idle": idle, "cpus": cpus}
+
+
+def parse_meminfo(text: str) -> dict[str, int]:
+    """Memory figures from /proc/meminfo, in bytes"""
+    info = {}
+    for line in text.splitlines():
+        key, _, rest = line.partition(":")
+        parts = rest.split()
+        if parts:
+            info[key] = int(parts[0]) * (1024 if len(parts) > 1 else 1)
+    return info
+
+
+def parse_loadavg(text: str) -> list[float]:
+    """1, 5 and 15 minute load averages from /proc/loadavg"""
+    return [float(v) for v in text.split()[:3]]
+
+
+def parse_diskstats(text: str) -> dict[str, tuple[int, int]]:
+    """Sectors read and written per block device from /proc/diskstats"""
+    disks = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 10 or _IGNORED_DISKS.match(fields[2]):
+            continue
+        disks[fields[2]] = (int(fields[5]), int(fields[9]))
+    return disks
+
+
+def parse_netdev(text: str) -> dict[str, tuple[int, int]]:
+    """Bytes received and transmitted per interface from /proc/net/dev"""
+    interfaces = {}
+    for line in text.splitlines()[2:]:
+        name, _, rest = line.partition(":")
+        name = name.strip()
+        fields = rest.split()
+        if len(fields) < 9 or name in _IGNORED_INTERFACES:
+            continue
+        interfaces[name] = (int(fields[0]), int(fields[8]))
+    return interfaces
+
+
+def _parse_size(text: str) -> int:
+    match = re.match(r"([\d.]+) ?([kKMGTP]?)i?B", text)
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def parse_processes(text: str) -> dict[int, dict[str, Any]]:
+    """Processes from `talosctl processes` table output, keyed by PID"""
+    processes = {}
+    for line in text.splitlines():
+        match = _PROCESS_LINE.match(line.strip())
+        if not match:
+            continue
+        processes[int(match.group("pid"))] = {
+            "cpu_time": float(match.group("cpu")),
+            "resident_memory": _parse_size(match.group("res")),
+            "command": match.group("command").strip(),
+        }
+    return processes
+
+
+async def sample_node(
+    client: "TalosClient",
+    node: str,
+    limiter: asyncio.Semaphore,
+    timeout: Optional[float] = None,
+    context: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Take one sample of a node's counters
+
+    The /proc reads are cheap and go through the scheduler as reads; only the
+    process listing is heavy. The sample is timed from when its reads start,
+    so time spent queued for the first slot does not stretch the window.
+
+    Args:
+        client: Talos client used for the reads
+        node: Node to sample
+        limiter: Semaphore bounding concurrent calls across all nodes
+        timeout: Deadline for each individual read
+        context: talosconfig context to target, or None for the current one
+
+    Returns:
+        Dictionary with the raw proc file contents, process table and sample time
+    """
+
+    async def fetch(
+        name: str, args: list[str], operation: str, priority: str, **params
+    ) -> tuple[str, str]:
+        async with limiter:
+            result = await client.call(
+                operation,
+                args,
+                timeout=timeout,
+                priority=priority,
+                context=context,
+                nodes=node,
+                **params,
+            )
+        if not result.get("success"):
+            raise SampleError(
+                f"{name}: {(result.get('stderr') or result.get('error', '')).strip()}"
+            )
+        return name, result["stdout"]
+
+    requests = [
+        fetch(name, ["read", path, "-n", node], "read", "read", path=path)
+        for name, path in PROC_FILES.items()
+    ]
+    requests.append(fetch("processes", ["processes", "-n", node], "processes", "heavy"))
+
+    started = time.monotonic()
+    outputs = dict(await asyncio.gather(*requests))
+    return {"time": started, **outputs}
+
+
+def compute_metrics(first: dict[str, Any], second: dict[str, Any], top: int) -> dict[str, Any]:
+    """
+    Turn two samples of a node into usage figures and rates
+
+    Args:
+        first: Earlier sample from sample_node
+        second: Later sample from sample_node
+        top: Number of processes to report, by CPU usage
+
+    Returns:
+        Compact metrics dictionary for the node
+    """
+    elapsed = max(second["time"] - first["time"], 1e-6)
+
+    cpu0, cpu1 = parse_cpu(first["stat"]), parse_cpu(second["stat"])
+    total = cpu1["total"] - cpu0["total"]
+    idle = cpu1["idle"] - cpu0["idle"]
+    cpu_percent = round(100.0 * (total - idle) / total, 1) if total > 0 else 0.0
+
+    mem = parse_meminfo(second["meminfo"])
+    mem_total = mem.get("MemTotal", 0)
+    mem_available = mem.get("MemAvailable", mem.get("MemFree", 0))
+    mem_used = mem_total - mem_available
+
+    disks0, disks1 = parse_diskstats(first["diskstats"]), parse_diskstats(second["diskstats"])
+    disks = {}
+    for name, (read1, write1) in disks1.items():
+        read0, write0 = disks0.get(name, (read1, write1))
+        read_rate = (read1 - read0) * SECTOR_SIZE / elapsed
+        write_rate = (write1 - write0) * SECTOR_SIZE / elapsed
+        if read_rate or write_rate:
+            disks[name] = {"read_bps": round(read_rate), "write_bps": round(write_rate)}
+
+    net0, net1 = parse_netdev(first["netdev"]), parse_netdev(second["netdev"])
+    network = {}
+    for name, (rx1, tx1) in net1.items():
+        rx0, tx0 = net0.get(name, (rx1, tx1))
+        network[name] = {
+            "rx_bps": round((rx1 - rx0) / elapsed),
+            "tx_bps": round((tx1 - tx0) / elapsed),
+        }
+
+    procs0, procs1 = parse_processes(first["processes"]), parse_processes(second["processes"])
+    usage = []
+    for pid, proc in procs1.items():
+        before = procs0.get(pid)
+        cpu = (proc["cpu_time"] - before["cpu_time"]) / elapsed * 100 if before else 0.0
+        usage.append(
+            {
+                "pid": pid,
+                "cpu_percent": round(max(cpu, 0.0), 1),
+                "resident_memory": proc["resident_memory"],
+                "command": proc["command"][:80],
+            }
+        )
+    usage.sort(key=lambda p: (p["cpu_percent"], p["resident_memory"]), reverse=True)
+
+    return {
+        "window_s": round(elapsed, 2),
+        "cpu": {"percent": cpu_percent, "cores": cpu1["cpus"]},
+        "memory": {
+            "total": mem_total,
+            "used": mem_used,
+            "percent": round(100.0 * mem_used / mem_total, 1) if mem_total else 0.0,
+        },
+        "load": parse_loadavg(second["loadavg"]),
+        "disks": disks,
+        "network": network,
+        "processes": {"count": len(procs1), "top": usage[:top]},
+    }
+
+
+async def snapshot(
+    client: "TalosClient",
+    nodes: list[str],
+    interval: float = 2.0,
+    top: int = 5,
+    timeout: Optional[float] = None,
+    on_result: Optional[Callable[[NodeResult, int, int], Awaitable[None]]] = None,
+    context: Optional[str] = None,
+) -> list[NodeResult]:
+    """
+    Sample every node twice, interval seconds apart, all nodes in parallel
+
+    Every node is in flight at once and each node's rates are taken over its
+    own measured window, so nodes that wait longer for scheduler slots still
+    report accurate rates; the individual calls are bounded by FANOUT_CONCURRENCY.
+
+    Args:
+        client: Talos client used for the reads
+        nodes: Nodes to sample
+        interval: Seconds between the two samples
+        top: Number of processes to report per node
+        timeout: Deadline for each individual read
+        on_result: Progress callback, as for fan_out
+        context: talosconfig context to target, or None for the current one
+
+    Returns:
+        Per-node results with the metrics in NodeResult.data
+    """
+    limiter = asyncio.Semaphore(FANOUT_CONCURRENCY)
+
+    async def run(node: str) -> dict[str, Any]:
+        try:
+            first = await sample_node(client, node, limiter, timeout, context)
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - first["time"])))
+            second = await sample_node(client, node, limiter, timeout, context)
+        except SampleError as e:
+            return {"success": False, "stderr": str(e)}
+        return {"success": True, "stdout": "", "data": compute_metrics(first, second, top)}
+
+    return await fan_out(nodes, run, concurrency=max(1, len(nodes)), on_result=on_result)
+
+
+def _human(size: float) -> str:
+    for unit in ("B", "kB", "MB", "GB", "TB"):
+        if abs(size) < 1000 or unit == "TB":
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1000
+    return f"{size:.1f}TB"
+
+
+TABLE_HEADERS = ["NODE", "CPU", "MEM", "LOAD1", "DISK R/W", "NET RX/TX", "TOP PROCESS"]
+
+
+def table_rows(results: list[NodeResult]) -> list[list[str]]:
+    """One summary row per node, for format_table under TABLE_HEADERS"""
+    rows = []
+    for result in results:
+        if result.status != "ok" or not result.data:
+            rows.append([result.node, result.status.upper(), "", "", "", "", result.error or ""])
+            continue
+        m = result.data
+        disk_r = sum(d["read_bps"] for d in m["disks"].values())
+        disk_w = sum(d["write_bps"] for d in m["disks"].values())
+        net_rx = sum(n["rx_bps"] for n in m["network"].values())
+        net_tx = sum(n["tx_bps"] for n in m["network"].values())
+        top = m["processes"]["top"]
+        top_proc = f"{top[0]['command'][:30]} ({top[0]['cpu_percent']}%)" if top else ""
+        rows.append(
+            [
+                result.node,
+                f"{m['cpu']['percent']}%",
+                f"{m['memory']['percent']}%",
+                f"{m['load'][0]:.2f}" if m["load"] else "",
+                f"{_human(disk_r)}/s / {_human(disk_w)}/s",
+                f"{_human(net_rx)}/s / {_human(net_tx)}/s",
+                top_proc,
+            ]
+        )
+    return rows
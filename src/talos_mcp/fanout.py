@@ -0,0 +1,119 @@
+"""
+Per-node fan-out executor
+
+Runs one operation per node with bounded concurrency, so a slow or dead node
+only delays its own entry instead of the whole multi-node response.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Upper bound on concurrently running per-node operations for one tool call
+FANOUT_CONCURRENCY = int(os.environ.get("TALOS_MCP_FANOUT_CONCURRENCY", "16"))
+
+
+@dataclass
+class NodeResult:
+    """Outcome of an operation on a single node"""
+
+    node: str
+    status: str
+    latency_ms: float
+    output: str
+    error: Optional[str] = None
+    data: Any = None
+
+    def as_dict(self) -> dict[str, Any]:
+        result = asdict(self)
+        for key in ("error", "data"):
+            if result[key] is None:
+                del result[key]
+        return result
+
+
+def split_nodes(nodes: Optional[str]) -> list[str]:
+    """Split a comma-separated nodes argument into a de-duplicated list"""
+    if not nodes:
+        return []
+    seen = []
+    for node in nodes.split(","):
+        node = node.strip()
+        if node and node not in seen:
+            seen.append(node)
+    return seen
+
+
+async def fan_out(
+    nodes: list[str],
+    run: Callable[[str], Awaitable[dict[str, Any]]],
+    concurrency: int = FANOUT_CONCURRENCY,
+    on_result: Optional[Callable[[NodeResult, int, int], Awaitable[None]]] = None,
+) -> list[NodeResult]:
+    """
+    Run an operation against every node concurrently
+
+    Args:
+        nodes: Nodes to target
+        run: Coroutine function taking a node and returning an execute_talosctl-style result
+        concurrency: Maximum number of nodes in flight at once
+        on_result: Optional callback awaited as each node finishes, with (result, done, total)
+
+    Returns:
+        Per-node results, in the same order as nodes
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    total = len(nodes)
+    done = 0
+
+    async def run_one(node: str) -> NodeResult:
+        nonlocal done
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await run(node)
+            except Exception as e:
+                logger.error(f"Error running on node {node}: {e}")
+                result = {"success": False, "error": str(e)}
+            latency_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        if result.get("success"):
+            node_result = NodeResult(
+                node, "ok", latency_ms, result.get("stdout", ""), data=result.get("data")
+            )
+        elif result.get("timed_out"):
+            error = result.get("stderr", "").strip()
+            node_result = NodeResult(node, "timeout", latency_ms, result.get("stdout", ""), error)
+        else:
+            error = (result.get("stderr") or result.get("error") or "unknown error").strip()
+            node_result = NodeResult(node, "error", latency_ms, result.get("stdout", ""), error)
+
+        done += 1
+        if on_result is not None:
+            try:
+                await on_result(node_result, done, total)
+            except Exception as e:
+                logger.warning(f"Could not report progress for node {node}: {e}")
+        return node_result
+
+    return list(await asyncio.gather(*(run_one(node) for node in nodes)))
+
+
+def merge_results(results: list[NodeResult], wall_ms: float) -> dict[str, Any]:
+    """Merge per-node results into one structured response"""
+    ok = sum(1 for r in results if r.status == "ok")
+    return {
+        "nodes": [r.as_dict() for r in results],
+        "summary": {
+            "total": len(results),
+            "ok": ok,
+            "failed": len(results) - ok,
+            "wall_ms": round(wall_ms, 1),
+            "slowest_ms": max((r.latency_ms for r in results), default=0.0),
+        },
+    }
@@ -0,0 +1,400 @@
+"""
+Byte-range reads and paginated listings of node files
+
+Talos streams files and directory trees from the start, with no way to seek.
+Range and head reads stop the stream as soon as the requested bytes or lines
+have arrived; tail reads keep only a window of the last lines. Listings are
+filtered and paginated while they stream: pages in stream order stop the
+stream once full, and sorted pages keep only the page being built in a
+bounded heap, so memory is proportional to the page size and not to the
+tree.
+"""
+
+import base64
+import binascii
+import calendar
+import contextlib
+import fnmatch
+import heapq
+import json
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from talos_mcp.streaming import MAX_OUTPUT_BYTES
+
+# Entries per listing page by default, and at most
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 5000
+
+# Listing orders; "none" is the order entries stream in, and the cheapest
+SORT_KEYS = ("none", "name", "size", "mtime")
+
+# Modification time formats of talosctl list -l
+_LASTMOD_FORMATS = ("%b %d %Y %H:%M:%S", "%b %d %H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+
+@dataclass(frozen=True)
+class ReadRange:
+    """Which part of a file to read: a byte range, or the first or last lines"""
+
+    offset: int = 0
+    length: Optional[int] = None
+    head: Optional[int] = None
+    tail: Optional[int] = None
+
+    @classmethod
+    def from_arguments(cls, arguments: dict[str, Any]) -> Optional["ReadRange"]:
+        """
+        Build the range from tool arguments
+
+        Returns:
+            The range, or None if the call asks for the whole file
+
+        Raises:
+            ValueError: If a value is negative or head/tail is combined with a byte range
+        """
+        values = {key: arguments.get(key) for key in ("offset", "length", "head", "tail")}
+        given = {key: int(value) for key, value in values.items() if value is not None}
+        if not given:
+            return None
+        for key, value in given.items():
+            if value < 0:
+                raise ValueError(f"{key} must not be negative")
+        if "head" in given and "tail" in given:
+            raise ValueError("head and tail cannot be combined")
+        if ("head" in given or "tail" in given) and ("offset" in given or "length" in given):
+            raise ValueError("head/tail cannot be combined with offset/length")
+        return cls(**given)
+
+
+async def read_range(
+    chunks: AsyncIterator[bytes], read: ReadRange, max_bytes: int = MAX_OUTPUT_BYTES
+) -> dict[str, Any]:
+    """
+    Read part of a streamed file
+
+    The stream is closed as soon as the range is complete, so a range near the
+    start of a large file costs only what precedes it. Tail reads go through
+    the whole stream but keep only the last lines.
+
+    Args:
+        chunks: The file's content as it streams
+        read: The part to read
+        max_bytes: Most bytes returned, whatever the range asks for
+
+    Returns:
+        Dictionary with the decoded text, the offset of its first byte, its
+        length in bytes, whether the end of the file was reached, the bytes
+        streamed, and next_offset to continue from when it was not
+    """
+    if read.tail is not None:
+        return await _read_tail(chunks, read.tail, max_bytes)
+
+    limit = max_bytes if read.length is None else min(read.length, max_bytes)
+    if read.head == 0 or limit == 0:
+        # An empty range: nothing needs to be streamed
+        async with contextlib.aclosing(chunks):
+            pass
+        return {
+            "text": "",
+            "offset": read.offset,
+            "bytes": 0,
+            "eof": False,
+            "streamed": 0,
+            "next_offset": read.offset,
+        }
+    position = 0
+    data = bytearray()
+    lines = 0
+    eof = True
+    async with contextlib.aclosing(chunks) as stream:
+        async for chunk in stream:
+            start = position
+            position += len(chunk)
+            if position <= read.offset:
+                continue
+            chunk = chunk[max(0, read.offset - start) :]
+            if read.head is not None:
+                # Cut after the head-th newline
+                index = -1
+                while lines < read.head:
+                    index = chunk.find(b"\n", index + 1)
+                    if index < 0:
+                        break
+                    lines += 1
+                if lines == read.head and index >= 0:
+                    chunk = chunk[: index + 1]
+            data += chunk[: limit - len(data)]
+            if len(data) >= limit or (read.head is not None and lines >= read.head):
+                eof = False
+                break
+
+    result = {
+        "text": bytes(data).decode("utf-8", errors="replace"),
+        "offset": read.offset,
+        "bytes": len(data),
+        "eof": eof,
+        "streamed": position,
+    }
+    if not eof:
+        result["next_offset"] = read.offset + len(data)
+    return result
+
+
+async def _read_tail(chunks: AsyncIterator[bytes], count: int, max_bytes: int) -> dict[str, Any]:
+    """Last count lines of a stream, keeping no more than that in memory"""
+    lines: deque[bytes] = deque(maxlen=count)
+    partial = b""
+    position = 0
+    async with contextlib.aclosing(chunks) as stream:
+        async for chunk in stream:
+            position += len(chunk)
+            *complete, partial = (partial + chunk).split(b"\n")
+            lines.extend(line + b"\n" for line in complete)
+            # An unterminated line is kept only up to the byte budget
+            partial = partial[-max_bytes:]
+    if partial:
+        lines.append(partial)
+    data = b"".join(lines)[-max_bytes:]
+    return {
+        "text": data.decode("utf-8", errors="replace"),
+        "offset": position - len(data),
+        "bytes": len(data),
+        "eof": True,
+        "streamed": position,
+    }
+
+
+@dataclass
+class FileEntry:
+    """One file or directory in a listing"""
+
+    name: str
+    size: int
+    mtime: Optional[int]
+    is_dir: bool
+
+    def as_dict(self) -> dict[str, Any]:
+        entry: dict[str, Any] = {"name": self.name, "size": self.size}
+        if self.mtime is not None:
+            entry["mtime"] = self.mtime
+        if self.is_dir:
+            entry["dir"] = True
+        return entry
+
+
+def _parse_lastmod(text: str) -> Optional[int]:
+    """A LASTMOD value as a Unix time, or None if it is in none of _LASTMOD_FORMATS"""
+    for fmt in _LASTMOD_FORMATS:
+        try:
+            parsed = time.strptime(text, fmt)
+        except ValueError:
+            continue
+        if "%Y" not in fmt:
+            parsed = time.strptime(f"{time.gmtime().tm_year} {text}", f"%Y {fmt}")
+        # Read as UTC, so mtimes do not shift with the server's time zone
+        return calendar.timegm(parsed)
+    return None
+
+
+def entry_from_long_listing(line: str) -> Optional[FileEntry]:
+    """
+    Parse a line of talosctl list -l
+
+    Columns are NODE MODE UID GID SIZE(B) LASTMOD NAME, where LASTMOD spans
+    several words, NAME may contain spaces and symlinks end in " -> target".
+    LASTMOD is found by trying each known format on the words after SIZE;
+    everything after it is the name.
+
+    Returns:
+        The entry, or None for the header and lines that are not entries
+    """
+    words = list(re.finditer(r"\S+", line))
+    if len(words) < 7 or words[0].group() == "NODE" or not words[4].group().isdigit():
+        return None
+    mtime = None
+    name_start = words[-1].start()
+    for count in sorted({fmt.count(" ") + 1 for fmt in _LASTMOD_FORMATS}, reverse=True):
+        if len(words) < 6 + count:
+            continue
+        mtime = _parse_lastmod(" ".join(w.group() for w in words[5 : 5 + count]))
+        if mtime is not None:
+            name_start = words[5 + count].start()
+            break
+    name = line[name_start:].rstrip("\r\n").partition(" -> ")[0]
+    return FileEntry(name, int(words[4].group()), mtime, words[1].group().startswith("d"))
+
+
+class _Descending:
+    """Sort key wrapper inverting the order, to keep a max-heap with heapq"""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key: tuple):
+        self.key = key
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.key < self.key
+
+
+@dataclass(frozen=True)
+class ListPage:
+    """Which page of a listing to return"""
+
+    limit: int = DEFAULT_PAGE_SIZE
+    pattern: Optional[str] = None
+    sort: str = "none"
+    reverse: bool = False
+    cursor: Optional[dict[str, Any]] = None
+
+    @classmethod
+    def from_arguments(cls, arguments: dict[str, Any]) -> Optional["ListPage"]:
+        """
+        Build the page from tool arguments
+
+        Returns:
+            The page, or None if the call asks for a plain listing
+
+        Raises:
+            ValueError: If a value is invalid or the cursor belongs to another listing
+        """
+        keys = ("limit", "pattern", "sort", "reverse", "cursor")
+        if all(arguments.get(key) is None for key in keys):
+            return None
+        sort = arguments.get("sort") or "none"
+        if sort not in SORT_KEYS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+        limit = int(arguments.get("limit") or DEFAULT_PAGE_SIZE)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        page = cls(
+            limit=limit,
+            pattern=arguments.get("pattern") or None,
+            sort=sort,
+            reverse=bool(arguments.get("reverse")),
+        )
+        if arguments.get("cursor"):
+            cursor = decode_cursor(arguments["cursor"])
+            if cursor.get("listing") != page.identity:
+                raise ValueError("cursor belongs to a listing with another pattern or sort order")
+            page = cls(page.limit, page.pattern, page.sort, page.reverse, cursor)
+        return page
+
+    @property
+    def identity(self) -> list[Any]:
+        """What a cursor must agree on to continue this listing"""
+        return [self.pattern, self.sort, self.reverse]
+
+    def matches(self, entry: FileEntry) -> bool:
+        if self.pattern is None:
+            return True
+        # Patterns with a slash match the path, others just the base name
+        target = entry.name if "/" in self.pattern else entry.name.rsplit("/", 1)[-1]
+        return fnmatch.fnmatchcase(target, self.pattern)
+
+    def key(self, entry: FileEntry) -> tuple:
+        if self.sort == "size":
+            return (entry.size, entry.name)
+        if self.sort == "mtime":
+            return (entry.mtime or 0, entry.name)
+        return (entry.name,)
+
+
+def encode_cursor(cursor: dict[str, Any]) -> str:
+    raw = json.dumps(cursor, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        cursor = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise ValueError("invalid cursor")
+    if not isinstance(cursor, dict):
+        raise ValueError("invalid cursor")
+    return cursor
+
+
+async def list_page(entries: AsyncIterator[FileEntry], page: ListPage) -> dict[str, Any]:
+    """
+    One page of a streamed listing
+
+    Args:
+        entries: The listing as it streams
+        page: Filter, order, size and position of the page
+
+    Returns:
+        Dictionary with the page's entries, the entries streamed and matched,
+        and the cursor of the next page (None on the last page)
+    """
+    if page.sort == "none":
+        return await _page_in_stream_order(entries, page)
+    return await _page_sorted(entries, page)
+
+
+async def _page_in_stream_order(entries: AsyncIterator[FileEntry], page: ListPage) -> dict:
+    skip = int((page.cursor or {}).get("skip", 0))
+    items: list[FileEntry] = []
+    scanned = matched = 0
+    more = False
+    async with contextlib.aclosing(entries) as stream:
+        async for entry in stream:
+            scanned += 1
+            if not page.matches(entry):
+                continue
+            matched += 1
+            if matched <= skip:
+                continue
+            if len(items) == page.limit:
+                # The stream is closed here, without reading the rest of the tree
+                more = True
+                break
+            items.append(entry)
+
+    cursor = None
+    if more:
+        cursor = encode_cursor({"listing": page.identity, "skip": skip + len(items)})
+    return {
+        "entries": [entry.as_dict() for entry in items],
+        "scanned": scanned,
+        "cursor": cursor,
+    }
+
+
+async def _page_sorted(entries: AsyncIterator[FileEntry], page: ListPage) -> dict:
+    after = tuple(page.cursor["after"]) if page.cursor and "after" in page.cursor else None
+    keep = page.limit + 1
+    # Holds the best keep entries so far with the worst on top
+    heap: list[tuple[Any, int, FileEntry]] = []
+    scanned = matched = 0
+    async with contextlib.aclosing(entries) as stream:
+        async for entry in stream:
+            scanned += 1
+            if not page.matches(entry):
+                continue
+            matched += 1
+            key = page.key(entry)
+            if after is not None and (key <= after if not page.reverse else key >= after):
+                continue
+            item = (key if page.reverse else _Descending(key), scanned, entry)
+            if len(heap) < keep:
+                heapq.heappush(heap, item)
+            elif heap[0][0] < item[0]:
+                heapq.heapreplace(heap, item)
+
+    ordered = sorted((item[2] for item in heap), key=page.key, reverse=page.reverse)
+    items, more = ordered[: page.limit], len(ordered) > page.limit
+    cursor = None
+    if more:
+        last = list(page.key(items[-1]))
+        cursor = encode_cursor({"listing": page.identity, "after": last})
+    return {
+        "entries": [entry.as_dict() for entry in items],
+        "scanned": scanned,
+        "matched": matched,
+        "cursor": cursor,
+    }
@@ -0,0 +1,590 @@
+"""
+Native gRPC transport for the Talos API
+
+Talks to apid directly over pooled, persistent (m)TLS HTTP/2 channels instead
+of spawning a talosctl process for every tool call.
+"""
+
+import asyncio
+import base64
+import contextlib
+import json
+import logging
+import os
+import ssl
+import tempfile
+from typing import Any, AsyncIterator, Optional
+
+import betterproto.lib.google.protobuf as google_protobuf
+import yaml
+
+from talos_mcp.files import FileEntry
+from talos_mcp.metrics import call_metrics
+from talos_mcp.normalize import format_table, render_resources
+from talos_mcp.pool import ChannelPool, tls_identity
+from talos_mcp.proto import common, machine, resource
+from talos_mcp.selector import ResourceSelector
+from talos_mcp.streaming import MAX_OUTPUT_BYTES, MAX_OUTPUT_LINES, BoundedOutput, LineDecoder
+
+logger = logging.getLogger("talos-mcp-server")
+
+DEFAULT_PORT = 50000
+
+# Resource dumps with more items than this are rendered in a worker thread
+RENDER_IN_THREAD_ITEMS = 64
+
+
+def parse_endpoint(endpoint: str) -> tuple[str, int]:
+    """
+    Split a talosconfig endpoint into host and port
+
+    Args:
+        endpoint: Endpoint as found in talosconfig (e.g. "10.0.0.1", "10.0.0.1:50000", "[::1]")
+
+    Returns:
+        Tuple of (host, port), using the default apid port when none is given
+    """
+    endpoint = endpoint.strip()
+    if "://" in endpoint:
+        endpoint = endpoint.split("://", 1)[1]
+
+    if endpoint.startswith("["):
+        host, _, rest = endpoint[1:].partition("]")
+        port = rest.lstrip(":")
+        return host, int(port) if port else DEFAULT_PORT
+
+    if endpoint.count(":") == 1:
+        host, port = endpoint.split(":")
+        return host, int(port)
+
+    return endpoint, DEFAULT_PORT
+
+
+def build_ssl_context(context_data: dict) -> ssl.SSLContext:
+    """
+    Build an mTLS client context from a talosconfig context
+
+    Args:
+        context_data: Context entry from talosconfig with base64-encoded ca, crt and key
+
+    Returns:
+        SSL context trusting the cluster CA and presenting the client certificate
+    """
+    ca = base64.b64decode(context_data["ca"]).decode("utf-8")
+    ctx = ssl.create_default_context(ssl.Purpose.SERVER_AUTH, cadata=ca)
+
+    # load_cert_chain only accepts file paths, so stage the client identity
+    # in a private temporary directory that is removed right after loading.
+    with tempfile.TemporaryDirectory(prefix="talos-mcp-") as tmp:
+        crt_path = os.path.join(tmp, "client.crt")
+        key_path = os.path.join(tmp, "client.key")
+        for path, field in ((crt_path, "crt"), (key_path, "key")):
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(base64.b64decode(context_data[field]))
+        ctx.load_cert_chain(crt_path, key_path)
+
+    ctx.set_alpn_protocols(["h2"])
+    return ctx
+
+
+def format_bytes(size: int) -> str:
+    """Human-readable SI size, as printed by talosctl (e.g. "67 MB")"""
+    if size < 1000:
+        return f"{size} B"
+    value = float(size)
+    for unit in ("kB", "MB", "GB", "TB", "PB"):
+        value /= 1000
+        if value < 1000 or unit == "PB":
+            return f"{value:.1f} {unit}" if value < 10 else f"{value:.0f} {unit}"
+    return f"{size} B"
+
+
+def resource_document(node: str, res: Any, spec: bool = True) -> dict[str, Any]:
+    """
+    A resource as `talosctl get -o json` prints it
+
+    Args:
+        node: Node the resource was read from
+        res: The resource message
+        spec: Whether to decode the spec; tables and label selectors do not need it
+    """
+    md = res.metadata
+    return {
+        "node": node,
+        "metadata": {
+            "namespace": md.namespace,
+            "type": md.type,
+            "id": md.id,
+            "version": md.version,
+            "owner": md.owner,
+            "phase": md.phase,
+            "labels": dict(md.labels),
+        },
+        "spec": yaml.safe_load(res.spec.yaml) if spec and res.spec.yaml else None,
+    }
+
+
+def _node_metadata(nodes: Optional[list[str]]) -> Optional[list[tuple[str, str]]]:
+    """Build the apid proxy metadata targeting the given nodes"""
+    if not nodes:
+        return None
+    return [("nodes", node) for node in nodes]
+
+
+def _hostname(metadata: Optional[common.Metadata], fallback: str = "") -> str:
+    if metadata is not None and metadata.hostname:
+        return metadata.hostname
+    return fallback
+
+
+def _result(stdout: str, errors: list[str], truncated: bool = False) -> dict[str, Any]:
+    """Shape a gRPC response like execute_talosctl's result dictionary"""
+    return {
+        "success": not errors,
+        "returncode": 0 if not errors else 1,
+        "stdout": stdout,
+        "stderr": "\n".join(errors),
+        "truncated": truncated,
+    }
+
+
+class GrpcTransport:
+    """Async client for the Talos MachineService and ResourceService over pooled channels"""
+
+    def __init__(
+        self,
+        endpoints: list[str],
+        ssl_context: Any = None,
+        pool: Optional[ChannelPool] = None,
+        context: str = "default",
+        identity: str = "insecure",
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+        max_output_lines: int = MAX_OUTPUT_LINES,
+    ):
+        """
+        Initialize the transport
+
+        Args:
+            endpoints: apid endpoints to spread calls across (talosconfig format)
+            ssl_context: SSL context for mTLS, or None for a plaintext channel (stub servers)
+            pool: Channel pool to lease connections from. A private pool is created if omitted
+            context: talosconfig context name, part of the pool key
+            identity: Client certificate fingerprint, part of the pool key
+            max_output_bytes: Output kept per node of a read or log call
+            max_output_lines: Lines kept per node of a read or log call
+        """
+        if not endpoints:
+            raise ValueError("Talos context has no endpoints")
+        self.endpoints = list(endpoints)
+        self.pool = pool or ChannelPool()
+        self._owns_pool = pool is None
+        self.max_output_bytes = max_output_bytes
+        self.max_output_lines = max_output_lines
+        self.keys = []
+        for endpoint in self.endpoints:
+            host, port = parse_endpoint(endpoint)
+            self.keys.append(
+                self.pool.register(context, endpoint, host, port, identity, ssl_context)
+            )
+
+    @classmethod
+    def from_context(
+        cls,
+        context_data: dict,
+        context: str = "default",
+        pool: Optional[ChannelPool] = None,
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+        max_output_lines: int = MAX_OUTPUT_LINES,
+    ) -> "GrpcTransport":
+        """
+        Create a transport for all endpoints of a talosconfig context
+
+        Args:
+            context_data: Context entry from talosconfig
+            context: Name of the context
+            pool: Channel pool shared with other transports
+            max_output_bytes: Output kept per node of a read or log call
+            max_output_lines: Lines kept per node of a read or log call
+
+        Returns:
+            Transport connecting through the context's mTLS identity
+        """
+        return cls(
+            context_data.get("endpoints") or [],
+            ssl_context=build_ssl_context(context_data),
+            pool=pool,
+            context=context,
+            identity=tls_identity(context_data),
+            max_output_bytes=max_output_bytes,
+            max_output_lines=max_output_lines,
+        )
+
+    def close(self):
+        """Close the transport's pooled connections if it owns the pool"""
+        if self._owns_pool:
+            self.pool.close()
+
+    @contextlib.asynccontextmanager
+    async def _machine(self) -> AsyncIterator[tuple[machine.MachineServiceStub, str]]:
+        """Lease a channel and wrap it in a MachineService stub"""
+        async with self.pool.lease(self.keys) as channel:
+            yield machine.MachineServiceStub(channel), channel.host
+
+    @contextlib.asynccontextmanager
+    async def _resources(self) -> AsyncIterator[tuple[resource.ResourceServiceStub, str]]:
+        """Lease a channel and wrap it in a ResourceService stub"""
+        async with self.pool.lease(self.keys) as channel:
+            yield resource.ResourceServiceStub(channel), channel.host
+
+    async def version(self, nodes: Optional[list[str]] = None) -> dict[str, Any]:
+        """Get Talos version information (talosctl version)"""
+        async with self._machine() as (stub, host):
+            response = await stub.version(google_protobuf.Empty(), metadata=_node_metadata(nodes))
+
+        lines = ["Server:"]
+        errors = []
+        for msg in response.messages:
+            node = _hostname(msg.metadata, host)
+            if msg.metadata and msg.metadata.error:
+                errors.append(f"{node}: {msg.metadata.error}")
+                continue
+            lines.append(f"\tNODE:        {node}")
+            lines.append(f"\tTag:         {msg.version.tag}")
+            lines.append(f"\tSHA:         {msg.version.sha}")
+            lines.append(f"\tBuilt:       {msg.version.built}")
+            lines.append(f"\tGo version:  {msg.version.go_version}")
+            lines.append(f"\tOS/Arch:     {msg.version.os}/{msg.version.arch}")
+            if msg.platform and msg.platform.name:
+                lines.append(f"\tPlatform:    {msg.platform.name} ({msg.platform.mode})")
+        return _result("\n".join(lines) + "\n", errors)
+
+    async def services(self, nodes: Optional[list[str]] = None) -> dict[str, Any]:
+        """Get service status (talosctl services)"""
+        async with self._machine() as (stub, host):
+            response = await stub.service_list(
+                google_protobuf.Empty(), metadata=_node_metadata(nodes)
+            )
+
+        rows = []
+        errors = []
+        for msg in response.messages:
+            node = _hostname(msg.metadata, host)
+            if msg.metadata and msg.metadata.error:
+                errors.append(f"{node}: {msg.metadata.error}")
+                continue
+            for svc in msg.services:
+                if svc.health.unknown:
+                    health = "?"
+                else:
+                    health = "OK" if svc.health.healthy else "Fail"
+                events = svc.events.events if svc.events else []
+                last_event = events[-1].msg if events else ""
+                rows.append([node, svc.id, svc.state, health, last_event])
+
+        headers = ["NODE", "SERVICE", "STATE", "HEALTH", "LAST EVENT"]
+        return _result(format_table(headers, rows), errors)
+
+    async def get(
+        self,
+        resource_type: str,
+        nodes: Optional[list[str]] = None,
+        output: Optional[str] = None,
+        namespace: str = "",
+        selector: Optional[ResourceSelector] = None,
+    ) -> dict[str, Any]:
+        """Get Talos resources (talosctl get), optionally filtered by label and field selectors"""
+        # Specs are decoded only when printed or filtered on
+        spec = output in ("json", "yaml") or bool(selector and selector.fields)
+        docs, errors = await self.resource_documents(resource_type, nodes, namespace, spec)
+        if selector is not None:
+            docs = [doc for doc in docs if selector.matches(doc)]
+
+        with call_metrics.stage("serialize", items=len(docs)):
+            if output in ("json", "yaml") and len(docs) > RENDER_IN_THREAD_ITEMS:
+                # Large dumps (rd, machineconfig) would stall the stdio loop
+                stdout = await asyncio.to_thread(render_resources, docs, output)
+            else:
+                stdout = render_resources(docs, output)
+        return _result(stdout, errors)
+
+    async def resource_documents(
+        self,
+        resource_type: str,
+        nodes: Optional[list[str]] = None,
+        namespace: str = "",
+        spec: bool = True,
+    ) -> tuple[list[dict[str, Any]], list[str]]:
+        """
+        List resources as documents
+
+        Returns:
+            The documents, and an error per node that could not list them
+        """
+        request = resource.ListRequest(namespace=namespace, type=resource_type)
+        docs = []
+        errors = []
+        async with self._resources() as (stub, host):
+            async for msg in stub.list(request, metadata=_node_metadata(nodes)):
+                node = _hostname(msg.metadata, host)
+                if msg.metadata and msg.metadata.error:
+                    errors.append(f"{node}: {msg.metadata.error}")
+                    continue
+                if msg.resource is None or not msg.resource.metadata.id:
+                    continue
+                docs.append(resource_document(node, msg.resource, spec))
+        return docs, errors
+
+    async def watch_resources(
+        self, resource_type: str, node: str, namespace: str = ""
+    ) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """
+        Stream changes to resources of a type on one node (talosctl get --watch)
+
+        Yields:
+            (event type, document) per change, with resource.EventType values
+
+        Raises:
+            RuntimeError: If the node reports an error
+        """
+        request = resource.WatchRequest(namespace=namespace, type=resource_type)
+        async with self._resources() as (stub, host):
+            stream = stub.watch(request, metadata=_node_metadata([node]))
+            async with contextlib.aclosing(stream):
+                async for msg in stream:
+                    if msg.metadata and msg.metadata.error:
+                        raise RuntimeError(f"{_hostname(msg.metadata, host)}: {msg.metadata.error}")
+                    if msg.resource is None or not msg.resource.metadata.id:
+                        continue
+                    node_name = _hostname(msg.metadata, host)
+                    yield msg.event_type, resource_document(node_name, msg.resource)
+
+    async def logs(
+        self,
+        service: str,
+        nodes: Optional[list[str]] = None,
+        kubernetes: bool = False,
+        tail: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Get service or container logs (talosctl logs)"""
+        request = machine.LogsRequest(
+            namespace="k8s.io" if kubernetes else "system",
+            id=service,
+            driver=common.ContainerDriver.CRI if kubernetes else common.ContainerDriver.CONTAINERD,
+            tail_lines=tail if tail else -1,
+        )
+
+        async with self._machine() as (stub, host):
+            chunks = await self._collect_data(
+                stub.logs(request, metadata=_node_metadata(nodes)), host
+            )
+        return self._render_data(chunks, prefix_nodes=bool(nodes and len(nodes) > 1))
+
+    async def stream_logs(
+        self,
+        service: str,
+        node: str,
+        kubernetes: bool = False,
+        tail: int = 0,
+        follow: bool = True,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a service's log lines from one node as they arrive (talosctl logs [-f])
+
+        Args:
+            service: Service or container ID
+            node: Node to read from
+            kubernetes: Read a container in the k8s.io namespace
+            tail: Lines of history to send first
+            follow: Keep streaming lines as they are written
+
+        Yields:
+            Log lines without trailing newlines, until the stream ends
+        """
+        request = machine.LogsRequest(
+            namespace="k8s.io" if kubernetes else "system",
+            id=service,
+            driver=common.ContainerDriver.CRI if kubernetes else common.ContainerDriver.CONTAINERD,
+            follow=follow,
+            tail_lines=tail,
+        )
+
+        decoder = LineDecoder()
+        async with self._machine() as (stub, host):
+            stream = stub.logs(request, metadata=_node_metadata([node]))
+            # Followers and merges stop early: close the HTTP/2 stream with them
+            async with contextlib.aclosing(stream):
+                async for data in stream:
+                    if data.metadata and data.metadata.error:
+                        raise RuntimeError(
+                            f"{_hostname(data.metadata, host)}: {data.metadata.error}"
+                        )
+                    for line in decoder.feed(data.bytes):
+                        yield line
+        for line in decoder.finish():
+            yield line
+
+    async def list_files(
+        self, path: str = "/", nodes: Optional[list[str]] = None, depth: int = 1
+    ) -> dict[str, Any]:
+        """List files and directories (talosctl list)"""
+        request = machine.ListRequest(root=path, recurse=depth > 1, recursion_depth=depth)
+
+        rows = []
+        errors = []
+        async with self._machine() as (stub, host):
+            async for info in stub.list(request, metadata=_node_metadata(nodes)):
+                node = _hostname(info.metadata, host)
+                if info.metadata and info.metadata.error:
+                    errors.append(f"{node}: {info.metadata.error}")
+                    continue
+                if info.error:
+                    errors.append(f"{node}: {info.name}: {info.error}")
+                    continue
+                rows.append([node, info.relative_name or info.name])
+
+        return _result(format_table(["NODE", "NAME"], rows), errors)
+
+    async def list_entries(self, path: str, node: str, depth: int = 1) -> AsyncIterator[FileEntry]:
+        """
+        Stream the entries under a path on one node as they arrive (talosctl list -l)
+
+        Entries that could not be read are skipped.
+
+        Raises:
+            RuntimeError: If the node reports an error
+        """
+        request = machine.ListRequest(root=path, recurse=depth > 1, recursion_depth=depth)
+        async with self._machine() as (stub, host):
+            stream = stub.list(request, metadata=_node_metadata([node]))
+            async with contextlib.aclosing(stream):
+                async for info in stream:
+                    if info.metadata and info.metadata.error:
+                        raise RuntimeError(
+                            f"{_hostname(info.metadata, host)}: {info.metadata.error}"
+                        )
+                    if info.error:
+                        logger.debug(f"Skipping {info.name} on {node}: {info.error}")
+                        continue
+                    yield FileEntry(
+                        info.relative_name or info.name,
+                        info.size,
+                        info.modified or None,
+                        info.is_dir,
+                    )
+
+    async def processes(self, nodes: Optional[list[str]] = None) -> dict[str, Any]:
+        """List processes (talosctl processes)"""
+        async with self._machine() as (stub, host):
+            response = await stub.processes(google_protobuf.Empty(), metadata=_node_metadata(nodes))
+
+        rows = []
+        errors = []
+        for msg in response.messages:
+            node = _hostname(msg.metadata, host)
+            if msg.metadata and msg.metadata.error:
+                errors.append(f"{node}: {msg.metadata.error}")
+                continue
+            for proc in msg.processes:
+                rows.append(
+                    [
+                        node,
+                        proc.pid,
+                        proc.state,
+                        proc.threads,
+                        f"{proc.cpu_time:.2f}",
+                        format_bytes(proc.virtual_memory),
+                        format_bytes(proc.resident_memory),
+                        proc.args or proc.command,
+                    ]
+                )
+
+        headers = ["NODE", "PID", "STATE", "THREADS", "CPU-TIME", "VIRTMEM", "RESMEM", "COMMAND"]
+        return _result(format_table(headers, rows), errors)
+
+    async def read(self, path: str, nodes: Optional[list[str]] = None) -> dict[str, Any]:
+        """Read a file (talosctl read)"""
+        request = machine.ReadRequest(path=path)
+
+        async with self._machine() as (stub, host):
+            chunks = await self._collect_data(
+                stub.read(request, metadata=_node_metadata(nodes)), host
+            )
+        return self._render_data(chunks, prefix_nodes=False)
+
+    async def read_chunks(self, path: str, node: str) -> AsyncIterator[bytes]:
+        """
+        Stream a file from one node as it arrives (talosctl read)
+
+        Closing the iterator early cancels the stream.
+
+        Raises:
+            RuntimeError: If the node reports an error
+        """
+        request = machine.ReadRequest(path=path)
+        async with self._machine() as (stub, host):
+            stream = stub.read(request, metadata=_node_metadata([node]))
+            async with contextlib.aclosing(stream):
+                async for data in stream:
+                    if data.metadata and data.metadata.error:
+                        raise RuntimeError(
+                            f"{_hostname(data.metadata, host)}: {data.metadata.error}"
+                        )
+                    if data.bytes:
+                        yield data.bytes
+
+    async def etcd_members(self, nodes: Optional[list[str]] = None) -> dict[str, Any]:
+        """List etcd cluster members (talosctl etcd members)"""
+        async with self._machine() as (stub, host):
+            response = await stub.etcd_member_list(
+                machine.EtcdMemberListRequest(), metadata=_node_metadata(nodes)
+            )
+
+        rows = []
+        errors = []
+        for msg in response.messages:
+            node = _hostname(msg.metadata, host)
+            if msg.metadata and msg.metadata.error:
+                errors.append(f"{node}: {msg.metadata.error}")
+                continue
+            for member in msg.members:
+                rows.append(
+                    [
+                        node,
+                        f"{member.id:x}",
+                        member.hostname,
+                        ",".join(member.peer_urls),
+                        ",".join(member.client_urls),
+                        str(member.is_learner).lower(),
+                    ]
+                )
+
+        headers = ["NODE", "ID", "HOSTNAME", "PEER URLS", "CLIENT URLS", "LEARNER"]
+        return _result(format_table(headers, rows), errors)
+
+    async def _collect_data(self, stream, host: str) -> dict[str, Any]:
+        """Gather a stream of common.Data messages into bounded per-node buffers"""
+        buffers: dict[str, BoundedOutput] = {}
+        errors = []
+        async for data in stream:
+            node = _hostname(data.metadata, host)
+            if data.metadata and data.metadata.error:
+                errors.append(f"{node}: {data.metadata.error}")
+                continue
+            if node not in buffers:
+                buffers[node] = BoundedOutput(self.max_output_bytes, self.max_output_lines)
+            buffers[node].feed(data.bytes)
+        for buf in buffers.values():
+            buf.finish()
+        return {"buffers": buffers, "errors": errors}
+
+    @staticmethod
+    def _render_data(chunks: dict[str, Any], prefix_nodes: bool) -> dict[str, Any]:
+        parts = []
+        for node, buf in chunks["buffers"].items():
+            text = buf.render()
+            if prefix_nodes:
+                text = "".join(f"{node}: {line}\n" for line in text.splitlines())
+            parts.append(text)
+        truncated = any(buf.truncated for buf in chunks["buffers"].values())
+        return _result("".join(parts), chunks["errors"], truncated=truncated)
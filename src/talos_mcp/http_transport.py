@@ -0,0 +1,142 @@
+"""
+HTTP transport for the MCP server
+
+Serves the MCP streamable HTTP transport at /mcp and the older SSE transport
+at /sse (messages posted to /messages/), so that many MCP clients can share
+one long-running server process: its response cache, gRPC connection pools,
+resource mirrors, snapshot store and scheduler are shared by every session,
+and the scheduler shares slots fairly between clients.
+
+The server has the same access to the cluster as its talosconfig. It listens
+on 127.0.0.1 by default; set TALOS_MCP_HTTP_TOKEN to require a bearer token,
+in particular when binding another address.
+"""
+
+import contextlib
+import hmac
+import logging
+import os
+from typing import Any, AsyncIterator, Optional
+
+from mcp.server import Server
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger("talos-mcp-server")
+
+HTTP_HOST = os.environ.get("TALOS_MCP_HTTP_HOST", "127.0.0.1")
+HTTP_PORT = int(os.environ.get("TALOS_MCP_HTTP_PORT", "8765"))
+# Bearer token clients must send; empty: no authentication
+HTTP_TOKEN = os.environ.get("TALOS_MCP_HTTP_TOKEN", "")
+
+STREAMABLE_PATH = "/mcp"
+SSE_PATH = "/sse"
+MESSAGES_PATH = "/messages/"
+
+
+class _RequireToken:
+    """ASGI wrapper rejecting requests without the bearer token"""
+
+    def __init__(self, app: Any, token: str):
+        self.app = app
+        self.expected = f"Bearer {token}".encode("utf-8")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            authorization = dict(scope.get("headers") or []).get(b"authorization", b"")
+            if not hmac.compare_digest(authorization, self.expected):
+                response = PlainTextResponse(
+                    "Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"}
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _StreamableHTTP:
+    """ASGI endpoint handing requests to the session manager"""
+
+    def __init__(self, manager: StreamableHTTPSessionManager):
+        self.manager = manager
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await self.manager.handle_request(scope, receive, send)
+
+
+class _SSE:
+    """ASGI endpoint running one MCP session per SSE connection"""
+
+    def __init__(self, server: Server, transport: SseServerTransport):
+        self.server = server
+        self.transport = transport
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        async with self.transport.connect_sse(scope, receive, send) as (read, write):
+            await self.server.run(read, write, self.server.create_initialization_options())
+
+
+def build_app(server: Server, token: Optional[str] = None) -> Starlette:
+    """
+    ASGI application serving an MCP server over streamable HTTP and SSE
+
+    Args:
+        server: The MCP server every session runs against
+        token: Bearer token required on every request, or None for no authentication
+
+    Returns:
+        Starlette application with its session manager started by its lifespan
+    """
+    manager = StreamableHTTPSessionManager(app=server)
+    sse = SseServerTransport(MESSAGES_PATH)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app: Starlette) -> AsyncIterator[None]:
+        async with manager.run():
+            yield
+
+    def guarded(endpoint: Any) -> Any:
+        return _RequireToken(endpoint, token) if token else endpoint
+
+    return Starlette(
+        routes=[
+            Route(STREAMABLE_PATH, endpoint=guarded(_StreamableHTTP(manager))),
+            Route(SSE_PATH, endpoint=guarded(_SSE(server, sse)), methods=["GET"]),
+            Mount(MESSAGES_PATH, app=guarded(sse.handle_post_message)),
+        ],
+        lifespan=lifespan,
+    )
+
+
+async def serve(
+    server: Server, host: str = HTTP_HOST, port: int = HTTP_PORT, token: Optional[str] = None
+):
+    """
+    Serve an MCP server over HTTP until cancelled
+
+    Args:
+        server: The MCP server
+        host: Address to listen on
+        port: Port to listen on
+        token: Bearer token required from clients; TALOS_MCP_HTTP_TOKEN by default
+    """
+    import uvicorn
+
+    token = HTTP_TOKEN if token is None else token
+    if not token and host not in ("127.0.0.1", "localhost", "::1"):
+        logger.warning(
+            f"Serving MCP on {host}:{port} without authentication; "
+            "set TALOS_MCP_HTTP_TOKEN to require a bearer token"
+        )
+    config = uvicorn.Config(
+        build_app(server, token or None),
+        host=host,
+        port=port,
+        log_level="warning",
+        lifespan="on",
+    )
+    logger.info(f"Serving MCP over HTTP at http://{host}:{port}{STREAMABLE_PATH} and {SSE_PATH}")
+    await uvicorn.Server(config).serve()
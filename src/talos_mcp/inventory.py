@@ -0,0 +1,387 @@
+"""
+Cluster inventory: which nodes exist, and their hostname, role and version
+
+Discovery reads the cluster membership (`talosctl get members`) from the
+first of the context's nodes that answers, then the nodename and
+machinetype resources of every member in one multi-node read each. Members
+carry each node's addresses, hostname, machine type and operating system;
+the per-node resources confirm hostname and role and tell which nodes
+answered. Without cluster discovery, the context's nodes are the inventory.
+
+Each context's inventory is indexed by address, hostname, role and version
+and refreshed in the background every INVENTORY_REFRESH_INTERVAL seconds,
+so tools can take node selectors instead of addresses:
+
+    all                       every node
+    role=controlplane         kubectl-style requirements on ip, hostname,
+    role=worker,version=v1.8.0    role and version, all of which must hold
+    hostname in (cp-1,cp-2)
+
+Selectors are resolved from memory; only the first one in a context waits
+for discovery. Inventories nobody used within the idle TTL stop refreshing.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from talos_mcp.metrics import detach_trace
+from talos_mcp.scheduler import current_client
+from talos_mcp.selector import parse_selector
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Seconds between background refreshes of a context's inventory
+INVENTORY_REFRESH_INTERVAL = float(os.environ.get("TALOS_MCP_INVENTORY_REFRESH_INTERVAL", "300"))
+# Seconds without a lookup after which an inventory stops refreshing
+INVENTORY_IDLE_TTL = float(os.environ.get("TALOS_MCP_INVENTORY_IDLE_TTL", "1800"))
+# Seconds before a failed discovery is retried
+INVENTORY_RETRY_DELAY = 10.0
+# Seconds each discovery read may take
+DISCOVERY_TIMEOUT = 30.0
+
+# Fields a node selector can test
+SELECTOR_FIELDS = ("ip", "hostname", "role", "version")
+
+_VERSION = re.compile(r"v\d+\.\d+\.\d+[\w.+-]*")
+
+
+@dataclass
+class NodeRecord:
+    """One node of the inventory"""
+
+    ip: str
+    hostname: str = ""
+    role: str = ""
+    version: str = ""
+    addresses: list[str] = field(default_factory=list)
+    # Whether the node answered the last refresh's per-node reads
+    reachable: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def is_selector(nodes: Any) -> bool:
+    """Whether a nodes argument is a selector rather than a list of addresses"""
+    if not isinstance(nodes, str):
+        return False
+    text = nodes.strip()
+    return text.lower() == "all" or any(char in text for char in "=!(")
+
+
+def _role(machine_type: Any) -> str:
+    """Role from a machine type; the first control plane node is "init" on old clusters"""
+    text = str(machine_type or "").strip().lower()
+    return "controlplane" if text in ("controlplane", "init") else text
+
+
+def _address(addresses: list[str]) -> str:
+    """Address to target a node by: its first IPv4 address, else its first one"""
+    for address in addresses:
+        if ":" not in address:
+            return address
+    return addresses[0]
+
+
+def build_records(
+    seeds: list[str],
+    members: list[dict[str, Any]],
+    nodenames: list[dict[str, Any]],
+    machinetypes: list[dict[str, Any]],
+) -> list[NodeRecord]:
+    """
+    Combine discovery results into node records
+
+    Args:
+        seeds: The context's nodes; those that are no member's address are kept as nodes
+        members: Member documents (talosctl get members -o json)
+        nodenames: Nodename documents of the nodes, with their "node"
+        machinetypes: Machinetype documents of the nodes, with their "node"
+
+    Returns:
+        Records by address, in member order, then the remaining seeds
+    """
+    records: dict[str, NodeRecord] = {}
+    for doc in members:
+        spec = doc.get("spec") or {}
+        addresses = [str(a) for a in spec.get("addresses") or [] if a]
+        if not addresses:
+            continue
+        ip = _address(addresses)
+        version = _VERSION.search(str(spec.get("operatingSystem") or ""))
+        records[ip] = NodeRecord(
+            ip=ip,
+            hostname=str(spec.get("hostname") or ""),
+            role=_role(spec.get("machineType")),
+            version=version.group(0) if version else "",
+            addresses=addresses,
+        )
+
+    known = {address: record for record in records.values() for address in record.addresses}
+    for seed in seeds:
+        if seed not in known:
+            known[seed] = records[seed] = NodeRecord(ip=seed, addresses=[seed])
+
+    for doc in nodenames:
+        record = known.get(doc.get("node", ""))
+        spec = doc.get("spec")
+        if record is not None:
+            record.reachable = True
+            if isinstance(spec, dict) and spec.get("nodename"):
+                record.hostname = str(spec["nodename"])
+    for doc in machinetypes:
+        record = known.get(doc.get("node", ""))
+        if record is not None:
+            record.reachable = True
+            spec = doc.get("spec")
+            if isinstance(spec, dict):
+                spec = spec.get("machineType") or spec.get("type")
+            if spec:
+                record.role = _role(spec)
+    return list(records.values())
+
+
+Discover = Callable[[], Awaitable[list[NodeRecord]]]
+
+
+class Inventory:
+    """One context's nodes, indexed and refreshed in the background"""
+
+    def __init__(self, context: str, discover: Discover, refresh_interval: float):
+        """
+        Initialize the inventory; discovery starts with start()
+
+        Args:
+            context: Context the nodes belong to, for logging and stats
+            discover: Coroutine function discovering the context's nodes
+            refresh_interval: Seconds between refreshes
+        """
+        self.context = context
+        self._discover = discover
+        self.refresh_interval = refresh_interval
+        self._task: Optional[asyncio.Task] = None
+        self._discovered = asyncio.Event()
+        self.records: dict[str, NodeRecord] = {}
+        # field -> value -> addresses
+        self._index: dict[str, dict[str, list[str]]] = {}
+
+        self.refreshed_at: Optional[float] = None
+        self.last_used = time.monotonic()
+        self.refreshes = 0
+        self.failures = 0
+        self.lookups = 0
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # Started from a tool call, but refreshes belong to no call and no client
+        detach_trace()
+        current_client.set("")
+        while True:
+            delay = self.refresh_interval
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.error = str(e) or type(e).__name__
+                logger.warning(f"Node inventory of {self.context} not refreshed: {self.error}")
+                if not self.records:
+                    delay = min(delay, INVENTORY_RETRY_DELAY)
+            finally:
+                # Lookups waiting for the first discovery get whatever there is
+                self._discovered.set()
+            await asyncio.sleep(delay)
+
+    async def refresh(self):
+        """Discover the nodes again and replace the index"""
+        records = await self._discover()
+        if not records:
+            raise RuntimeError("discovery found no nodes")
+        self.records = {record.ip: record for record in records}
+        index: dict[str, dict[str, list[str]]] = {name: {} for name in SELECTOR_FIELDS}
+        for record in records:
+            for name in SELECTOR_FIELDS:
+                index[name].setdefault(getattr(record, name), []).append(record.ip)
+        self._index = index
+        self.refreshed_at = time.monotonic()
+        self.refreshes += 1
+        self.error = None
+        logger.info(f"Node inventory of {self.context}: {len(records)} nodes")
+
+    async def ready(self, timeout: Optional[float]) -> bool:
+        """Wait for the first discovery; whether there are nodes to select from"""
+        self.start()
+        if not self._discovered.is_set():
+            try:
+                await asyncio.wait_for(self._discovered.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return bool(self.records)
+
+    def select(self, text: str) -> list[str]:
+        """
+        Addresses of the nodes a selector matches, in inventory order
+
+        Raises:
+            ValueError: If the selector is malformed or tests an unknown field
+        """
+        self.last_used = time.monotonic()
+        self.lookups += 1
+        if text.strip().lower() == "all":
+            return list(self.records)
+        requirements = parse_selector(text)
+        for requirement in requirements:
+            if requirement.key not in SELECTOR_FIELDS:
+                raise ValueError(
+                    f"unknown node field {requirement.key!r}; "
+                    f"select on {', '.join(SELECTOR_FIELDS)} or use 'all'"
+                )
+        candidates = list(self.records)
+        for requirement in requirements:
+            if requirement.op in ("=", "in"):
+                # Index lookup narrows the candidates before the other requirements
+                bucket = self._index.get(requirement.key, {})
+                matched = {ip for value in requirement.values for ip in bucket.get(value, [])}
+                candidates = [ip for ip in candidates if ip in matched]
+        return [
+            ip
+            for ip in candidates
+            if all(r.matches(getattr(self.records[ip], r.key)) for r in requirements)
+        ]
+
+    async def stop(self):
+        """Cancel the refresh loop and wait for it to end"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        roles: dict[str, int] = {}
+        for record in self.records.values():
+            roles[record.role or "unknown"] = roles.get(record.role or "unknown", 0) + 1
+        return {
+            "context": self.context,
+            "nodes": len(self.records),
+            "roles": roles,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "lookups": self.lookups,
+            "refreshed_s_ago": round(now - self.refreshed_at, 1) if self.refreshed_at else None,
+            "idle_s": round(now - self.last_used, 1),
+            "error": self.error,
+        }
+
+
+class Inventories:
+    """Node inventories by context, refreshed while in use"""
+
+    def __init__(
+        self,
+        refresh_interval: float = INVENTORY_REFRESH_INTERVAL,
+        idle_ttl: float = INVENTORY_IDLE_TTL,
+    ):
+        self.refresh_interval = refresh_interval
+        self.idle_ttl = idle_ttl
+        self._inventories: OrderedDict[str, Inventory] = OrderedDict()
+
+    def get(self, context: str, discover: Discover) -> Inventory:
+        """
+        A context's inventory, created and started on first use
+
+        Args:
+            context: Context name
+            discover: Coroutine function discovering the context's nodes
+        """
+        self.reap()
+        inventory = self._inventories.get(context)
+        if inventory is None:
+            inventory = self._inventories[context] = Inventory(
+                context, discover, self.refresh_interval
+            )
+            logger.info(f"Starting node inventory of {context}")
+        inventory.last_used = time.monotonic()
+        inventory.start()
+        return inventory
+
+    async def select(
+        self, context: str, text: str, discover: Discover, timeout: Optional[float] = None
+    ) -> list[str]:
+        """
+        Resolve a node selector to addresses
+
+        Args:
+            context: Context the call targets
+            text: The selector
+            discover: Coroutine function discovering the context's nodes
+            timeout: Seconds to wait for the first discovery
+
+        Returns:
+            Addresses of the matching nodes
+
+        Raises:
+            ValueError: If the selector is malformed, matches no node, or the
+                inventory is not available
+        """
+        inventory = self.get(context, discover)
+        if not await inventory.ready(timeout):
+            raise ValueError(
+                f"node inventory of {context} is not available"
+                + (f": {inventory.error}" if inventory.error else "")
+            )
+        nodes = inventory.select(text)
+        if not nodes:
+            raise ValueError(f"no nodes match {text!r} ({len(inventory.records)} known)")
+        return nodes
+
+    def reap(self) -> int:
+        """Stop inventories nobody used within the idle TTL"""
+        now = time.monotonic()
+        idle = [k for k, i in self._inventories.items() if now - i.last_used > self.idle_ttl]
+        for key in idle:
+            self._cancel(self._inventories.pop(key))
+        return len(idle)
+
+    @staticmethod
+    def _cancel(inventory: Inventory):
+        # Called from synchronous code: the task finishes cancelling on its own
+        if inventory._task is not None:
+            inventory._task.cancel()
+
+    def discard(self, context: str) -> bool:
+        """Forget a context's inventory, when its nodes or endpoints change"""
+        inventory = self._inventories.pop(context, None)
+        if inventory is not None:
+            self._cancel(inventory)
+        return inventory is not None
+
+    async def close(self):
+        """Stop every inventory"""
+        while self._inventories:
+            _, inventory = self._inventories.popitem()
+            await inventory.stop()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "refresh_interval_s": self.refresh_interval,
+            "idle_ttl_s": self.idle_ttl,
+            "inventories": [inventory.stats() for inventory in self._inventories.values()],
+        }
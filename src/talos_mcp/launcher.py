@@ -0,0 +1,191 @@
+"""
+Fast-starting stdio entry point: python -m talos_mcp
+
+Answers the MCP handshake from the precomputed manifest (see manifest.py)
+while talos_mcp.server and the mcp SDK are imported on a background thread,
+so a client gets its initialize response and tool list before the imports are
+done. The first message the manifest cannot answer, typically the first tool
+call, waits for the import and hands the session over to the real server: the
+recorded initialize request and initialized notification are replayed to it,
+its response to the replayed initialize is dropped, and it serves stdin and
+stdout from then on.
+
+With arguments (such as --http), or without a current manifest, the server is
+started directly.
+"""
+
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+from io import TextIOWrapper
+from types import ModuleType
+from typing import Any, AsyncIterator, BinaryIO, Optional
+
+from talos_mcp import manifest as tool_manifest
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Request id of the replayed initialize, whose response the client never asked for
+HANDOVER_ID = "talos-mcp-handover"
+
+
+class Handshake:
+    """Answers initialize, tools/list and ping from the manifest until the server is needed"""
+
+    def __init__(self, manifest: dict[str, Any]):
+        self.manifest = manifest
+        # Messages that bring the server to the state the client believes it is in
+        self.replay: list[str] = []
+        self.initialized = False
+
+    def respond(self, message: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """
+        Result of a request the manifest can answer
+
+        Args:
+            message: A JSON-RPC request
+
+        Returns:
+            The result, or None if the server has to answer it
+        """
+        method = message.get("method")
+        if method == "ping":
+            return {}
+        if method == "initialize" and not self.initialized:
+            protocol = self.manifest["protocol"]
+            requested = (message.get("params") or {}).get("protocolVersion")
+            result = {
+                "protocolVersion": (
+                    requested if requested in protocol["supported"] else protocol["latest"]
+                ),
+                "capabilities": self.manifest["capabilities"],
+                "serverInfo": self.manifest["serverInfo"],
+            }
+            if "instructions" in self.manifest:
+                result["instructions"] = self.manifest["instructions"]
+            self.initialized = True
+            self.replay.append(json.dumps({**message, "id": HANDOVER_ID}) + "\n")
+            return result
+        if method == "tools/list" and self.initialized:
+            return {"tools": self.manifest["tools"]}
+        return None
+
+    def serve(self, stdin: BinaryIO, stdout: BinaryIO) -> Optional[list[str]]:
+        """
+        Answer messages until one needs the server
+
+        Args:
+            stdin: Binary stream of newline-delimited JSON-RPC messages
+            stdout: Binary stream the responses are written to
+
+        Returns:
+            The messages to replay to the server, ending with the first one it
+            has to answer, or None if the input ended first
+        """
+        for raw in iter(stdin.readline, b""):
+            line = raw.decode("utf-8", errors="replace")
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                return self.replay + [line]
+            if message.get("method") == "notifications/initialized":
+                self.replay.append(line)
+                continue
+            result = self.respond(message) if "id" in message else None
+            if result is None:
+                return self.replay + [line]
+            response = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+            stdout.write(json.dumps(response, separators=(",", ":")).encode("utf-8") + b"\n")
+            stdout.flush()
+        return None
+
+    def check(self, server: ModuleType):
+        """Warn if the server describes itself differently than the manifest did"""
+        live = tool_manifest.build(server)
+        differs = [
+            key
+            for key in ("protocol", "serverInfo", "capabilities", "instructions", "tools")
+            if live.get(key) != self.manifest.get(key)
+        ]
+        if differs:
+            logger.warning(
+                f"Tool manifest differs from the server in {', '.join(differs)}; "
+                "regenerate it with python -m talos_mcp.manifest"
+            )
+
+
+class _ReplayedStdin:
+    """stdin of the server: the replayed messages, then the rest of the real stdin"""
+
+    def __init__(self, lines: list[str]):
+        self.lines = lines
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._lines()
+
+    async def _lines(self) -> AsyncIterator[str]:
+        import anyio
+
+        for line in self.lines:
+            yield line
+        async for line in anyio.wrap_file(
+            TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace")
+        ):
+            yield line
+
+
+class _HandoverStdout:
+    """stdout of the server, without its response to the replayed initialize"""
+
+    def __init__(self):
+        import anyio
+
+        self.stdout = anyio.wrap_file(TextIOWrapper(sys.stdout.buffer, encoding="utf-8"))
+        self.dropped = False
+
+    async def write(self, text: str):
+        if not self.dropped and json.loads(text).get("id") == HANDOVER_ID:
+            self.dropped = True
+            return
+        await self.stdout.write(text)
+
+    async def flush(self):
+        await self.stdout.flush()
+
+
+def main(argv: Optional[list[str]] = None):
+    """Run the server over stdio, answering the handshake before it is imported"""
+    logging.basicConfig(level=logging.INFO)
+    argv = sys.argv[1:] if argv is None else argv
+    manifest = None
+    if not argv and os.environ.get("TALOS_MCP_SERVE", "stdio") != "http":
+        manifest = tool_manifest.load()
+    if manifest is None:
+        import asyncio
+
+        from talos_mcp import server
+
+        asyncio.run(server.main(argv))
+        return
+
+    importer = threading.Thread(
+        target=importlib.import_module, args=("talos_mcp.server",), daemon=True
+    )
+    importer.start()
+    handshake = Handshake(manifest)
+    pending = handshake.serve(sys.stdin.buffer, sys.stdout.buffer)
+    if pending is None:
+        # The client went away without calling a tool
+        return
+    importer.join()
+    import asyncio
+
+    from talos_mcp import server
+
+    handshake.check(server)
+    asyncio.run(server.main(argv, stdio=(_ReplayedStdin(pending), _HandoverStdout())))
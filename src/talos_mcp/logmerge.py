@@ -0,0 +1,161 @@
+"""
+Time-ordered merge of one service's logs across nodes
+
+Each node's log is read as a stream and parsed lazily, one line at a time,
+into a small per-node queue. A heap holding the next line of every node
+yields the lines in timestamp order (a k-way merge), and only the newest
+lines within the caller's budget are kept. A node whose queue is full stops
+being read until the merge catches up, so memory is bounded by the line
+budget rather than by the number of nodes times the tail size.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+from talos_mcp.logtail import LogFilter, line_time
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Lines a merge keeps by default, and at most
+DEFAULT_LINE_BUDGET = 500
+MAX_LINE_BUDGET = 5000
+
+# Lines read ahead per node before its stream is paused
+NODE_READ_AHEAD = 64
+
+_END = object()
+
+
+async def timed_lines(
+    lines: AsyncIterator[str], log_filter: LogFilter
+) -> AsyncIterator[tuple[float, str]]:
+    """
+    Attach a timestamp to each line and drop those the filter rejects
+
+    Lines without a timestamp (stack traces, wrapped messages) take the time
+    of the line before them. Logs are written in time order, so the stream
+    ends at the first line past the filter's until.
+
+    Yields:
+        (unix time, line) pairs; lines before any timestamp get time 0
+    """
+    last_ts = 0.0
+    async with contextlib.aclosing(lines):
+        async for line in lines:
+            ts = line_time(line)
+            if ts is None:
+                ts = last_ts
+            last_ts = ts
+            if log_filter.until is not None and ts > log_filter.until:
+                return
+            if log_filter.matches(line, ts):
+                yield ts, line
+
+
+class LogMerge:
+    """k-way merge of per-node log streams into the newest lines within a budget"""
+
+    def __init__(
+        self,
+        sources: dict[str, AsyncIterator[str]],
+        limit: int = DEFAULT_LINE_BUDGET,
+        log_filter: Optional[LogFilter] = None,
+        read_ahead: int = NODE_READ_AHEAD,
+    ):
+        """
+        Initialize the merge
+
+        Args:
+            sources: Async line iterator per node, each in time order
+            limit: Lines to keep; older lines are dropped once it is reached
+            log_filter: Filter applied to each line before it is merged
+            read_ahead: Lines buffered per node, further capped so all nodes
+                together buffer no more than limit
+        """
+        self.sources = sources
+        self.limit = max(1, limit)
+        self.log_filter = log_filter or LogFilter()
+        self.read_ahead = max(1, min(read_ahead, self.limit // max(1, len(sources))))
+
+        self.lines: deque[tuple[str, str]] = deque(maxlen=self.limit)
+        self.merged = 0
+        self.per_node = {node: 0 for node in sources}
+        self.errors: dict[str, str] = {}
+
+    @property
+    def dropped(self) -> int:
+        """Matching lines merged but dropped to stay within the budget"""
+        return self.merged - len(self.lines)
+
+    async def _pump(self, node: str, queue: asyncio.Queue):
+        try:
+            async with contextlib.aclosing(timed_lines(self.sources[node], self.log_filter)) as it:
+                async for entry in it:
+                    # Blocks while the queue is full, which pauses reading this node
+                    await queue.put(entry)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.errors[node] = str(e) or type(e).__name__
+            logger.warning(f"Log stream from {node} failed: {self.errors[node]}")
+        await queue.put(_END)
+
+    async def run(self):
+        """
+        Merge every node's stream to the end
+
+        Lines are available in self.lines as they are merged, so a merge that is
+        cancelled (for example on timeout) leaves the lines merged so far.
+        """
+        nodes = list(self.sources)
+        queues = [asyncio.Queue(maxsize=self.read_ahead) for _ in nodes]
+        pumps = [asyncio.create_task(self._pump(node, queue)) for node, queue in zip(nodes, queues)]
+        try:
+            heap: list[tuple[float, int, str]] = []
+            for index, queue in enumerate(queues):
+                entry = await queue.get()
+                if entry is not _END:
+                    heap.append((entry[0], index, entry[1]))
+            heapq.heapify(heap)
+
+            while heap:
+                _, index, line = heap[0]
+                node = nodes[index]
+                self.lines.append((node, line))
+                self.merged += 1
+                self.per_node[node] += 1
+
+                entry = await queues[index].get()
+                if entry is _END:
+                    heapq.heappop(heap)
+                else:
+                    heapq.heapreplace(heap, (entry[0], index, entry[1]))
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+
+    def render(self) -> str:
+        """Merged lines prefixed with their node, like talosctl output for several nodes"""
+        parts = []
+        if self.dropped:
+            parts.append(
+                f"... [dropped {self.dropped} older lines to stay within {self.limit}] ...\n"
+            )
+        parts.extend(f"{node}: {line}\n" for node, line in self.lines)
+        return "".join(parts)
+
+    def summary(self) -> dict[str, Any]:
+        """Line counts per node, lines dropped and per-node errors"""
+        summary: dict[str, Any] = {
+            "lines": len(self.lines),
+            "dropped": self.dropped,
+            "nodes": self.per_node,
+        }
+        if self.errors:
+            summary["errors"] = self.errors
+        return summary
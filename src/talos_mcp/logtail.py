@@ -0,0 +1,499 @@
+"""
+Incremental log following and server-side log filtering
+
+A LogFollower keeps one background stream per (context, node, service) open
+and appends each line to a bounded ring buffer under an increasing sequence
+number. Callers poll with the cursor from their previous response and only
+get the lines written since, filtered here by regex, minimum level and time
+range, so watching a busy log costs time and tokens in proportion to what is
+new rather than to the tail size.
+"""
+
+import asyncio
+import calendar
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from talos_mcp.metrics import detach_trace
+from talos_mcp.scheduler import current_client
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Lines kept per followed log; older lines are dropped first
+LOG_BUFFER_LINES = int(os.environ.get("TALOS_MCP_LOG_BUFFER_LINES", "10000"))
+# Background streams open at once; the least recently polled is stopped first
+MAX_FOLLOWERS = int(os.environ.get("TALOS_MCP_MAX_FOLLOWERS", "16"))
+# Seconds without a poll after which a stream is stopped
+FOLLOWER_IDLE_TTL = float(os.environ.get("TALOS_MCP_FOLLOWER_IDLE_TTL", "300"))
+# Seconds between checks for idle streams
+FOLLOWER_REAP_INTERVAL = 30.0
+# Lines returned by one poll unless the caller asks for fewer
+MAX_POLL_LINES = 1000
+# Pause after new lines arrive during a long poll, so a burst is returned as one batch
+POLL_LINGER = 0.05
+
+LEVELS = {
+    "trace": 0,
+    "debug": 10,
+    "info": 20,
+    "notice": 20,
+    "warn": 30,
+    "warning": 30,
+    "error": 40,
+    "err": 40,
+    "fatal": 50,
+    "panic": 50,
+    "dpanic": 50,
+    "critical": 50,
+}
+LEVEL_NAMES = ("debug", "info", "warn", "error", "fatal")
+DEFAULT_LEVEL = LEVELS["info"]
+
+_KLOG_LEVELS = {"I": "info", "W": "warn", "E": "error", "F": "fatal"}
+
+# "level":"info" (zap/JSON), level=info (logfmt/logrus), "severity":"ERROR"
+_LEVEL_FIELD = re.compile(r"""\b(?:level|lvl|severity)"?\s*[:=]\s*"?([A-Za-z]+)""", re.I)
+# I0501 10:00:00.123456    1234 file.go:12] (klog), optionally after a "node: " prefix
+_KLOG = re.compile(r"^(?:\S+: )?([IWEF])(\d{2})(\d{2}) (\d{2}):(\d{2}):(\d{2})(\.\d+)? ")
+# 2024-05-01T10:00:00.123Z, 2024-05-01 10:00:00+02:00, 2024/05/01 10:00:00
+_TIMESTAMP = re.compile(
+    r"(\d{4})[-/](\d{2})[-/](\d{2})[T ](\d{2}):(\d{2}):(\d{2})(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"
+)
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)(s|m|h|d)$")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def line_level(line: str) -> Optional[int]:
+    """
+    Severity of a log line, from a level field or a klog prefix
+
+    Returns:
+        Numeric level from LEVELS, or None if the line does not carry one
+    """
+    klog = _KLOG.match(line)
+    if klog:
+        return LEVELS[_KLOG_LEVELS[klog.group(1)]]
+    match = _LEVEL_FIELD.search(line)
+    if match:
+        return LEVELS.get(match.group(1).lower())
+    return None
+
+
+def _epoch(groups: tuple, year: Optional[int] = None) -> float:
+    if year is None:
+        year, groups = int(groups[0]), groups[1:]
+    month, day, hour, minute, second = (int(g) for g in groups[:5])
+    fraction = float(groups[5]) if groups[5] else 0.0
+    return calendar.timegm((year, month, day, hour, minute, second)) + fraction
+
+
+def line_time(line: str) -> Optional[float]:
+    """
+    Timestamp of a log line as a Unix time
+
+    Understands RFC 3339 and similar timestamps anywhere in the line (plain
+    text, JSON "ts" fields, logfmt time=) and klog prefixes, which carry no
+    year and are taken to be from the current one. Timestamps without a zone
+    are taken to be UTC.
+
+    Returns:
+        Seconds since the epoch, or None if the line carries no timestamp
+    """
+    klog = _KLOG.match(line)
+    try:
+        if klog:
+            return _epoch(klog.groups()[1:], year=time.gmtime().tm_year)
+        match = _TIMESTAMP.search(line)
+        if not match:
+            return None
+        ts = _epoch(match.groups()[:7])
+    except (ValueError, OverflowError):
+        return None
+
+    zone = match.group(8)
+    if zone and zone != "Z":
+        sign = -1 if zone[0] == "-" else 1
+        digits = zone[1:].replace(":", "")
+        ts -= sign * (int(digits[:2]) * 3600 + int(digits[2:]) * 60)
+    return ts
+
+
+def parse_time(value: str, now: Optional[float] = None) -> float:
+    """
+    Parse a since/until argument
+
+    Args:
+        value: Duration before now ("30s", "5m", "2h", "1d") or an RFC 3339 timestamp
+        now: Reference time for durations; the current time by default
+
+    Returns:
+        Unix time
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    value = value.strip()
+    duration = _DURATION.match(value)
+    if duration:
+        now = time.time() if now is None else now
+        return now - float(duration.group(1)) * _DURATION_UNITS[duration.group(2)]
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid time {value!r}: use a duration like 5m or an RFC 3339 time")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@dataclass(frozen=True)
+class LogFilter:
+    """Line filter applied before log output leaves the server"""
+
+    pattern: Optional[re.Pattern] = None
+    min_level: Optional[int] = None
+    since: Optional[float] = None
+    until: Optional[float] = None
+
+    @classmethod
+    def from_arguments(cls, arguments: dict[str, Any]) -> "LogFilter":
+        """
+        Build a filter from the pattern, level, since and until tool arguments
+
+        Raises:
+            ValueError: If an argument is invalid
+        """
+        pattern = arguments.get("pattern")
+        try:
+            compiled = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f"Invalid pattern {pattern!r}: {e}")
+
+        level = arguments.get("level")
+        if level and str(level).lower() not in LEVELS:
+            raise ValueError(f"Invalid level {level!r}: use one of {', '.join(LEVEL_NAMES)}")
+
+        now = time.time()
+        return cls(
+            pattern=compiled,
+            min_level=LEVELS[str(level).lower()] if level else None,
+            since=parse_time(arguments["since"], now) if arguments.get("since") else None,
+            until=parse_time(arguments["until"], now) if arguments.get("until") else None,
+        )
+
+    @property
+    def active(self) -> bool:
+        return any(v is not None for v in (self.pattern, self.min_level, self.since, self.until))
+
+    def matches(self, line: str, ts: Optional[float]) -> bool:
+        """
+        Whether a line passes the filter
+
+        Args:
+            line: Log line
+            ts: Time of the line; lines of unknown time pass the time range
+        """
+        if ts is not None:
+            if self.since is not None and ts < self.since:
+                return False
+            if self.until is not None and ts > self.until:
+                return False
+        if self.min_level is not None:
+            level = line_level(line)
+            if (DEFAULT_LEVEL if level is None else level) < self.min_level:
+                return False
+        if self.pattern is not None and not self.pattern.search(line):
+            return False
+        return True
+
+    def apply(self, lines: Iterable[str]) -> list[str]:
+        """
+        Filter a one-shot batch of lines
+
+        Lines without a timestamp (stack traces, wrapped messages) take the
+        time of the line before them.
+        """
+        kept = []
+        last_ts = None
+        for line in lines:
+            ts = line_time(line)
+            if ts is None:
+                ts = last_ts
+            last_ts = ts
+            if self.matches(line, ts):
+                kept.append(line)
+        return kept
+
+
+@dataclass
+class _Line:
+    seq: int
+    ts: float
+    text: str
+
+
+LineSource = Callable[[int], AsyncIterator[str]]
+
+
+class LogFollower:
+    """A background log stream with a bounded, cursor-addressable line buffer"""
+
+    def __init__(
+        self, key: tuple, source: LineSource, tail: int, max_lines: int = LOG_BUFFER_LINES
+    ):
+        """
+        Initialize the follower; the stream starts on the first poll
+
+        Args:
+            key: Identity of the followed log, for logging and stats
+            source: Function taking a number of history lines and returning an
+                async iterator over the log's lines, following it until cancelled
+            tail: Lines of history to load when the stream first starts
+            max_lines: Lines to keep in the ring buffer
+        """
+        self.key = key
+        self.id = uuid.uuid4().hex[:8]
+        self._source = source
+        self._tail = tail
+        self._lines: deque[_Line] = deque(maxlen=max_lines)
+        self._next_seq = 0
+        self._last_ts: Optional[float] = None
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.started_at = time.monotonic()
+        self.last_poll = time.monotonic()
+        self.restarts = 0
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start the stream, or restart it without history if it ended"""
+        if self.running:
+            return
+        if self._task is not None:
+            self.restarts += 1
+            logger.info(f"Restarting log stream {self.key} after it ended")
+        tail = self._tail if self._task is None else 0
+        self._task = asyncio.create_task(self._pump(tail))
+
+    async def _pump(self, tail: int):
+        # Started from a tool call, but the stream outlives it and belongs to no client
+        detach_trace()
+        current_client.set("")
+        try:
+            async for text in self._source(tail):
+                self._append(text)
+            self.error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            logger.warning(f"Log stream {self.key} failed: {self.error}")
+        finally:
+            self._changed.set()
+
+    def _append(self, text: str):
+        ts = line_time(text)
+        if ts is None:
+            # Continuation lines belong with the line before them
+            ts = self._last_ts if self._last_ts is not None else time.time()
+        self._last_ts = ts
+        self._lines.append(_Line(self._next_seq, ts, text))
+        self._next_seq += 1
+        self._changed.set()
+
+    def _scan(self, start: int, limit: int, log_filter: LogFilter) -> tuple[list[str], int, int]:
+        """Matching lines from sequence number start, with the next cursor and lines scanned"""
+        first = self._lines[0].seq if self._lines else self._next_seq
+        index = max(0, start - first)
+        matched: list[str] = []
+        scanned = 0
+        cursor = max(start, first)
+        while index < len(self._lines) and len(matched) < limit:
+            line = self._lines[index]
+            scanned += 1
+            cursor = line.seq + 1
+            if log_filter.matches(line.text, line.ts):
+                matched.append(line.text)
+            index += 1
+        return matched, cursor, scanned
+
+    def parse_cursor(self, cursor: Optional[str]) -> Optional[int]:
+        """Sequence number in a cursor from this follower, or None if it is from another"""
+        if not cursor:
+            return None
+        follower_id, _, seq = str(cursor).partition(":")
+        if follower_id != self.id or not seq.isdigit():
+            return None
+        return int(seq)
+
+    async def read(
+        self,
+        cursor: Optional[str],
+        log_filter: LogFilter,
+        limit: int = MAX_POLL_LINES,
+        wait: float = 0.0,
+    ) -> dict[str, Any]:
+        """
+        Lines written after a cursor that pass a filter
+
+        Args:
+            cursor: Cursor from a previous read, or None to start at the oldest buffered line
+            log_filter: Filter applied to each line
+            limit: Maximum lines to return; the cursor stops after the last one returned
+            wait: Seconds to wait for a matching line if there is none yet
+
+        Returns:
+            Dictionary with the matching lines, the cursor to pass next time and
+            how many lines were scanned, dropped before they could be read or
+            left for the next call
+        """
+        self.last_poll = time.monotonic()
+        self.start()
+
+        start = self.parse_cursor(cursor)
+        reset = cursor is not None and start is None
+        if start is None:
+            start = self._lines[0].seq if self._lines else self._next_seq
+        first = self._lines[0].seq if self._lines else self._next_seq
+        dropped = max(0, first - start)
+
+        deadline = time.monotonic() + max(0.0, wait)
+        scanned = 0
+        while True:
+            self._changed.clear()
+            lines, start, count = self._scan(start, limit, log_filter)
+            scanned += count
+            remaining = deadline - time.monotonic()
+            if lines or remaining <= 0 or not self.running:
+                break
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            await asyncio.sleep(min(POLL_LINGER, max(0.0, deadline - time.monotonic())))
+        self.last_poll = time.monotonic()
+
+        response: dict[str, Any] = {
+            "cursor": f"{self.id}:{start}",
+            "lines": lines,
+            "scanned": scanned,
+            "dropped": dropped,
+            "more": start < self._next_seq,
+            "following": self.running,
+        }
+        if reset:
+            response["reset"] = True
+        if self.error:
+            response["error"] = self.error
+        return response
+
+    async def stop(self):
+        """Cancel the stream and wait for it to close"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "id": self.id,
+            "following": self.running,
+            "buffered": len(self._lines),
+            "total_lines": self._next_seq,
+            "restarts": self.restarts,
+            "age_s": round(now - self.started_at, 1),
+            "idle_s": round(now - self.last_poll, 1),
+            "error": self.error,
+        }
+
+
+class LogFollowers:
+    """Open log followers by key, bounded in number and stopped when idle"""
+
+    def __init__(self, max_followers: int = MAX_FOLLOWERS, idle_ttl: float = FOLLOWER_IDLE_TTL):
+        self.max_followers = max(1, max_followers)
+        self.idle_ttl = idle_ttl
+        self._followers: OrderedDict[tuple, LogFollower] = OrderedDict()
+        self.evicted = 0
+
+    async def get(self, key: tuple, source: LineSource, tail: int) -> LogFollower:
+        """
+        The follower for a key, creating it if needed
+
+        Followers idle longer than the TTL are stopped first; if the cap is
+        still reached, the least recently polled one makes room.
+        """
+        await self.reap()
+        follower = self._followers.get(key)
+        if follower is not None:
+            self._followers.move_to_end(key)
+            return follower
+
+        while len(self._followers) >= self.max_followers:
+            old_key, old = self._followers.popitem(last=False)
+            logger.info(f"Stopping log stream {old_key} to make room for {key}")
+            self.evicted += 1
+            await old.stop()
+
+        follower = LogFollower(key, source, tail)
+        self._followers[key] = follower
+        return follower
+
+    async def reap(self) -> int:
+        """Stop followers nobody has polled within the idle TTL"""
+        now = time.monotonic()
+        idle = [k for k, f in self._followers.items() if now - f.last_poll > self.idle_ttl]
+        for key in idle:
+            follower = self._followers.pop(key)
+            self.evicted += 1
+            await follower.stop()
+        return len(idle)
+
+    async def reap_periodically(self, interval: float = FOLLOWER_REAP_INTERVAL):
+        """Stop idle followers every interval seconds, until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reap()
+            except Exception as e:
+                logger.warning(f"Stopping idle log streams failed: {e}")
+
+    async def stop(self, key: tuple) -> bool:
+        """Stop and forget a follower; returns whether one was open"""
+        follower = self._followers.pop(key, None)
+        if follower is None:
+            return False
+        await follower.stop()
+        return True
+
+    async def close(self):
+        """Stop every follower"""
+        while self._followers:
+            _, follower = self._followers.popitem()
+            await follower.stop()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_followers": self.max_followers,
+            "idle_ttl_s": self.idle_ttl,
+            "evicted": self.evicted,
+            "followers": [
+                {"key": "/".join(str(part) for part in key), **follower.stats()}
+                for key, follower in self._followers.items()
+            ],
+        }
@@ -0,0 +1,141 @@
+"""
+Precomputed answers to the MCP start-up handshake
+
+An MCP client that launches the server over stdio waits for the initialize
+response and the tool list before anything else can happen, and importing the
+server means importing the mcp SDK, which alone takes most of a second. The
+launcher (`python -m talos_mcp`) answers initialize, tools/list and ping from
+manifest.json instead, while the server is imported in the background.
+
+The manifest records a digest of the package's modules and of the installed
+mcp version, whose protocol versions it repeats, and is only used when both
+match. Only the launcher takes this path: talos_mcp.server imports the mcp SDK
+at module level, so running or importing it directly pays for the SDK import.
+Regenerate the manifest after changing a tool definition or upgrading mcp:
+
+    python -m talos_mcp.manifest            # write manifest.json
+    python -m talos_mcp.manifest --check    # exit 1 if it is out of date
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import logging
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Optional
+
+logger = logging.getLogger("talos-mcp-server")
+
+PACKAGE_DIR = Path(__file__).parent
+MANIFEST_PATH = PACKAGE_DIR / "manifest.json"
+
+
+def sdk_version() -> str:
+    """Version of the installed mcp SDK, read without importing it"""
+    spec = importlib.util.find_spec("mcp")
+    if spec is not None and spec.origin:
+        # Much cheaper than importlib.metadata, which costs more than the handshake
+        for info in sorted(Path(spec.origin).parent.parent.glob("mcp-*.dist-info")):
+            return info.name[len("mcp-") : -len(".dist-info")]
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("mcp")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def source_digest(package_dir: Path = PACKAGE_DIR) -> str:
+    """Digest of the package's top-level modules, which define the tools, and the mcp version"""
+    digest = hashlib.sha256()
+    for path in sorted(package_dir.glob("*.py")):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes())
+    # The protocol versions and capabilities in the manifest come from the SDK
+    digest.update(b"mcp\0" + sdk_version().encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def build(server: ModuleType) -> dict[str, Any]:
+    """
+    Describe a server the way it answers initialize and tools/list
+
+    Args:
+        server: The imported talos_mcp.server module
+
+    Returns:
+        The manifest: protocol versions, initialize result fields and tools
+    """
+    from mcp.shared.version import SUPPORTED_PROTOCOL_VERSIONS
+    from mcp.types import LATEST_PROTOCOL_VERSION
+
+    options = server.app.create_initialization_options()
+    manifest = {
+        "source": source_digest(),
+        "protocol": {"latest": LATEST_PROTOCOL_VERSION, "supported": SUPPORTED_PROTOCOL_VERSIONS},
+        "serverInfo": {"name": options.server_name, "version": options.server_version},
+        "capabilities": options.capabilities.model_dump(
+            by_alias=True, mode="json", exclude_none=True
+        ),
+        "tools": [
+            tool.model_dump(by_alias=True, mode="json", exclude_none=True)
+            for tool in server.registry.tools
+        ],
+    }
+    if options.instructions:
+        manifest["instructions"] = options.instructions
+    return manifest
+
+
+def load(path: Path = MANIFEST_PATH) -> Optional[dict[str, Any]]:
+    """
+    Read the manifest, if it describes the modules on disk
+
+    Returns:
+        The manifest, or None when it is missing, unreadable or out of date
+    """
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        logger.info(f"No usable tool manifest at {path}: {e}")
+        return None
+    if manifest.get("source") != source_digest(path.parent):
+        logger.info(f"Tool manifest {path} is out of date; run python -m talos_mcp.manifest")
+        return None
+    return manifest
+
+
+def dumps(manifest: dict[str, Any]) -> str:
+    return json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate the MCP start-up manifest")
+    parser.add_argument(
+        "--check", action="store_true", help="Exit 1 if manifest.json is out of date"
+    )
+    args = parser.parse_args(argv)
+
+    from talos_mcp import server
+
+    manifest = build(server)
+    text = dumps(manifest)
+    if args.check:
+        try:
+            current = MANIFEST_PATH.read_text(encoding="utf-8")
+        except OSError:
+            current = ""
+        if current != text:
+            print(f"{MANIFEST_PATH} is out of date; run python -m talos_mcp.manifest")
+            return 1
+        return 0
+    MANIFEST_PATH.write_text(text, encoding="utf-8")
+    print(f"Wrote {MANIFEST_PATH} ({len(manifest['tools'])} tools)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
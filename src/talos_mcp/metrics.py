@@ -0,0 +1,451 @@
+"""
+Per-call metrics and tracing
+
+Every tool call is traced as a tree of timed stages: time queued for a
+scheduler slot, spawning talosctl, the gRPC connect/TLS handshake, remote
+execution, parsing and serialization. Each stage also feeds a latency
+histogram per (stage, tool, node), and counters track calls, errors,
+timeouts and cache hits per tool. The figures are served by the
+talos_server_stats tool and, optionally, in Prometheus text format through a
+file (TALOS_MCP_METRICS_FILE) or a local HTTP endpoint
+(TALOS_MCP_METRICS_PORT). When TALOS_MCP_OTEL is set and opentelemetry-api is
+installed, stages are also emitted as OpenTelemetry spans.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Only imported when asked for: loading it costs every server start
+otel_trace = None
+if os.environ.get("TALOS_MCP_OTEL"):
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:
+        pass
+
+STAGES = (
+    "total",
+    "queue",
+    "spawn",
+    "connect",
+    "execute",
+    "parse",
+    "serialize",
+    "snapshot",
+    "postprocess",
+)
+
+# Upper bounds in seconds, Prometheus style
+BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    float("inf"),
+)
+
+# Finished call traces kept for talos_server_stats
+TRACE_HISTORY = int(os.environ.get("TALOS_MCP_TRACE_HISTORY", "100"))
+
+METRICS_FILE = os.environ.get("TALOS_MCP_METRICS_FILE")
+METRICS_PORT = int(os.environ.get("TALOS_MCP_METRICS_PORT", "0"))
+METRICS_FILE_INTERVAL = 15.0
+
+OTEL_ENABLED = otel_trace is not None
+
+# Label for calls that target the context's default nodes, or no node at all
+DEFAULT_NODE = "(default)"
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram"):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets, self.counts):
+            if n and seen + n >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * max(0.0, rank - seen) / n
+            seen += n
+            lower = bound
+        return self.max
+
+    def summary(self) -> dict[str, Any]:
+        def ms(seconds: float) -> float:
+            return round(seconds * 1000, 2)
+
+        return {
+            "count": self.count,
+            "avg_ms": ms(self.sum / self.count) if self.count else 0.0,
+            "p50_ms": ms(self.quantile(0.50)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "max_ms": ms(self.max),
+        }
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float = 0.0
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self, origin: float) -> dict[str, Any]:
+        span = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+        }
+        if self.attributes:
+            span["attributes"] = self.attributes
+        return span
+
+
+@dataclass
+class Trace:
+    """Stages of one tool call"""
+
+    tool: str
+    start: float
+    duration: float = 0.0
+    status: str = "ok"
+    spans: list[Span] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "tool": self.tool,
+            "status": self.status,
+            "started": round(time.time() - (time.perf_counter() - self.start), 3),
+            "duration_ms": round(self.duration * 1000, 2),
+            "spans": [span.as_dict(self.start) for span in self.spans],
+        }
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "talos_mcp_trace", default=None
+)
+
+
+class Metrics:
+    """Histograms and counters for every tool, stage and node"""
+
+    def __init__(self, trace_history: int = TRACE_HISTORY):
+        # Stages may be recorded from worker threads (parsing large output)
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._counters: dict[tuple[str, str], int] = {}
+        self.traces: deque[Trace] = deque(maxlen=trace_history)
+        self.started = time.time()
+        self._tracer = otel_trace.get_tracer("talos-mcp-server") if OTEL_ENABLED else None
+
+    def observe(self, stage: str, seconds: float, node: Optional[str] = None):
+        """Record a stage duration for the current call's tool"""
+        trace = _current.get()
+        tool = trace.tool if trace is not None else "-"
+        key = (stage, tool, node or DEFAULT_NODE)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def count(self, name: str, tool: Optional[str] = None, value: int = 1):
+        """Increment a counter for a tool, by default the current call's"""
+        if tool is None:
+            trace = _current.get()
+            tool = trace.tool if trace is not None else "-"
+        with self._lock:
+            self._counters[(name, tool)] = self._counters.get((name, tool), 0) + value
+
+    @contextlib.contextmanager
+    def stage(self, name: str, node: Optional[str] = None, **attributes) -> Iterator[None]:
+        """
+        Time a stage of the current call
+
+        The duration goes into the (stage, tool, node) histogram and, inside a
+        traced call, into the call's trace as a span.
+        """
+        start = time.perf_counter()
+        otel_span = (
+            self._tracer.start_as_current_span(
+                name, attributes={"node": node or DEFAULT_NODE, **attributes}
+            )
+            if self._tracer is not None
+            else contextlib.nullcontext()
+        )
+        try:
+            with otel_span:
+                yield
+        finally:
+            duration = time.perf_counter() - start
+            self.observe(name, duration, node)
+            trace = _current.get()
+            if trace is not None:
+                if node:
+                    attributes["node"] = node
+                trace.spans.append(Span(name, start, duration, attributes))
+
+    def record(self, name: str, seconds: float, node: Optional[str] = None, **attributes):
+        """Record a stage that was timed elsewhere (e.g. scheduler queue wait)"""
+        self.observe(name, seconds, node)
+        trace = _current.get()
+        if trace is not None:
+            if node:
+                attributes["node"] = node
+            trace.spans.append(Span(name, time.perf_counter() - seconds, seconds, attributes))
+
+    @contextlib.contextmanager
+    def trace(self, tool: str) -> Iterator[Trace]:
+        """
+        Trace one tool call; stages recorded inside it are attributed to the tool
+
+        The caller sets the yielded trace's status to "error" or "timeout" for
+        calls that failed without raising.
+        """
+        trace = Trace(tool=tool, start=time.perf_counter())
+        token = _current.set(trace)
+        otel_span = (
+            self._tracer.start_as_current_span(tool)
+            if self._tracer is not None
+            else contextlib.nullcontext()
+        )
+        try:
+            with otel_span:
+                yield trace
+        except BaseException:
+            if trace.status == "ok":
+                trace.status = "error"
+            raise
+        finally:
+            _current.reset(token)
+            trace.duration = time.perf_counter() - trace.start
+            trace.spans.sort(key=lambda span: span.start)
+            with self._lock:
+                key = ("total", tool, DEFAULT_NODE)
+                self._histograms.setdefault(key, Histogram()).observe(trace.duration)
+                self._counters[("calls", tool)] = self._counters.get(("calls", tool), 0) + 1
+                if trace.status != "ok":
+                    # "errors" or "timeouts"
+                    key = (trace.status + "s", tool)
+                    self._counters[key] = self._counters.get(key, 0) + 1
+                self.traces.append(trace)
+
+    def snapshot(
+        self, tool: Optional[str] = None, by_node: bool = False, traces: int = 0
+    ) -> dict[str, Any]:
+        """
+        Metrics as nested dictionaries
+
+        Args:
+            tool: Only report this tool
+            by_node: Break each stage down per node as well
+            traces: Number of most recent call traces to include
+
+        Returns:
+            Dictionary with per-tool counters, per-tool stage latency
+            summaries and, if asked for, recent traces
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+            recent = list(self.traces)
+
+        tools: dict[str, Any] = {}
+        for (name, name_tool), value in counters.items():
+            if tool and name_tool != tool:
+                continue
+            tools.setdefault(name_tool, {"counters": {}, "stages": {}})["counters"][name] = value
+
+        merged: dict[tuple[str, str], Histogram] = {}
+        for (stage, name_tool, node), histogram in histograms.items():
+            if tool and name_tool != tool:
+                continue
+            combined = merged.setdefault((stage, name_tool), Histogram())
+            combined.merge(histogram)
+            entry = tools.setdefault(name_tool, {"counters": {}, "stages": {}})
+            if by_node:
+                stage_entry = entry["stages"].setdefault(stage, {})
+                stage_entry.setdefault("nodes", {})[node] = histogram.summary()
+        for (stage, name_tool), histogram in merged.items():
+            stage_entry = tools[name_tool]["stages"].setdefault(stage, {})
+            stage_entry.update(histogram.summary())
+
+        for entry in tools.values():
+            entry["stages"] = {
+                stage: entry["stages"][stage] for stage in STAGES if stage in entry["stages"]
+            }
+
+        snapshot: dict[str, Any] = {
+            "uptime_s": round(time.time() - self.started, 1),
+            "otel": OTEL_ENABLED,
+            "tools": tools,
+        }
+        if traces:
+            selected = [t for t in recent if not tool or t.tool == tool][-traces:]
+            snapshot["traces"] = [t.as_dict() for t in selected]
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = [
+            "# HELP talos_mcp_stage_seconds Duration of each stage of a tool call",
+            "# TYPE talos_mcp_stage_seconds histogram",
+        ]
+        for (stage, tool, node), histogram in histograms:
+            labels = f'stage="{_escape(stage)}",tool="{_escape(tool)}",node="{_escape(node)}"'
+            cumulative = 0
+            for bound, n in zip(histogram.buckets, histogram.counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'talos_mcp_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"talos_mcp_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"talos_mcp_stage_seconds_count{{{labels}}} {histogram.count}")
+
+        names = sorted({name for name, _ in counters})
+        for name in names:
+            metric = f"talos_mcp_{name}_total"
+            lines.append(f"# HELP {metric} Tool calls counted as {name}")
+            lines.append(f"# TYPE {metric} counter")
+            for (counter, tool), value in counters:
+                if counter == name:
+                    lines.append(f'{metric}{{tool="{_escape(tool)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str):
+        """Write the Prometheus text atomically, for a node_exporter textfile collector"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp, path)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the tool call running in this task, if any"""
+    return _current.get()
+
+
+def detach_trace():
+    """
+    Stop the running task from recording into an inherited trace
+
+    Tasks copy the context of the tool call that creates them; background
+    tasks that outlive the call call this first, so their stages are not
+    appended to a finished trace or counted under the call's tool.
+    """
+    _current.set(None)
+
+
+async def write_metrics_file(metrics: Metrics, path: str, interval: float = METRICS_FILE_INTERVAL):
+    """Rewrite the Prometheus file every interval seconds until cancelled"""
+    while True:
+        try:
+            metrics.write_prometheus_file(path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file {path}: {e}")
+        await asyncio.sleep(interval)
+
+
+async def serve_metrics(
+    metrics: Metrics, port: int, host: str = "127.0.0.1"
+) -> asyncio.AbstractServer:
+    """
+    Serve GET /metrics in Prometheus text format on a local port
+
+    Args:
+        metrics: Metrics to expose
+        port: TCP port to listen on
+        host: Address to bind; loopback only by default
+
+    Returns:
+        The listening server
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5.0)
+            while (await asyncio.wait_for(reader.readline(), 5.0)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                body = metrics.render_prometheus().encode("utf-8")
+                status = "200 OK"
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body = b"not found\n"
+                status = "404 Not Found"
+                content_type = "text/plain"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
+
+
+# Shared by every module that records stages
+call_metrics = Metrics()
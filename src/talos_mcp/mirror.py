@@ -0,0 +1,443 @@
+"""
+Watch-based in-memory mirrors of Talos resources
+
+A ResourceMirror keeps one node's resources of one type in memory: it lists
+them once, then applies the changes a Watch stream reports, indexed by
+namespace, type and id. Reads of a mirrored type are answered from memory in
+microseconds instead of a List RPC per call.
+
+The copy is only served while it is known to be current. When the watch
+stream is lost, the mirror reconnects with exponential backoff and lists
+again; until that succeeds, its last copy is served for at most
+MIRROR_MAX_STALENESS seconds and reads then go to the API as before. A full
+List every MIRROR_RESYNC_INTERVAL seconds repairs anything the stream could
+have missed, which bounds staleness even if a stream silently stalls.
+
+Mirrors are opt-in per resource type and started by the first read of that
+type on a node; mirrors nobody read within the idle TTL are stopped.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from talos_mcp.metrics import detach_trace
+from talos_mcp.normalize import render_resources
+from talos_mcp.scheduler import current_client
+from talos_mcp.selector import ResourceSelector
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Resource types to mirror, as named in talos_get_resources (comma-separated; empty: off)
+MIRROR_TYPES = frozenset(
+    name.strip().lower()
+    for name in os.environ.get("TALOS_MCP_MIRROR", "").split(",")
+    if name.strip()
+)
+# Seconds a mirror whose watch stream was lost keeps answering from its last copy
+MIRROR_MAX_STALENESS = float(os.environ.get("TALOS_MCP_MIRROR_MAX_STALENESS", "30"))
+# Seconds between full re-lists of a mirrored type
+MIRROR_RESYNC_INTERVAL = float(os.environ.get("TALOS_MCP_MIRROR_RESYNC_INTERVAL", "600"))
+# Seconds without a read after which a mirror's watch is stopped
+MIRROR_IDLE_TTL = float(os.environ.get("TALOS_MCP_MIRROR_IDLE_TTL", "1800"))
+# Mirrors (one per context, node and type) open at once
+MAX_MIRRORS = int(os.environ.get("TALOS_MCP_MAX_MIRRORS", "64"))
+# First and longest wait before reconnecting a lost watch stream
+RECONNECT_DELAY = 1.0
+MAX_RECONNECT_DELAY = 30.0
+# Rendered answers kept, keyed by the mirrors' generations
+RENDER_CACHE_SIZE = 128
+# resource.EventType.DESTROYED; the proto module pulls in the gRPC stack at start-up
+DESTROYED = 2
+
+WatchSource = Callable[[], AsyncIterator[tuple[int, dict[str, Any]]]]
+ListSource = Callable[[], Awaitable[list[dict[str, Any]]]]
+
+# namespace -> (type, id) -> document
+Index = dict[str, dict[tuple[str, str], dict[str, Any]]]
+
+
+def _index_key(doc: dict[str, Any]) -> tuple[str, str, str]:
+    md = doc["metadata"]
+    return md["namespace"], md["type"], md["id"]
+
+
+class ResourceMirror:
+    """One node's resources of one type, kept current by a watch stream"""
+
+    def __init__(
+        self,
+        key: tuple,
+        watch: WatchSource,
+        snapshot: ListSource,
+        max_staleness: float = MIRROR_MAX_STALENESS,
+        resync_interval: float = MIRROR_RESYNC_INTERVAL,
+    ):
+        """
+        Initialize the mirror; the watch starts with start()
+
+        Args:
+            key: (context, node, type), for logging and stats
+            watch: Function returning the stream of (event type, document) changes
+            snapshot: Coroutine function listing every current document
+            max_staleness: Seconds the last copy is served after the stream is lost
+            resync_interval: Seconds between full re-lists
+        """
+        self.key = key
+        self._watch = watch
+        self._snapshot = snapshot
+        self.max_staleness = max_staleness
+        self.resync_interval = resync_interval
+        self._items: Index = {}
+        self._task: Optional[asyncio.Task] = None
+        # Keys changed by the watch while a listing is in flight
+        self._touched: Optional[set[tuple[str, str, str]]] = None
+
+        # Bumped on every change, so rendered answers can be reused until then
+        self.generation = 0
+        self.synced = False
+        self.live = False
+        self.lost_at: Optional[float] = None
+        self.synced_at: Optional[float] = None
+        self.started_at = time.monotonic()
+        self.last_read = time.monotonic()
+        self.events = 0
+        self.resyncs = 0
+        self.reconnects = 0
+        self.hits = 0
+        self.error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the copy may be served: in sync, or lost for less than the staleness bound"""
+        if not self.synced:
+            return False
+        if self.live:
+            return True
+        return self.lost_at is not None and time.monotonic() - self.lost_at <= self.max_staleness
+
+    @property
+    def state(self) -> str:
+        if self.live:
+            return "live"
+        if not self.synced:
+            return "syncing"
+        return "stale" if self.fresh else "expired"
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # Started from a tool call, but the watch and resyncs belong to no call and no client
+        detach_trace()
+        current_client.set("")
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                await self._follow()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+                logger.warning(f"Resource mirror {self.key} lost its watch: {self.error}")
+            if self.live:
+                self.lost_at = time.monotonic()
+                self.live = False
+                delay = RECONNECT_DELAY
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _follow(self):
+        """Apply the watch stream while listing now and every resync interval"""
+        pump = asyncio.create_task(self._pump())
+        resync = asyncio.create_task(self._resync_loop())
+        try:
+            done, _ = await asyncio.wait({pump, resync}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+            raise RuntimeError("watch stream ended")
+        finally:
+            for task in (pump, resync):
+                task.cancel()
+            await asyncio.gather(pump, resync, return_exceptions=True)
+
+    async def _pump(self):
+        async with contextlib.aclosing(self._watch()) as stream:
+            async for event, doc in stream:
+                self.apply(event, doc)
+
+    async def _resync_loop(self):
+        while True:
+            await self.resync()
+            await asyncio.sleep(self.resync_interval)
+
+    def apply(self, event: int, doc: dict[str, Any]):
+        """Apply one watch event to the index"""
+        namespace, kind, name = key = _index_key(doc)
+        if self._touched is not None:
+            self._touched.add(key)
+        bucket = self._items.setdefault(namespace, {})
+        if event == DESTROYED:
+            bucket.pop((kind, name), None)
+        else:
+            bucket[(kind, name)] = doc
+        self.events += 1
+        self.generation += 1
+
+    async def resync(self):
+        """
+        Replace the index with a full listing
+
+        Changes the watch reported while the listing was in flight are newer
+        than the listing and are kept over it.
+        """
+        self._touched = set()
+        try:
+            docs = await self._snapshot()
+            touched = self._touched
+        finally:
+            self._touched = None
+
+        items: Index = {}
+        for doc in docs:
+            namespace, kind, name = _index_key(doc)
+            items.setdefault(namespace, {})[(kind, name)] = doc
+        for namespace, kind, name in touched:
+            current = self._items.get(namespace, {}).get((kind, name))
+            if current is None:
+                items.get(namespace, {}).pop((kind, name), None)
+            else:
+                items.setdefault(namespace, {})[(kind, name)] = current
+
+        self._items = items
+        self.generation += 1
+        self.resyncs += 1
+        self.synced = self.live = True
+        self.lost_at = None
+        self.synced_at = time.monotonic()
+        self.error = None
+
+    def documents(self, selector: Optional[ResourceSelector] = None) -> list[dict[str, Any]]:
+        """
+        Current documents in namespace, type and id order, filtered by a selector
+
+        Field selectors pinning metadata.namespace or metadata.id are looked
+        up in the index rather than scanned.
+        """
+        namespace = selector.equals("metadata.namespace") if selector else None
+        name = selector.equals("metadata.id") if selector else None
+        buckets = [namespace] if namespace is not None else sorted(self._items)
+        docs = []
+        for ns in buckets:
+            bucket = self._items.get(ns, {})
+            if name is not None:
+                candidates = [bucket[key] for key in sorted(bucket) if key[1] == name]
+            else:
+                candidates = [bucket[key] for key in sorted(bucket)]
+            docs.extend(doc for doc in candidates if selector is None or selector.matches(doc))
+        return docs
+
+    @property
+    def size(self) -> int:
+        return sum(len(bucket) for bucket in self._items.values())
+
+    async def stop(self):
+        """Cancel the watch and wait for it to close"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "state": self.state,
+            "items": self.size,
+            "generation": self.generation,
+            "events": self.events,
+            "resyncs": self.resyncs,
+            "reconnects": self.reconnects,
+            "hits": self.hits,
+            "synced_s_ago": round(now - self.synced_at, 1) if self.synced_at else None,
+            "age_s": round(now - self.started_at, 1),
+            "idle_s": round(now - self.last_read, 1),
+            "error": self.error,
+        }
+
+
+class ResourceMirrors:
+    """Mirrors by (context, node, type), bounded in number and stopped when idle"""
+
+    def __init__(
+        self,
+        types: frozenset[str] = MIRROR_TYPES,
+        max_mirrors: int = MAX_MIRRORS,
+        idle_ttl: float = MIRROR_IDLE_TTL,
+        max_staleness: float = MIRROR_MAX_STALENESS,
+        resync_interval: float = MIRROR_RESYNC_INTERVAL,
+    ):
+        self.types = frozenset(name.lower() for name in types)
+        self.max_mirrors = max(1, max_mirrors)
+        self.idle_ttl = idle_ttl
+        self.max_staleness = max_staleness
+        self.resync_interval = resync_interval
+        self._mirrors: OrderedDict[tuple, ResourceMirror] = OrderedDict()
+        self._rendered: OrderedDict[tuple, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def enabled(self, resource_type: str) -> bool:
+        """Whether reads of a resource type are mirrored"""
+        return resource_type.lower() in self.types
+
+    def answer(
+        self,
+        context: str,
+        nodes: list[str],
+        resource_type: str,
+        output: Optional[str],
+        selector: Optional[ResourceSelector] = None,
+    ) -> Optional[str]:
+        """
+        Rendered resources from memory, if every node's mirror may be served
+
+        Args:
+            context: Context the read targets
+            nodes: Nodes the read targets; an empty list cannot be answered
+            resource_type: Resource type as passed to talos_get_resources
+            output: talosctl output format (None for the table, json or yaml)
+            selector: Label and field requirements
+
+        Returns:
+            The output talosctl get would print, or None to read from the API
+        """
+        if not nodes or not self.enabled(resource_type):
+            return None
+        mirrors = [self._mirrors.get((context, node, resource_type.lower())) for node in nodes]
+        if not all(mirror is not None and mirror.fresh for mirror in mirrors):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        now = time.monotonic()
+        for mirror in mirrors:
+            mirror.last_read = now
+            mirror.hits += 1
+            self._mirrors.move_to_end(mirror.key)
+
+        version = tuple((mirror.key, mirror.generation) for mirror in mirrors)
+        cache_key = (version, output, selector.text if selector else "")
+        stdout = self._rendered.get(cache_key)
+        if stdout is None:
+            docs = [doc for mirror in mirrors for doc in mirror.documents(selector)]
+            stdout = render_resources(docs, output)
+            self._rendered[cache_key] = stdout
+            if len(self._rendered) > RENDER_CACHE_SIZE:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(cache_key)
+        return stdout
+
+    def ensure(
+        self,
+        context: str,
+        nodes: list[str],
+        resource_type: str,
+        watch: Callable[[str], AsyncIterator[tuple[int, dict[str, Any]]]],
+        snapshot: Callable[[str], Awaitable[list[dict[str, Any]]]],
+    ):
+        """
+        Start mirrors for a mirrored type on the nodes that have none
+
+        Mirrors idle longer than the TTL are stopped first; if the cap is
+        still reached, the least recently read one makes room.
+
+        Args:
+            context: Context the read targeted
+            nodes: Nodes the read targeted
+            resource_type: Resource type as passed to talos_get_resources
+            watch: Function taking a node and returning its stream of changes
+            snapshot: Coroutine function taking a node and listing its documents
+        """
+        if not self.enabled(resource_type):
+            return
+        self.reap()
+        for node in nodes:
+            key = (context, node, resource_type.lower())
+            mirror = self._mirrors.get(key)
+            if mirror is not None:
+                mirror.last_read = time.monotonic()
+                mirror.start()
+                continue
+            while len(self._mirrors) >= self.max_mirrors:
+                old_key, old = self._mirrors.popitem(last=False)
+                logger.info(f"Stopping resource mirror {old_key} to make room for {key}")
+                self.evicted += 1
+                self._cancel(old)
+            mirror = ResourceMirror(
+                key,
+                lambda node=node: watch(node),
+                lambda node=node: snapshot(node),
+                self.max_staleness,
+                self.resync_interval,
+            )
+            self._mirrors[key] = mirror
+            logger.info(f"Starting resource mirror {key}")
+            mirror.start()
+
+    @staticmethod
+    def _cancel(mirror: ResourceMirror):
+        # Called from synchronous code: the task finishes cancelling on its own
+        if mirror._task is not None:
+            mirror._task.cancel()
+
+    def reap(self) -> int:
+        """Stop mirrors nobody has read within the idle TTL"""
+        now = time.monotonic()
+        idle = [k for k, m in self._mirrors.items() if now - m.last_read > self.idle_ttl]
+        for key in idle:
+            self.evicted += 1
+            self._cancel(self._mirrors.pop(key))
+        return len(idle)
+
+    def discard(self, context: str) -> int:
+        """Stop a context's mirrors, when its endpoints or credentials change"""
+        keys = [key for key in self._mirrors if key[0] == context]
+        for key in keys:
+            self._cancel(self._mirrors.pop(key))
+        return len(keys)
+
+    async def close(self):
+        """Stop every mirror"""
+        while self._mirrors:
+            _, mirror = self._mirrors.popitem()
+            await mirror.stop()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "types": sorted(self.types),
+            "max_mirrors": self.max_mirrors,
+            "idle_ttl_s": self.idle_ttl,
+            "max_staleness_s": self.max_staleness,
+            "resync_interval_s": self.resync_interval,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+            "mirrors": [
+                {"key": "/".join(str(part) for part in key), **mirror.stats()}
+                for key, mirror in self._mirrors.items()
+            ],
+        }
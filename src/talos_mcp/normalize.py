@@ -0,0 +1,350 @@
+"""
+Normalization of talosctl output into typed records
+
+Table output is split at its column positions and `-o json` resource streams
+are decoded document by document, then rendered as indented JSON or as a
+compact column/row form that costs far fewer tokens than the indented JSON or
+a raw resource dump. Large inputs are parsed in a worker thread so the
+stdio event loop keeps serving other requests.
+"""
+
+import asyncio
+import json
+import re
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Callable, Optional
+
+from talos_mcp.metrics import call_metrics
+
+OUTPUT_MODES = ("table", "json", "compact")
+
+# Inputs larger than this are parsed off the event loop
+PARSE_IN_THREAD_BYTES = 64 * 1024
+
+_COLUMN = re.compile(r"\S+(?: \S+)*")
+_TRUNCATION_MARKER = "... [truncated"
+
+
+@dataclass
+class ServiceRecord:
+    """A service on a node (talosctl services)"""
+
+    node: str
+    id: str
+    state: str
+    healthy: Optional[bool]
+    last_event: str = ""
+
+
+@dataclass
+class MemberRecord:
+    """An etcd cluster member (talosctl etcd members)"""
+
+    node: str
+    id: str
+    hostname: str
+    peer_urls: list[str]
+    client_urls: list[str]
+    learner: bool
+
+
+@dataclass
+class DiskRecord:
+    """A block device (talosctl get disks)"""
+
+    node: str
+    id: str
+    dev_path: str
+    size: int
+    model: str
+    serial: str
+    transport: str
+    rotational: bool
+    readonly: bool
+
+
+@dataclass
+class ResourceRecord:
+    """Any Talos resource (talosctl get)"""
+
+    node: str
+    namespace: str
+    type: str
+    id: str
+    version: Any
+    phase: str
+    spec: Any
+
+
+def parse_table(text: str) -> list[dict[str, str]]:
+    """
+    Split column-aligned table output into rows
+
+    Columns are located from the header line, so cells containing single
+    spaces (e.g. "LAST EVENT" values) stay intact.
+
+    Args:
+        text: Table with a header line, as printed by talosctl or format_table
+
+    Returns:
+        One dict per row, keyed by lower_snake_case header names
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return []
+
+    columns = [
+        (m.start(), m.group().lower().replace(" ", "_").replace("-", "_"))
+        for m in _COLUMN.finditer(lines[0])
+    ]
+    rows = []
+    for line in lines[1:]:
+        if line.startswith(_TRUNCATION_MARKER):
+            continue
+        row = {}
+        for i, (start, name) in enumerate(columns):
+            end = columns[i + 1][0] if i + 1 < len(columns) else None
+            row[name] = line[start:end].strip()
+        rows.append(row)
+    return rows
+
+
+def parse_documents(text: str) -> list[dict[str, Any]]:
+    """
+    Decode a `talosctl get -o json` or `-o yaml` stream into documents
+
+    The JSON form is a sequence of concatenated objects rather than an array.
+    Anything that does not decode, such as a truncation marker, is skipped.
+    """
+    stripped = text.lstrip()
+    if not stripped:
+        return []
+    if not stripped.startswith("{"):
+        import yaml
+
+        return [doc for doc in yaml.safe_load_all(text) if isinstance(doc, dict)]
+
+    decoder = json.JSONDecoder()
+    docs = []
+    pos = 0
+    while True:
+        start = text.find("{", pos)
+        if start < 0:
+            break
+        try:
+            doc, pos = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            # Resynchronize at the next top-level object
+            pos = text.find("\n{", start + 1)
+            if pos < 0:
+                break
+            continue
+        if isinstance(doc, dict):
+            docs.append(doc)
+    return docs
+
+
+def format_table(headers: list[str], rows: list[list[Any]]) -> str:
+    """Render rows as a whitespace-aligned table, like talosctl's tabwriter output"""
+    cells = [headers] + [["" if c is None else str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    lines = []
+    for row in cells:
+        line = "   ".join(cell.ljust(widths[i]) for i, cell in enumerate(row))
+        lines.append(line.rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def render_resources(docs: list[dict[str, Any]], output: Optional[str]) -> str:
+    """Render resource documents the way `talosctl get -o json|yaml` or its table does"""
+    if output == "json":
+        return "".join(json.dumps(doc, indent=4, default=str) + "\n" for doc in docs)
+    if output == "yaml":
+        import yaml
+
+        return yaml.safe_dump_all(docs, sort_keys=False) if docs else ""
+    rows = [
+        [
+            doc["node"],
+            doc["metadata"]["namespace"],
+            doc["metadata"]["type"],
+            doc["metadata"]["id"],
+            doc["metadata"]["version"],
+        ]
+        for doc in docs
+    ]
+    return format_table(["NODE", "NAMESPACE", "TYPE", "ID", "VERSION"], rows)
+
+
+def _health(value: str) -> Optional[bool]:
+    if value.upper() == "OK":
+        return True
+    if value.lower() == "fail":
+        return False
+    return None
+
+
+def _urls(value: str) -> list[str]:
+    return [url for url in value.split(",") if url]
+
+
+def services_from_table(text: str) -> list[ServiceRecord]:
+    return [
+        ServiceRecord(
+            node=row.get("node", ""),
+            id=row.get("service", ""),
+            state=row.get("state", ""),
+            healthy=_health(row.get("health", "")),
+            last_event=row.get("last_event", ""),
+        )
+        for row in parse_table(text)
+    ]
+
+
+def members_from_table(text: str) -> list[MemberRecord]:
+    return [
+        MemberRecord(
+            node=row.get("node", ""),
+            id=row.get("id", ""),
+            hostname=row.get("hostname", ""),
+            peer_urls=_urls(row.get("peer_urls", "")),
+            client_urls=_urls(row.get("client_urls", "")),
+            learner=row.get("learner", "").lower() == "true",
+        )
+        for row in parse_table(text)
+    ]
+
+
+def resources_from_documents(text: str) -> list[ResourceRecord]:
+    records = []
+    for doc in parse_documents(text):
+        md = doc.get("metadata") or {}
+        records.append(
+            ResourceRecord(
+                node=doc.get("node", ""),
+                namespace=md.get("namespace", ""),
+                type=md.get("type", ""),
+                id=str(md.get("id", "")),
+                version=md.get("version"),
+                phase=md.get("phase", ""),
+                spec=doc.get("spec"),
+            )
+        )
+    return records
+
+
+def disks_from_documents(text: str) -> list[DiskRecord]:
+    records = []
+    for res in resources_from_documents(text):
+        spec = res.spec if isinstance(res.spec, dict) else {}
+        records.append(
+            DiskRecord(
+                node=res.node,
+                id=res.id,
+                dev_path=spec.get("dev_path", ""),
+                size=int(spec.get("size") or 0),
+                model=spec.get("model", ""),
+                serial=spec.get("serial", ""),
+                transport=spec.get("transport", ""),
+                rotational=bool(spec.get("rotational", False)),
+                readonly=bool(spec.get("readonly", False)),
+            )
+        )
+    return records
+
+
+def structure(records: list[Any], mode: str) -> Any:
+    """
+    Arrange records for a given output mode
+
+    Args:
+        records: Dataclass records from one of the parsers
+        mode: "json" for a list of objects, "compact" for {"columns": [...], "rows": [[...]]}
+            plus a "common" object holding fields that are identical in every row; when
+            the records span several nodes, "rows" is replaced by "nodes", mapping each
+            node to its rows, so the address is not repeated on every row
+
+    Returns:
+        JSON-serializable data
+    """
+    if mode != "compact":
+        return [asdict(record) for record in records]
+    if not records:
+        return {"columns": [], "rows": []}
+
+    names = [f.name for f in fields(records[0])]
+    values = {name: [getattr(record, name) for record in records] for name in names}
+
+    # Fields with the same value in every row are stated once
+    common = {}
+    if len(records) > 1:
+        for name in names:
+            first = values[name][0]
+            if isinstance(first, (str, int, float, bool)) and all(v == first for v in values[name]):
+                common[name] = first
+
+    columns = [name for name in names if name not in common]
+    rows = [list(row) for row in zip(*(values[n] for n in columns))]
+    if "node" in columns:
+        index = columns.index("node")
+        columns = columns[:index] + columns[index + 1 :]
+        by_node: dict[str, list[list[Any]]] = {}
+        for row in rows:
+            by_node.setdefault(row.pop(index), []).append(row)
+        data = {"columns": columns, "nodes": by_node}
+    else:
+        data = {"columns": columns, "rows": rows}
+    if common:
+        data["common"] = common
+    return data
+
+
+def unstructure(data: Any) -> list[dict[str, Any]]:
+    """Records as dictionaries from the output of structure(), in either mode"""
+    if isinstance(data, list):
+        return data
+    common = data.get("common", {})
+    if "nodes" in data:
+        return [
+            {"node": node, **common, **dict(zip(data["columns"], row))}
+            for node, rows in data["nodes"].items()
+            for row in rows
+        ]
+    return [{**common, **dict(zip(data["columns"], row))} for row in data["rows"]]
+
+
+def dumps(data: Any, mode: str) -> str:
+    """Serialize structured data, indented for "json" and minified for "compact" """
+    if mode == "compact":
+        return json.dumps(data, separators=(",", ":"), default=str)
+    return json.dumps(data, indent=2, default=str)
+
+
+def convert(text: str, parser: Callable[[str], list[Any]], mode: str, encode: bool = True) -> Any:
+    """
+    Parse raw output and arrange it for an output mode
+
+    Args:
+        text: Raw talosctl output
+        parser: One of the *_from_table / *_from_documents functions
+        mode: "json" or "compact"
+        encode: Return the serialized text instead of the structured data
+
+    Returns:
+        Serialized text, or JSON-serializable data when encode is false
+    """
+    with call_metrics.stage("parse", bytes=len(text)):
+        data = structure(parser(text), mode)
+    if not encode:
+        return data
+    with call_metrics.stage("serialize"):
+        return dumps(data, mode)
+
+
+async def convert_async(
+    text: str, parser: Callable[[str], list[Any]], mode: str, encode: bool = True
+) -> Any:
+    """convert(), run in a worker thread when the input is large"""
+    if len(text) < PARSE_IN_THREAD_BYTES:
+        return convert(text, parser, mode, encode)
+    return await asyncio.to_thread(convert, text, parser, mode, encode)
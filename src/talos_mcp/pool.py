@@ -0,0 +1,273 @@
+"""
+Channel pool for the native gRPC transport
+
+Keeps warm, multiplexed HTTP/2 connections per (context, endpoint, TLS identity),
+spreads calls across all configured endpoints and backs off from endpoints
+that fail to connect.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from grpclib.client import Channel
+from grpclib.config import Configuration
+from grpclib.exceptions import StreamTerminatedError
+
+from talos_mcp.metrics import call_metrics
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Errors that mean the connection itself is unusable, as opposed to a gRPC status
+CONNECTION_ERRORS = (OSError, ConnectionError, StreamTerminatedError, asyncio.TimeoutError)
+
+
+@dataclass
+class EndpointStats:
+    """Counters for one pooled endpoint"""
+
+    context: str
+    endpoint: str
+    identity: str
+    handshakes: int = 0
+    calls: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    retry_at: float = 0.0
+
+    def as_dict(self, open_channels: int) -> dict[str, Any]:
+        retry_in = max(0.0, self.retry_at - time.monotonic())
+        return {
+            "context": self.context,
+            "endpoint": self.endpoint,
+            "identity": self.identity,
+            "open_channels": open_channels,
+            "in_flight": self.in_flight,
+            "handshakes": self.handshakes,
+            "calls": self.calls,
+            "failures": self.failures,
+            "healthy": retry_in == 0.0,
+            "retry_in": round(retry_in, 3),
+        }
+
+
+class PooledChannel(Channel):
+    """grpclib Channel that reports handshakes and in-flight streams to the pool"""
+
+    def __init__(self, host: str, port: int, stats: EndpointStats, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.host = host
+        self.stats = stats
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    async def _create_connection(self):
+        self.stats.handshakes += 1
+        logger.info(f"Opening HTTP/2 connection to {self.stats.endpoint}")
+        with call_metrics.stage("connect", self.stats.endpoint):
+            return await super()._create_connection()
+
+
+@dataclass
+class _Endpoint:
+    host: str
+    port: int
+    ssl_context: Any
+    stats: EndpointStats
+    channels: list[PooledChannel] = field(default_factory=list)
+
+
+def tls_identity(context_data: dict) -> str:
+    """Short fingerprint of a context's client certificate, used as part of the pool key"""
+    crt = context_data.get("crt") or ""
+    if not crt:
+        return "insecure"
+    return hashlib.sha256(crt.encode("utf-8")).hexdigest()[:12]
+
+
+class ChannelPool:
+    """Pool of multiplexed gRPC channels keyed by (context, endpoint, TLS identity)"""
+
+    def __init__(
+        self,
+        idle_ttl: float = 300.0,
+        keepalive: float = 30.0,
+        max_streams_per_channel: int = 100,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            idle_ttl: Seconds a channel may stay unused before it is closed
+            keepalive: Interval in seconds between HTTP/2 keepalive pings
+            max_streams_per_channel: Concurrent streams before another channel is opened
+            backoff_base: First reconnect delay in seconds after a connection failure
+            backoff_max: Upper bound for the reconnect delay
+        """
+        self.idle_ttl = idle_ttl
+        self.max_streams_per_channel = max_streams_per_channel
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.config = Configuration(
+            _keepalive_time=keepalive,
+            _keepalive_timeout=min(20.0, keepalive),
+            _keepalive_permit_without_calls=True,
+        )
+        self._endpoints: dict[tuple[str, str, str], _Endpoint] = {}
+        self._rr = 0
+        self._reaper: Optional[asyncio.Task] = None
+
+    def register(
+        self, context: str, endpoint: str, host: str, port: int, identity: str, ssl_context: Any
+    ) -> tuple[str, str, str]:
+        """
+        Register an endpoint with the pool (idempotent)
+
+        Returns:
+            The pool key for the endpoint
+        """
+        key = (context, endpoint, identity)
+        if key not in self._endpoints:
+            self._endpoints[key] = _Endpoint(
+                host=host,
+                port=port,
+                ssl_context=ssl_context,
+                stats=EndpointStats(context=context, endpoint=endpoint, identity=identity),
+            )
+        return key
+
+    def _pick(self, keys: list[tuple[str, str, str]]) -> tuple[str, str, str]:
+        """Choose the least-loaded healthy endpoint, rotating between equals"""
+        now = time.monotonic()
+        healthy = [k for k in keys if self._endpoints[k].stats.retry_at <= now]
+        if not healthy:
+            # Everything is backing off: try whichever endpoint recovers first
+            return min(keys, key=lambda k: self._endpoints[k].stats.retry_at)
+
+        self._rr = (self._rr + 1) % len(healthy)
+        rotated = healthy[self._rr :] + healthy[: self._rr]
+        return min(rotated, key=lambda k: self._endpoints[k].stats.in_flight)
+
+    def _channel_for(self, ep: _Endpoint) -> PooledChannel:
+        """Reuse a channel with spare stream capacity, or open another one"""
+        for channel in ep.channels:
+            if channel.in_flight < self.max_streams_per_channel:
+                return channel
+        channel = PooledChannel(ep.host, ep.port, ep.stats, ssl=ep.ssl_context, config=self.config)
+        ep.channels.append(channel)
+        return channel
+
+    @contextlib.asynccontextmanager
+    async def lease(self, keys: list[tuple[str, str, str]]) -> AsyncIterator[PooledChannel]:
+        """
+        Lease a channel to one of the given endpoints for the duration of a call
+
+        Args:
+            keys: Pool keys of the candidate endpoints (see register)
+
+        Yields:
+            A connected-or-connectable channel; connection errors put its endpoint into backoff
+        """
+        self._ensure_reaper()
+        ep = self._endpoints[self._pick(keys)]
+        channel = self._channel_for(ep)
+
+        channel.in_flight += 1
+        channel.last_used = time.monotonic()
+        ep.stats.in_flight += 1
+        ep.stats.calls += 1
+        try:
+            yield channel
+        except CONNECTION_ERRORS:
+            self._mark_failed(ep, channel)
+            raise
+        else:
+            ep.stats.consecutive_failures = 0
+            ep.stats.retry_at = 0.0
+        finally:
+            channel.in_flight -= 1
+            channel.last_used = time.monotonic()
+            ep.stats.in_flight -= 1
+
+    def _mark_failed(self, ep: _Endpoint, channel: PooledChannel):
+        ep.stats.failures += 1
+        ep.stats.consecutive_failures += 1
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (ep.stats.consecutive_failures - 1))
+        delay *= random.uniform(0.5, 1.0)
+        ep.stats.retry_at = time.monotonic() + delay
+        logger.warning(f"Endpoint {ep.stats.endpoint} failed, backing off for {delay:.1f}s")
+
+        if channel in ep.channels and channel.in_flight <= 1:
+            ep.channels.remove(channel)
+            channel.close()
+
+    def evict_idle(self) -> int:
+        """
+        Close channels that have been idle for longer than the TTL
+
+        Returns:
+            Number of channels closed
+        """
+        cutoff = time.monotonic() - self.idle_ttl
+        evicted = 0
+        for ep in self._endpoints.values():
+            for channel in list(ep.channels):
+                if channel.in_flight == 0 and channel.last_used < cutoff:
+                    ep.channels.remove(channel)
+                    channel.close()
+                    evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} idle gRPC channel(s)")
+        return evicted
+
+    def discard(self, keys: list[tuple[str, str, str]]) -> int:
+        """
+        Forget endpoints and close their channels, e.g. after a context's certificate changed
+
+        Calls still running on those channels fail and are retried by their callers
+        on a fresh transport.
+
+        Returns:
+            Number of channels closed
+        """
+        closed = 0
+        for key in keys:
+            ep = self._endpoints.pop(key, None)
+            if ep is None:
+                continue
+            for channel in ep.channels:
+                channel.close()
+                closed += 1
+            ep.channels.clear()
+        return closed
+
+    def _ensure_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap())
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_ttl / 2))
+            self.evict_idle()
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Per-endpoint pool statistics"""
+        return [ep.stats.as_dict(len(ep.channels)) for ep in self._endpoints.values()]
+
+    def close(self):
+        """Close every pooled channel"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for ep in self._endpoints.values():
+            for channel in ep.channels:
+                channel.close()
+            ep.channels.clear()
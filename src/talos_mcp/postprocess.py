@@ -0,0 +1,406 @@
+"""
+Post-processing of large tool responses
+
+A machineconfig dump or a listing of /dev can be hundreds of KB in one
+response, slow to write over stdio and expensive for the model to read. The
+`response` argument of a tool call picks how its output is returned:
+
+    full     the output as is (default, see TALOS_MCP_RESPONSE_MODE)
+    summary  its structure: record counts and the most common values per
+             field or column, repeated lines collapsed into patterns, the
+             outline of large documents, and the first and last lines
+    delta    a unified diff against the previous response this client got
+             for the same tool and arguments, headed by digests of both
+    gzip     a gzip-compressed, base64-encoded embedded resource, for
+             clients that can decode one
+
+Responses smaller than RESPONSE_MIN_BYTES, and processed responses that
+would not be smaller, are returned in full. Delta mode always records the
+response as the base for the next one.
+"""
+
+import asyncio
+import base64
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import Counter, OrderedDict
+from typing import Any, Hashable, Optional, Union
+
+from mcp.types import BlobResourceContents, EmbeddedResource, TextContent
+
+from talos_mcp.normalize import parse_documents, parse_table, unstructure
+from talos_mcp.streaming import chunk_text
+
+RESPONSE_MODES = ("full", "summary", "delta", "gzip")
+# Mode of calls that do not pass a response argument
+DEFAULT_RESPONSE_MODE = os.environ.get("TALOS_MCP_RESPONSE_MODE", "full")
+# Responses smaller than this are returned in full whatever the mode
+RESPONSE_MIN_BYTES = int(os.environ.get("TALOS_MCP_RESPONSE_MIN_BYTES", "4096"))
+# Previous responses kept as delta bases, and their total size
+DELTA_MAX_ENTRIES = 256
+DELTA_MAX_BYTES = int(os.environ.get("TALOS_MCP_DELTA_CACHE_BYTES", str(32 * 1024 * 1024)))
+# Values, patterns and lines shown per field or section of a summary
+SUMMARY_TOP = 5
+# Longest scalar shown as is in an outline
+OUTLINE_SCALAR_CHARS = 60
+# Longest line shown as is in a summary of text
+SUMMARY_LINE_CHARS = 160
+# Inputs larger than this are processed in a worker thread
+PROCESS_IN_THREAD_BYTES = 64 * 1024
+
+Content = Union[TextContent, EmbeddedResource]
+
+_NUMBER = re.compile(r"\d+")
+_HEX = re.compile(r"\b(?=[0-9]*[a-f])[0-9a-f]{8,}\b")
+_YAML_START = re.compile(r"^[A-Za-z_][\w.-]*:(?:\s|$)")
+_TABLE_HEADER = re.compile(r"^[A-Z][A-Z0-9_()/.-]*(?: {2,}[A-Z][A-Z0-9_()/.-]*)+\s*$")
+
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _pattern(value: str) -> str:
+    """A value with its numbers and hex ids masked, to group repeated entries"""
+    return _NUMBER.sub("#", _HEX.sub("<hex>", value))
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def _shown(value: Any) -> Any:
+    """A value as a summary shows it: long strings and collections by their size"""
+    if isinstance(value, (dict, list)):
+        return outline(value, 0)
+    if isinstance(value, str) and len(value) > OUTLINE_SCALAR_CHARS:
+        return f"str[{len(value)} chars]"
+    return value
+
+
+def field_summary(values: list[Any], top: int = SUMMARY_TOP) -> dict[str, Any]:
+    """
+    Distinct values of a field and the most common ones
+
+    When the values are mostly distinct, they are grouped by pattern (numbers
+    and hex ids masked) so that e.g. tty0..tty63 collapse into one entry.
+    """
+    counts = Counter(_hashable(value) for value in values)
+    shown = {_hashable(value): _shown(value) for value in values}
+    summary: dict[str, Any] = {"distinct": len(counts)}
+    if len(counts) > top:
+        patterns = Counter()
+        for value, n in counts.items():
+            patterns[_pattern(str(shown[value]))] += n
+        if len(patterns) < len(counts):
+            summary["patterns"] = [[p, n] for p, n in patterns.most_common(top)]
+            return summary
+    summary["top"] = [[shown[value], n] for value, n in counts.most_common(top)]
+    return summary
+
+
+def outline(value: Any, depth: int = 2) -> Any:
+    """Shape of a document: keys and list lengths down to depth, sizes below"""
+    if isinstance(value, dict):
+        if depth <= 0:
+            size = len(json.dumps(value, default=str))
+            return f"object[{len(value)} keys, {size} B]"
+        return {key: outline(item, depth - 1) for key, item in value.items()}
+    if isinstance(value, list):
+        size = len(json.dumps(value, default=str))
+        return f"list[{len(value)}, {size} B]"
+    if isinstance(value, str) and len(value) > OUTLINE_SCALAR_CHARS:
+        return f"str[{len(value)} chars]"
+    return value
+
+
+def _records_summary(records: list[dict[str, Any]], top: int) -> dict[str, Any]:
+    names: list[str] = []
+    for record in records:
+        names.extend(key for key in record if key not in names)
+    return {
+        "count": len(records),
+        "fields": {
+            name: field_summary([record.get(name) for record in records], top) for name in names
+        },
+        "first": [outline(record, 1) for record in records[:2]],
+    }
+
+
+def _clip(line: str) -> str:
+    if len(line) <= SUMMARY_LINE_CHARS:
+        return line
+    return f"{line[:SUMMARY_LINE_CHARS]}... [{len(line)} chars]"
+
+
+def _lines_summary(lines: list[str], top: int) -> dict[str, Any]:
+    patterns: Counter = Counter()
+    examples: dict[str, str] = {}
+    for line in lines:
+        pattern = _pattern(line)
+        patterns[pattern] += 1
+        examples.setdefault(pattern, line)
+    return {
+        "lines": len(lines),
+        "distinct_patterns": len(patterns),
+        "repeated": [
+            {"pattern": _clip(p), "count": n, "example": _clip(examples[p])}
+            for p, n in patterns.most_common(top)
+            if n > 1
+        ],
+        "head": [_clip(line) for line in lines[:top]],
+        "tail": [_clip(line) for line in lines[-top:]] if len(lines) > top else [],
+    }
+
+
+def _json_summary(data: Any, top: int) -> dict[str, Any]:
+    if isinstance(data, dict) and "columns" in data and ("rows" in data or "nodes" in data):
+        data = unstructure(data)
+    if isinstance(data, list) and data and all(isinstance(item, dict) for item in data):
+        return {"format": "records", **_records_summary(data, top)}
+    if isinstance(data, dict):
+        sections = {}
+        for key, value in data.items():
+            if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+                sections[key] = _records_summary(value, top)
+            else:
+                sections[key] = outline(value, 2)
+        return {"format": "json", "keys": sections}
+    return {"format": "json", "outline": outline(data, 2)}
+
+
+def _documents_summary(docs: list[dict[str, Any]], top: int) -> dict[str, Any]:
+    if not any("metadata" in doc for doc in docs):
+        # JSON lines such as service logs, or plain YAML such as a machine config
+        if len(docs) > 2:
+            return {"format": "records", **_records_summary(docs, top)}
+        return {"format": "documents", "count": len(docs), "outline": [outline(d, 3) for d in docs]}
+    metadata = [doc.get("metadata") or {} for doc in docs]
+    summary = {
+        "format": "documents",
+        "count": len(docs),
+        "nodes": field_summary([doc.get("node") for doc in docs], top),
+        "types": field_summary([md.get("type") for md in metadata], top),
+        "ids": field_summary([md.get("id") for md in metadata], top),
+    }
+    if len(docs) <= 2:
+        summary["specs"] = [outline(doc.get("spec"), 3) for doc in docs]
+    else:
+        specs = [doc.get("spec") for doc in docs if isinstance(doc.get("spec"), dict)]
+        if specs:
+            summary["spec_fields"] = _records_summary(specs, top)["fields"]
+    return summary
+
+
+def _documents(text: str) -> list[dict[str, Any]]:
+    """The documents of a JSON or YAML stream, or none if the text is something else"""
+    try:
+        return parse_documents(text)
+    except Exception:
+        return []
+
+
+def summarize(text: str, top: int = SUMMARY_TOP) -> dict[str, Any]:
+    """
+    Structural summary of a tool's output
+
+    JSON is summarized as records (count and top values per field) or as an
+    outline; talosctl -o json|yaml resource streams by node, type and id plus
+    their specs; tables by column; anything else as collapsed line patterns
+    with the first and last lines.
+
+    Args:
+        text: The full output
+        top: Values, patterns and lines shown per field or section
+
+    Returns:
+        JSON-serializable summary, with the output's size and format
+    """
+    stripped = text.lstrip()
+    lines = text.splitlines()
+    summary: Optional[dict[str, Any]] = None
+    if stripped[:1] in ("{", "["):
+        try:
+            summary = _json_summary(json.loads(text), top)
+        except ValueError:
+            # JSON lines, a talosctl -o json stream, or text such as dmesg
+            docs = _documents(text)
+            if docs:
+                summary = _documents_summary(docs, top)
+    elif _YAML_START.match(stripped):
+        docs = _documents(text)
+        if docs:
+            summary = _documents_summary(docs, top)
+    elif lines and _TABLE_HEADER.match(lines[0]):
+        rows = parse_table(text)
+        if rows:
+            summary = {"format": "table", **_records_summary(rows, top)}
+            del summary["first"]
+            summary["head"] = [_clip(line) for line in lines[: top + 1]]
+    if summary is None:
+        summary = {"format": "text", **_lines_summary(lines, top)}
+    return {"bytes": len(text.encode("utf-8")), "lines": len(lines), **summary}
+
+
+def unified_delta(previous: str, current: str) -> tuple[str, int]:
+    """Unified diff between two responses, and the number of changed lines"""
+    diff = list(
+        difflib.unified_diff(
+            previous.splitlines(keepends=True),
+            current.splitlines(keepends=True),
+            "previous",
+            "current",
+            n=1,
+        )
+    )
+    changed = sum(
+        1 for line in diff if line[:1] in ("+", "-") and not line.startswith(("+++", "---"))
+    )
+    return "".join(line if line.endswith("\n") else line + "\n" for line in diff), changed
+
+
+def response_size(contents: list[Content]) -> int:
+    """Bytes a response's contents take on the wire, before JSON escaping"""
+    total = 0
+    for content in contents:
+        if isinstance(content, TextContent):
+            total += len(content.text.encode("utf-8"))
+        else:
+            total += len(getattr(content.resource, "blob", "") or "")
+    return total
+
+
+def _header(fields: dict[str, Any]) -> TextContent:
+    return TextContent(type="text", text=json.dumps(fields, separators=(",", ":")))
+
+
+class ResponseProcessor:
+    """Applies response modes, and keeps the previous responses deltas are taken against"""
+
+    def __init__(
+        self,
+        min_bytes: int = RESPONSE_MIN_BYTES,
+        max_entries: int = DELTA_MAX_ENTRIES,
+        max_bytes: int = DELTA_MAX_BYTES,
+    ):
+        """
+        Initialize the processor
+
+        Args:
+            min_bytes: Responses smaller than this are returned in full
+            max_entries: Previous responses kept for deltas
+            max_bytes: Total size of the previous responses kept
+        """
+        self.min_bytes = min_bytes
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self._bases: OrderedDict[Hashable, tuple[str, str]] = OrderedDict()
+        self.total_bytes = 0
+        self.responses: Counter = Counter()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _remember(self, key: Hashable, text: str) -> Optional[tuple[str, str]]:
+        """Record text as the base for key; return the previous (digest, text)"""
+        previous = self._bases.pop(key, None)
+        if previous is not None:
+            self.total_bytes -= len(previous[1])
+        if len(text) <= self.max_bytes:
+            self._bases[key] = (digest(text), text)
+            self.total_bytes += len(text)
+        while self._bases and (
+            len(self._bases) > self.max_entries or self.total_bytes > self.max_bytes
+        ):
+            _, (_, old) = self._bases.popitem(last=False)
+            self.total_bytes -= len(old)
+        return previous
+
+    def _apply(
+        self, mode: str, uri: str, text: str, previous: Optional[tuple[str, str]]
+    ) -> Optional[list[Content]]:
+        """The processed contents, or None if the output should go in full"""
+        if mode == "summary":
+            summary = summarize(text)
+            summary["response"] = "summary"
+            summary["note"] = "call again with response=full for the complete output"
+            return [_header(summary)]
+        if mode == "gzip":
+            uri = f"{uri}/{digest(text)}"
+            blob = base64.b64encode(gzip.compress(text.encode("utf-8"), mtime=0)).decode("ascii")
+            header = {
+                "response": "gzip",
+                "encoding": "gzip+base64",
+                "bytes": len(text.encode("utf-8")),
+                "compressed": len(blob),
+                "uri": uri,
+            }
+            resource = BlobResourceContents(uri=uri, mimeType="application/gzip", blob=blob)
+            return [_header(header), EmbeddedResource(type="resource", resource=resource)]
+        if mode == "delta" and previous is not None:
+            header = {"response": "delta", "digest": digest(text), "base": previous[0]}
+            if previous[1] == text:
+                return [_header({**header, "unchanged": True})]
+            diff, changed = unified_delta(previous[1], text)
+            if len(diff) >= len(text):
+                return None
+            header["changed_lines"] = changed
+            return [_header(header)] + [
+                TextContent(type="text", text=chunk) for chunk in chunk_text(diff)
+            ]
+        return None
+
+    async def process(
+        self, mode: str, key: Hashable, uri: str, contents: list[TextContent]
+    ) -> tuple[list[Content], str]:
+        """
+        Return a tool's response in a response mode
+
+        Args:
+            mode: One of RESPONSE_MODES
+            key: Identity of the call (client, context, tool and arguments), for deltas
+            uri: Prefix of the URI naming the response in an embedded resource
+            contents: The full response
+
+        Returns:
+            The contents to send and the mode they are in: "full" when processing
+            would not make the response smaller. In delta mode, a full response
+            is headed by its digest.
+        """
+        text = "".join(content.text for content in contents)
+        size = len(text.encode("utf-8"))
+        previous = self._remember(key, text) if mode == "delta" else None
+
+        processed = None
+        if mode != "full" and size >= self.min_bytes:
+            if size >= PROCESS_IN_THREAD_BYTES:
+                processed = await asyncio.to_thread(self._apply, mode, uri, text, previous)
+            else:
+                processed = self._apply(mode, uri, text, previous)
+        if processed is None or response_size(processed) >= size:
+            processed = contents
+            if mode == "delta":
+                processed = [_header({"response": "full", "digest": digest(text)})] + contents
+            mode = "full"
+
+        self.responses[mode] += 1
+        self.bytes_in += size
+        self.bytes_out += response_size(processed)
+        return processed, mode
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "default_mode": DEFAULT_RESPONSE_MODE,
+            "min_bytes": self.min_bytes,
+            "responses": dict(self.responses),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "delta_bases": len(self._bases),
+            "delta_bytes": self.total_bytes,
+        }
@@ -0,0 +1,31 @@
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# sources: common/common.proto
+# plugin: python-betterproto
+# This file has been @generated
+import builtins
+from dataclasses import dataclass
+
+import betterproto
+
+
+class ContainerDriver(betterproto.Enum):
+    CONTAINERD = 0
+    CRI = 1
+
+
+@dataclass(eq=False, repr=False)
+class Metadata(betterproto.Message):
+    hostname: str = betterproto.string_field(1)
+    """hostname of the server response comes from (injected by proxy)"""
+
+    error: str = betterproto.string_field(2)
+    """
+    error is set if request failed to the upstream (rest of response is
+     undefined)
+    """
+
+
+@dataclass(eq=False, repr=False)
+class Data(betterproto.Message):
+    metadata: "Metadata" = betterproto.message_field(1)
+    bytes: builtins.bytes = betterproto.bytes_field(2)
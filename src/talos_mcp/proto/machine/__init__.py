@@ -0,0 +1,498 @@
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# sources: machine/machine.proto
+# plugin: python-betterproto
+# This file has been @generated
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+)
+
+import betterproto
+import betterproto.lib.google.protobuf as betterproto_lib_google_protobuf
+import grpclib
+from betterproto.grpc.grpclib_server import ServiceBase
+
+from .. import common as _common__
+
+if TYPE_CHECKING:
+    import grpclib.server
+    from betterproto.grpc.grpclib_client import MetadataLike
+    from grpclib.metadata import Deadline
+
+
+@dataclass(eq=False, repr=False)
+class VersionResponse(betterproto.Message):
+    messages: List["Version"] = betterproto.message_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class Version(betterproto.Message):
+    metadata: "_common__.Metadata" = betterproto.message_field(1)
+    version: "VersionInfo" = betterproto.message_field(2)
+    platform: "PlatformInfo" = betterproto.message_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class VersionInfo(betterproto.Message):
+    tag: str = betterproto.string_field(1)
+    sha: str = betterproto.string_field(2)
+    built: str = betterproto.string_field(3)
+    go_version: str = betterproto.string_field(4)
+    os: str = betterproto.string_field(5)
+    arch: str = betterproto.string_field(6)
+
+
+@dataclass(eq=False, repr=False)
+class PlatformInfo(betterproto.Message):
+    name: str = betterproto.string_field(1)
+    mode: str = betterproto.string_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class ServiceListResponse(betterproto.Message):
+    messages: List["ServiceList"] = betterproto.message_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class ServiceList(betterproto.Message):
+    metadata: "_common__.Metadata" = betterproto.message_field(1)
+    services: List["ServiceInfo"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class ServiceInfo(betterproto.Message):
+    id: str = betterproto.string_field(1)
+    state: str = betterproto.string_field(2)
+    events: "ServiceEvents" = betterproto.message_field(3)
+    health: "ServiceHealth" = betterproto.message_field(4)
+
+
+@dataclass(eq=False, repr=False)
+class ServiceEvents(betterproto.Message):
+    events: List["ServiceEvent"] = betterproto.message_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class ServiceEvent(betterproto.Message):
+    msg: str = betterproto.string_field(1)
+    state: str = betterproto.string_field(2)
+    ts: datetime = betterproto.message_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class ServiceHealth(betterproto.Message):
+    unknown: bool = betterproto.bool_field(1)
+    healthy: bool = betterproto.bool_field(2)
+    last_message: str = betterproto.string_field(3)
+    last_change: datetime = betterproto.message_field(4)
+
+
+@dataclass(eq=False, repr=False)
+class LogsRequest(betterproto.Message):
+    namespace: str = betterproto.string_field(1)
+    id: str = betterproto.string_field(2)
+    driver: "_common__.ContainerDriver" = betterproto.enum_field(3)
+    """driver might be default "containerd" or k8s "cri"""
+
+    follow: bool = betterproto.bool_field(4)
+    tail_lines: int = betterproto.int32_field(5)
+
+
+@dataclass(eq=False, repr=False)
+class ListRequest(betterproto.Message):
+    root: str = betterproto.string_field(1)
+    """
+    Root indicates the root directory for the list. If not indicated, '/' is
+     presumed.
+    """
+
+    recurse: bool = betterproto.bool_field(2)
+    """Recurse indicates that subdirectories should be recursed."""
+
+    recursion_depth: int = betterproto.int32_field(3)
+    """
+    RecursionDepth indicates how many levels of subdirectories should be
+     recursed. The default (0) indicates that no limit should be enforced.
+    """
+
+
+@dataclass(eq=False, repr=False)
+class FileInfo(betterproto.Message):
+    metadata: "_common__.Metadata" = betterproto.message_field(1)
+    name: str = betterproto.string_field(2)
+    """Name is the name (including prefixed path) of the file or directory"""
+
+    size: int = betterproto.int64_field(3)
+    """Size indicates the number of bytes contained within the file"""
+
+    mode: int = betterproto.uint32_field(4)
+    """Mode is the bitmap of UNIX mode/permission flags of the file"""
+
+    modified: int = betterproto.int64_field(5)
+    """
+    Modified indicates the UNIX timestamp at which the file was last modified
+    """
+
+    is_dir: bool = betterproto.bool_field(6)
+    """IsDir indicates that the file is a directory"""
+
+    error: str = betterproto.string_field(7)
+    """
+    Error describes any error encountered while trying to read the file
+     information.
+    """
+
+    link: str = betterproto.string_field(8)
+    """Link is filled with symlink target"""
+
+    relative_name: str = betterproto.string_field(9)
+    """
+    RelativeName is the name of the file or directory relative to the
+     RootPath
+    """
+
+
+@dataclass(eq=False, repr=False)
+class ProcessesResponse(betterproto.Message):
+    messages: List["Process"] = betterproto.message_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class Process(betterproto.Message):
+    metadata: "_common__.Metadata" = betterproto.message_field(1)
+    processes: List["ProcessInfo"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class ProcessInfo(betterproto.Message):
+    pid: int = betterproto.int32_field(1)
+    ppid: int = betterproto.int32_field(2)
+    state: str = betterproto.string_field(3)
+    threads: int = betterproto.int32_field(4)
+    cpu_time: float = betterproto.double_field(5)
+    virtual_memory: int = betterproto.uint64_field(6)
+    resident_memory: int = betterproto.uint64_field(7)
+    command: str = betterproto.string_field(8)
+    executable: str = betterproto.string_field(9)
+    args: str = betterproto.string_field(10)
+
+
+@dataclass(eq=False, repr=False)
+class ReadRequest(betterproto.Message):
+    path: str = betterproto.string_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class EtcdMemberListRequest(betterproto.Message):
+    query_local: bool = betterproto.bool_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class EtcdMember(betterproto.Message):
+    id: int = betterproto.uint64_field(2)
+    """member ID."""
+
+    hostname: str = betterproto.string_field(3)
+    """human-readable name of the member."""
+
+    peer_urls: List[str] = betterproto.string_field(4)
+    """the list of URLs the member exposes to clients for communication."""
+
+    client_urls: List[str] = betterproto.string_field(5)
+    """
+    the list of URLs the member exposes to the cluster for communication.
+    """
+
+    is_learner: bool = betterproto.bool_field(6)
+    """learner flag"""
+
+
+@dataclass(eq=False, repr=False)
+class EtcdMembers(betterproto.Message):
+    metadata: "_common__.Metadata" = betterproto.message_field(1)
+    legacy_members: List[str] = betterproto.string_field(2)
+    """list of member hostnames."""
+
+    members: List["EtcdMember"] = betterproto.message_field(3)
+    """the list of etcd members registered with the node."""
+
+
+@dataclass(eq=False, repr=False)
+class EtcdMemberListResponse(betterproto.Message):
+    messages: List["EtcdMembers"] = betterproto.message_field(1)
+
+
+class MachineServiceStub(betterproto.ServiceStub):
+    async def etcd_member_list(
+        self,
+        etcd_member_list_request: "EtcdMemberListRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "EtcdMemberListResponse":
+        return await self._unary_unary(
+            "/machine.MachineService/EtcdMemberList",
+            etcd_member_list_request,
+            EtcdMemberListResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def list(
+        self,
+        list_request: "ListRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[FileInfo]:
+        async for response in self._unary_stream(
+            "/machine.MachineService/List",
+            list_request,
+            FileInfo,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
+    async def logs(
+        self,
+        logs_request: "LogsRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[_common__.Data]:
+        async for response in self._unary_stream(
+            "/machine.MachineService/Logs",
+            logs_request,
+            _common__.Data,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
+    async def processes(
+        self,
+        betterproto_lib_google_protobuf_empty: "betterproto_lib_google_protobuf.Empty",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "ProcessesResponse":
+        return await self._unary_unary(
+            "/machine.MachineService/Processes",
+            betterproto_lib_google_protobuf_empty,
+            ProcessesResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def read(
+        self,
+        read_request: "ReadRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[_common__.Data]:
+        async for response in self._unary_stream(
+            "/machine.MachineService/Read",
+            read_request,
+            _common__.Data,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
+    async def service_list(
+        self,
+        betterproto_lib_google_protobuf_empty: "betterproto_lib_google_protobuf.Empty",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "ServiceListResponse":
+        return await self._unary_unary(
+            "/machine.MachineService/ServiceList",
+            betterproto_lib_google_protobuf_empty,
+            ServiceListResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def version(
+        self,
+        betterproto_lib_google_protobuf_empty: "betterproto_lib_google_protobuf.Empty",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "VersionResponse":
+        return await self._unary_unary(
+            "/machine.MachineService/Version",
+            betterproto_lib_google_protobuf_empty,
+            VersionResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+
+class MachineServiceBase(ServiceBase):
+
+    async def etcd_member_list(
+        self, etcd_member_list_request: "EtcdMemberListRequest"
+    ) -> "EtcdMemberListResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def list(self, list_request: "ListRequest") -> AsyncIterator[FileInfo]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield FileInfo()
+
+    async def logs(self, logs_request: "LogsRequest") -> AsyncIterator[_common__.Data]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield _common__.Data()
+
+    async def processes(
+        self,
+        betterproto_lib_google_protobuf_empty: "betterproto_lib_google_protobuf.Empty",
+    ) -> "ProcessesResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def read(self, read_request: "ReadRequest") -> AsyncIterator[_common__.Data]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield _common__.Data()
+
+    async def service_list(
+        self,
+        betterproto_lib_google_protobuf_empty: "betterproto_lib_google_protobuf.Empty",
+    ) -> "ServiceListResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def version(
+        self,
+        betterproto_lib_google_protobuf_empty: "betterproto_lib_google_protobuf.Empty",
+    ) -> "VersionResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def __rpc_etcd_member_list(
+        self,
+        stream: "grpclib.server.Stream[EtcdMemberListRequest, EtcdMemberListResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.etcd_member_list(request)
+        await stream.send_message(response)
+
+    async def __rpc_list(
+        self, stream: "grpclib.server.Stream[ListRequest, FileInfo]"
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.list,
+            stream,
+            request,
+        )
+
+    async def __rpc_logs(
+        self, stream: "grpclib.server.Stream[LogsRequest, _common__.Data]"
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.logs,
+            stream,
+            request,
+        )
+
+    async def __rpc_processes(
+        self,
+        stream: "grpclib.server.Stream[betterproto_lib_google_protobuf.Empty, ProcessesResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.processes(request)
+        await stream.send_message(response)
+
+    async def __rpc_read(
+        self, stream: "grpclib.server.Stream[ReadRequest, _common__.Data]"
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.read,
+            stream,
+            request,
+        )
+
+    async def __rpc_service_list(
+        self,
+        stream: "grpclib.server.Stream[betterproto_lib_google_protobuf.Empty, ServiceListResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.service_list(request)
+        await stream.send_message(response)
+
+    async def __rpc_version(
+        self,
+        stream: "grpclib.server.Stream[betterproto_lib_google_protobuf.Empty, VersionResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.version(request)
+        await stream.send_message(response)
+
+    def __mapping__(self) -> Dict[str, grpclib.const.Handler]:
+        return {
+            "/machine.MachineService/EtcdMemberList": grpclib.const.Handler(
+                self.__rpc_etcd_member_list,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                EtcdMemberListRequest,
+                EtcdMemberListResponse,
+            ),
+            "/machine.MachineService/List": grpclib.const.Handler(
+                self.__rpc_list,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                ListRequest,
+                FileInfo,
+            ),
+            "/machine.MachineService/Logs": grpclib.const.Handler(
+                self.__rpc_logs,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                LogsRequest,
+                _common__.Data,
+            ),
+            "/machine.MachineService/Processes": grpclib.const.Handler(
+                self.__rpc_processes,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                betterproto_lib_google_protobuf.Empty,
+                ProcessesResponse,
+            ),
+            "/machine.MachineService/Read": grpclib.const.Handler(
+                self.__rpc_read,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                ReadRequest,
+                _common__.Data,
+            ),
+            "/machine.MachineService/ServiceList": grpclib.const.Handler(
+                self.__rpc_service_list,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                betterproto_lib_google_protobuf.Empty,
+                ServiceListResponse,
+            ),
+            "/machine.MachineService/Version": grpclib.const.Handler(
+                self.__rpc_version,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                betterproto_lib_google_protobuf.Empty,
+                VersionResponse,
+            ),
+        }
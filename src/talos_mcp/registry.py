@@ -0,0 +1,215 @@
+"""
+Declarative tool registry
+
+Each tool is described once by a ToolSpec: its schema, how arguments map to a
+talosctl command and a gRPC operation, how long its responses may be cached,
+its deadline, its concurrency class and the parser for structured output.
+The registry turns the specs into a frozen list of MCP Tool definitions once,
+and looks tools up by name in constant time.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, Union
+
+from mcp.types import TextContent, Tool
+
+from talos_mcp.logtail import LEVEL_NAMES
+from talos_mcp.normalize import OUTPUT_MODES
+from talos_mcp.postprocess import RESPONSE_MODES
+
+# Seconds a tool may run before it is aborted, unless it declares otherwise
+DEFAULT_TOOL_TIMEOUT = 60.0
+
+# Concurrency classes, from cheapest to most expensive:
+#   local  - answered in-process, never touches the cluster
+#   read   - short unary reads
+#   stream - streaming reads whose size depends on the target (logs, files)
+#   heavy  - long-running or cluster-wide operations (health, dashboard, kubeconfig)
+CONCURRENCY_CLASSES = ("local", "read", "stream", "heavy")
+
+NODES_ARGUMENT = {
+    "type": "string",
+    "description": (
+        "Comma-separated list of node IPs/hostnames, or a selector resolved from "
+        "talos_inventory: all, role=controlplane, role=worker (optional)"
+    ),
+}
+
+REQUIRED_NODES_ARGUMENT = {
+    "type": "string",
+    "description": (
+        "Comma-separated list of node IPs/hostnames, or a selector resolved from "
+        "talos_inventory: all, role=controlplane, role=worker"
+    ),
+}
+
+CONTEXT_ARGUMENT = {
+    "type": "string",
+    "description": "talosconfig context to use instead of the current one (optional)",
+}
+
+TIMEOUT_ARGUMENT = {
+    "type": "number",
+    "description": "Seconds to wait before aborting the call (overrides the tool default)",
+    "exclusiveMinimum": 0,
+}
+
+OUTPUT_ARGUMENT = {
+    "type": "string",
+    "description": (
+        "Output format: table (talosctl text), json (parsed records) or "
+        "compact (parsed records as columns and rows grouped by node, far smaller than json)"
+    ),
+    "enum": list(OUTPUT_MODES),
+    "default": "table",
+}
+
+CACHE_ARGUMENT = {
+    "type": "boolean",
+    "description": "Serve from the response cache if fresh (set false to force a new call)",
+    "default": True,
+}
+
+RESPONSE_ARGUMENT = {
+    "type": "string",
+    "description": (
+        "How to return large output: full, summary (counts, top values, collapsed "
+        "repeats), delta (diff against your previous call with the same arguments) "
+        "or gzip (gzip+base64 embedded resource)"
+    ),
+    "enum": list(RESPONSE_MODES),
+}
+
+# Server-side line filters shared by the log tools
+LOG_FILTER_ARGUMENTS = {
+    "pattern": {
+        "type": "string",
+        "description": "Only return lines matching this regular expression",
+    },
+    "level": {
+        "type": "string",
+        "description": "Only return lines at or above this level",
+        "enum": list(LEVEL_NAMES),
+    },
+    "since": {
+        "type": "string",
+        "description": "Only return lines after this time (RFC 3339, or a duration like 5m)",
+    },
+    "until": {
+        "type": "string",
+        "description": "Only return lines before this time (RFC 3339, or a duration like 5m)",
+    },
+}
+
+Handler = Callable[[dict[str, Any], float], Awaitable[list[TextContent]]]
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Everything the server needs to know to list and run one tool"""
+
+    name: str
+    description: str
+    properties: dict[str, Any] = field(default_factory=dict)
+    required: tuple[str, ...] = ()
+    # talosctl arguments for the call; used directly or as the gRPC fallback
+    command: Optional[Callable[[dict[str, Any]], list[str]]] = None
+    # GrpcTransport method and its keyword arguments; params returning None forces talosctl
+    operation: Optional[str] = None
+    params: Optional[Callable[[dict[str, Any]], Optional[dict[str, Any]]]] = None
+    # Coroutine taking (arguments, timeout) for tools that are not a single command
+    handler: Optional[Handler] = None
+    # Run once per node, concurrently, when more than one node is targeted
+    per_node: bool = False
+    # Parser from talos_mcp.normalize enabling the json/compact output modes
+    parser: Optional[Callable[[str], list[Any]]] = None
+    # Snapshot kind that parsed results are recorded under, from the arguments (None: not recorded)
+    snapshot: Optional[Callable[[dict[str, Any]], Optional[str]]] = None
+    # Seconds a response may be served from the cache, or a function of the arguments
+    cache_ttl: Union[None, float, Callable[[dict[str, Any]], Optional[float]]] = None
+    timeout: float = DEFAULT_TOOL_TIMEOUT
+    concurrency: str = "read"
+    # Drop the context's cached responses before running
+    invalidates_cache: bool = False
+
+    def __post_init__(self):
+        if self.concurrency not in CONCURRENCY_CLASSES:
+            raise ValueError(f"{self.name}: unknown concurrency class {self.concurrency!r}")
+        if self.handler is None and self.command is None:
+            raise ValueError(f"{self.name}: needs a command or a handler")
+
+    def deadline(self, arguments: dict[str, Any]) -> float:
+        """
+        Deadline for a call, from its "timeout" argument or the tool default
+
+        Raises:
+            ValueError: If the timeout is not a positive number of seconds
+        """
+        value = arguments.get("timeout")
+        if value is None:
+            return self.timeout
+        try:
+            seconds = float(value) if not isinstance(value, bool) else math.nan
+        except (TypeError, ValueError):
+            seconds = math.nan
+        if not 0 < seconds < math.inf:
+            raise ValueError(f"timeout must be a positive number of seconds, got {value!r}")
+        return seconds
+
+    def ttl(self, arguments: dict[str, Any]) -> Optional[float]:
+        """TTL for a call's response, or None if it must not be cached"""
+        if callable(self.cache_ttl):
+            return self.cache_ttl(arguments)
+        return self.cache_ttl
+
+    def to_tool(self) -> Tool:
+        """MCP Tool definition, with the shared per-call arguments added"""
+        properties = dict(self.properties)
+        if self.parser is not None:
+            properties.setdefault("output", OUTPUT_ARGUMENT)
+        if self.cache_ttl is not None:
+            properties.setdefault("cache", CACHE_ARGUMENT)
+        if self.concurrency != "local":
+            properties.setdefault("context", CONTEXT_ARGUMENT)
+            properties.setdefault("timeout", TIMEOUT_ARGUMENT)
+            properties.setdefault("response", RESPONSE_ARGUMENT)
+
+        schema: dict[str, Any] = {"type": "object", "properties": properties}
+        if self.required:
+            schema["required"] = list(self.required)
+        return Tool(name=self.name, description=self.description, inputSchema=schema)
+
+
+class ToolRegistry:
+    """Tool specs by name, with the MCP tool list built once"""
+
+    def __init__(self, specs: tuple[ToolSpec, ...] = ()):
+        self._specs: dict[str, ToolSpec] = {}
+        self._tools: Optional[tuple[Tool, ...]] = None
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: ToolSpec) -> ToolSpec:
+        """Add a tool; the tool list is rebuilt on next access"""
+        if spec.name in self._specs:
+            raise ValueError(f"Tool {spec.name} is already registered")
+        self._specs[spec.name] = spec
+        self._tools = None
+        return spec
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self._specs.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    @property
+    def tools(self) -> tuple[Tool, ...]:
+        """MCP Tool definitions, in registration order"""
+        if self._tools is None:
+            self._tools = tuple(spec.to_tool() for spec in self._specs.values())
+        return self._tools
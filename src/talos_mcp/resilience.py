@@ -0,0 +1,449 @@
+"""
+Execution policy: error classification, retries, failover and circuit breakers
+
+Failed calls are classified as unavailable, deadline, auth, not_found or
+other. Only unavailable and deadline failures are retried: for reads (the
+"read" concurrency class, whose calls are idempotent) up to RETRY_ATTEMPTS
+times in total, with full-jitter exponential backoff, each attempt on the
+next endpoint of the context when it has several.
+
+Every endpoint and node has a circuit breaker, fed by reads only. Only a
+target that could not be reached or dialed in time is blamed: a deadline the
+server imposed, or a slow command such as a health check, says nothing about
+the target's health, and a stream or heavy call may legitimately run past any
+deadline it was given. A failure is blamed on the
+endpoint when the error names the endpoint as the address that could not be
+dialed, otherwise on the single node the call targeted or the nodes the
+error names, and otherwise on the endpoint the call went through. After
+BREAKER_THRESHOLD consecutive failures the breaker opens: calls to that
+target fail at once instead of waiting for a connect timeout, and endpoints
+with open breakers are skipped. After BREAKER_COOLDOWN seconds the breaker is
+half-open and lets calls through again; the first success closes it, the
+first failure opens it again for twice as long (up to MAX_BREAKER_COOLDOWN).
+"""
+
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from talos_mcp.metrics import call_metrics
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Attempts a read makes in total before its last failure is returned
+RETRY_ATTEMPTS = int(os.environ.get("TALOS_MCP_RETRY_ATTEMPTS", "3"))
+# First and longest backoff before a retry, in seconds (full jitter below these)
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 2.0
+# Consecutive transient failures that open a target's breaker
+BREAKER_THRESHOLD = int(os.environ.get("TALOS_MCP_BREAKER_THRESHOLD", "3"))
+# Seconds an opened breaker rejects calls, doubled each time it reopens
+BREAKER_COOLDOWN = float(os.environ.get("TALOS_MCP_BREAKER_COOLDOWN", "30"))
+MAX_BREAKER_COOLDOWN = 300.0
+# Breakers kept; closed ones are forgotten first
+MAX_BREAKERS = 512
+
+# Concurrency classes whose calls are retried
+RETRY_CLASSES = ("read",)
+
+UNAVAILABLE = "unavailable"
+DEADLINE = "deadline"
+AUTH = "auth"
+NOT_FOUND = "not_found"
+OTHER = "other"
+# Failures that may pass, and are retried
+TRANSIENT = (UNAVAILABLE, DEADLINE)
+
+# First match wins: gRPC status names, then what dialers and TLS print
+_PATTERNS = [
+    (DEADLINE, re.compile(r"deadline ?exceeded|deadline_exceeded", re.I)),
+    (
+        AUTH,
+        re.compile(
+            r"unauthenticated|permission ?denied|permission_denied|x509|tls:|certificate", re.I
+        ),
+    ),
+    (NOT_FOUND, re.compile(r"not ?found|not_found|no such file", re.I)),
+    (
+        UNAVAILABLE,
+        re.compile(
+            r"Unavailable|connection (?:refused|reset|error)|connect call failed|"
+            r"no route to host|i/o timeout|network is unreachable",
+            re.I,
+        ),
+    ),
+]
+# Go's dialer, then asyncio's: the address that could not be connected to
+_DIALED = re.compile(
+    r"dial tcp \[?([0-9A-Za-z.:\-]+?)\]?:\d+|connect call failed \('([^']+)', \d+", re.I
+)
+
+# (context, "endpoint" or "node", address)
+BreakerKey = tuple[str, str, str]
+
+
+def classify_text(text: str) -> str:
+    """Kind of failure an error message describes"""
+    for kind, pattern in _PATTERNS:
+        if pattern.search(text):
+            return kind
+    return OTHER
+
+
+def classify(result: dict[str, Any]) -> Optional[str]:
+    """Kind of failure of a talosctl-style result, or None if it succeeded"""
+    if result.get("timed_out"):
+        return DEADLINE
+    if result.get("success"):
+        return None
+    if result.get("connection_error"):
+        return UNAVAILABLE
+    return classify_text(f"{result.get('stderr') or ''}\n{result.get('error') or ''}")
+
+
+def unreachable(result: dict[str, Any], kind: Optional[str]) -> bool:
+    """
+    Whether a failure says its target is down or unreachable
+
+    True for transport unavailability and for timeouts while dialing; not for
+    deadlines the server imposed on the call itself.
+    """
+    if kind == UNAVAILABLE:
+        return True
+    if kind != DEADLINE or result.get("timed_out"):
+        return False
+    return dialed_host(f"{result.get('stderr') or ''}\n{result.get('error') or ''}") is not None
+
+
+def dialed_host(text: str) -> Optional[str]:
+    """Address a "dial tcp" error could not connect to"""
+    match = _DIALED.search(text)
+    return (match.group(1) or match.group(2)) if match else None
+
+
+def named_nodes(text: str, nodes: list[str]) -> list[str]:
+    """The nodes an error message names"""
+    return [node for node in nodes if re.search(rf"(?<![\w.]){re.escape(node)}(?![\w.])", text)]
+
+
+def host_of(endpoint: str) -> str:
+    """Host part of an endpoint given as host, host:port or [v6]:port"""
+    if endpoint.startswith("["):
+        return endpoint[1:].split("]", 1)[0]
+    if endpoint.count(":") == 1:
+        return endpoint.split(":", 1)[0]
+    return endpoint
+
+
+def backoff_delay(attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1 (full jitter)"""
+    return random.uniform(0.0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+@dataclass
+class Breaker:
+    """Health of one endpoint or node"""
+
+    consecutive_failures: int = 0
+    failures: int = 0
+    successes: int = 0
+    opened: int = 0
+    open_until: float = 0.0
+    cooldown: float = 0.0
+    last_error: str = ""
+
+    def state(self, now: float, threshold: int) -> str:
+        if self.consecutive_failures < threshold:
+            return "closed"
+        return "open" if now < self.open_until else "half-open"
+
+
+class CircuitBreakers:
+    """Circuit breakers by endpoint and node, and the retry policy that feeds them"""
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_THRESHOLD,
+        cooldown: float = BREAKER_COOLDOWN,
+        max_breakers: int = MAX_BREAKERS,
+    ):
+        """
+        Initialize the breakers
+
+        Args:
+            threshold: Consecutive transient failures that open a breaker
+            cooldown: Seconds a breaker first stays open
+            max_breakers: Breakers kept, closed ones evicted first
+        """
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.max_breakers = max(1, max_breakers)
+        self._breakers: OrderedDict[BreakerKey, Breaker] = OrderedDict()
+        self._rotation: dict[str, int] = {}
+        self.retries = 0
+        self.failovers = 0
+        self.rejected = 0
+
+    def retry_in(self, key: BreakerKey) -> float:
+        """Seconds until a target may be called again; 0 if it may be called now"""
+        breaker = self._breakers.get(key)
+        if breaker is None or breaker.consecutive_failures < self.threshold:
+            return 0.0
+        return max(0.0, breaker.open_until - time.monotonic())
+
+    def success(self, key: BreakerKey):
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            return
+        if breaker.consecutive_failures >= self.threshold:
+            logger.info(f"{key[1].capitalize()} {key[2]} recovered, closing its breaker")
+        breaker.consecutive_failures = 0
+        breaker.cooldown = 0.0
+        breaker.successes += 1
+
+    def failure(self, key: BreakerKey, message: str):
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = Breaker()
+            self._evict(keep=key)
+        self._breakers.move_to_end(key)
+        breaker.failures += 1
+        breaker.consecutive_failures += 1
+        breaker.last_error = message.strip().splitlines()[-1][:200] if message.strip() else ""
+        now = time.monotonic()
+        # Calls that were in flight when the breaker opened do not extend it
+        if breaker.consecutive_failures >= self.threshold and now >= breaker.open_until:
+            breaker.cooldown = (
+                min(MAX_BREAKER_COOLDOWN, breaker.cooldown * 2)
+                if breaker.cooldown
+                else self.cooldown
+            )
+            breaker.open_until = now + breaker.cooldown
+            breaker.opened += 1
+            logger.warning(
+                f"{key[1].capitalize()} {key[2]} failed {breaker.consecutive_failures} times "
+                f"in a row, failing calls to it fast for {breaker.cooldown:g}s"
+            )
+
+    def _evict(self, keep: BreakerKey):
+        """Forget the least recently failed breakers beyond the cap, closed ones first"""
+        while len(self._breakers) > self.max_breakers:
+            others = [k for k in self._breakers if k != keep]
+            closed = [k for k in others if self._breakers[k].consecutive_failures < self.threshold]
+            self._breakers.pop((closed or others)[0])
+
+    def endpoints(self, context: str, endpoints: list[str]) -> list[str]:
+        """
+        Endpoints to try, in order: healthiest first, rotating between equals
+
+        Endpoints whose breaker is open are left out.
+        """
+        turn = self._rotation.get(context, 0)
+        self._rotation[context] = turn + 1
+        start = turn % len(endpoints)
+        rotated = endpoints[start:] + endpoints[:start]
+        usable = [e for e in rotated if not self.retry_in((context, "endpoint", e))]
+
+        def failures(endpoint: str) -> int:
+            breaker = self._breakers.get((context, "endpoint", endpoint))
+            return breaker.consecutive_failures if breaker is not None else 0
+
+        return sorted(usable, key=failures)
+
+    def rejection(self, context: str, nodes: list[str], endpoints: list[str]) -> Optional[str]:
+        """
+        Why a call must fail fast, or None if it may run
+
+        A call is rejected when every node it targets, or every endpoint it
+        could go through, has an open breaker.
+        """
+        for kind, targets in (("node", nodes), ("endpoint", endpoints)):
+            keys = [(context, kind, target) for target in targets]
+            if keys and all(self.retry_in(key) for key in keys):
+                waits = [self.retry_in(key) for key in keys]
+                errors = {self._breakers[key].last_error for key in keys} - {""}
+                return (
+                    f"{kind.capitalize()} {', '.join(targets)} marked unavailable"
+                    + (f" ({'; '.join(sorted(errors))})" if errors else "")
+                    + f"; failing fast for another {min(waits):.0f}s"
+                )
+        return None
+
+    def record(
+        self,
+        context: str,
+        result: dict[str, Any],
+        nodes: list[str],
+        endpoint: Optional[str],
+        endpoints: list[str],
+        blame: bool = True,
+    ) -> Optional[str]:
+        """
+        Feed a call's outcome to the breakers of the targets it involved
+
+        Args:
+            context: talosconfig context of the call
+            result: The call's talosctl-style result
+            nodes: Nodes the call targeted
+            endpoint: Endpoint the call was pinned to, if any
+            endpoints: The context's endpoints
+            blame: Whether a failure may count against the targets; successes
+                always close their breakers
+
+        Returns:
+            The failure kind, or None for a success
+        """
+        kind = classify(result)
+        # The endpoint the call certainly went through, if any
+        used = endpoint or (endpoints[0] if len(endpoints) == 1 else None)
+        if kind is None:
+            for node in nodes:
+                self.success((context, "node", node))
+            if used:
+                self.success((context, "endpoint", used))
+            return None
+        if not blame or not unreachable(result, kind) or result.get("queued"):
+            # Nothing to blame on a target, or the call never left the scheduler's queue
+            return kind
+
+        message = f"{result.get('stderr') or ''}\n{result.get('error') or ''}"
+        dialed = dialed_host(message)
+        hosts = {host_of(e): e for e in ([endpoint] if endpoint else endpoints)}
+        if dialed is not None and dialed in hosts:
+            self.failure((context, "endpoint", hosts[dialed]), message)
+        elif result.get("connection_error"):
+            # The transport could not reach its endpoint; it backs off from it itself
+            if used:
+                self.failure((context, "endpoint", used), message)
+        elif len(nodes) == 1:
+            self.failure((context, "node", nodes[0]), message)
+        elif named_nodes(message, nodes):
+            # apid reached some nodes of a multi-node call, not the ones it names
+            for node in named_nodes(message, nodes):
+                self.failure((context, "node", node), message)
+        elif used:
+            self.failure((context, "endpoint", used), message)
+        return kind
+
+    async def run(
+        self,
+        attempt: Callable[[Optional[str], Optional[float]], Awaitable[dict[str, Any]]],
+        *,
+        context: str,
+        nodes: list[str],
+        endpoints: list[str],
+        timeout: Optional[float],
+        retry: bool,
+        pin: bool = True,
+    ) -> dict[str, Any]:
+        """
+        Run a call under the policy
+
+        Args:
+            attempt: Coroutine function taking (endpoint to pin or None, seconds left)
+                and returning a talosctl-style result
+            context: talosconfig context of the call
+            nodes: Nodes the call targets
+            endpoints: Endpoints to spread attempts over, pinning each attempt to
+                one when there are several; empty when the transport picks them
+            timeout: Deadline in seconds for all attempts together
+            retry: Whether the call is idempotent and may be retried; only such
+                calls count against the breakers of their targets
+            pin: Whether attempts are pinned to endpoints; when not, endpoints
+                only decide which failures are blamed on an endpoint and when
+                every endpoint is down
+
+        Returns:
+            The first successful result, the last failure, or a fast failure
+            when the call's targets are known to be down
+        """
+        reason = self.rejection(context, nodes, endpoints)
+        if reason is not None:
+            self.rejected += 1
+            call_metrics.count("breaker_rejections")
+            return {
+                "success": False,
+                "returncode": None,
+                "stdout": "",
+                "stderr": reason,
+                "circuit_open": True,
+            }
+
+        order = self.endpoints(context, endpoints) if pin and len(endpoints) > 1 else []
+        deadline = None if timeout is None else time.monotonic() + timeout
+        attempts = max(1, RETRY_ATTEMPTS) if retry else 1
+        endpoint = order[0] if order else None
+        for number in range(attempts):
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            result = await attempt(endpoint, remaining)
+            if result.get("timed_out"):
+                # Report the deadline the call was given, not what was left of it
+                result = {**result, "timeout": timeout}
+            kind = self.record(context, result, nodes, endpoint, endpoints, blame=retry)
+            if kind not in TRANSIENT or number + 1 == attempts:
+                return result
+
+            delay = backoff_delay(number)
+            if deadline is not None and deadline - time.monotonic() <= delay:
+                return result
+            if any(self.retry_in((context, "node", node)) for node in nodes) or (
+                not order and self.rejection(context, [], endpoints) is not None
+            ):
+                # A target's breaker just opened: another attempt would fail the same way
+                return result
+            next_endpoint = None
+            if order:
+                # The next endpoint in line whose breaker did not open meanwhile
+                start = order.index(endpoint) + 1
+                usable = [
+                    e
+                    for e in order[start:] + order[:start]
+                    if not self.retry_in((context, "endpoint", e))
+                ]
+                if not usable:
+                    return result
+                next_endpoint = usable[0]
+            self.retries += 1
+            call_metrics.count("retries")
+            if next_endpoint != endpoint:
+                self.failovers += 1
+                call_metrics.count("failovers")
+            logger.info(
+                f"Retrying after {kind} failure in {delay:.2f}s"
+                + (f" via {next_endpoint}" if next_endpoint else "")
+            )
+            await asyncio.sleep(delay)
+            endpoint = next_endpoint
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "threshold": self.threshold,
+            "cooldown_s": self.cooldown,
+            "retry_attempts": RETRY_ATTEMPTS,
+            "retries": self.retries,
+            "failovers": self.failovers,
+            "rejected": self.rejected,
+            "breakers": [
+                {
+                    "context": context,
+                    "kind": kind,
+                    "target": target,
+                    "state": breaker.state(now, self.threshold),
+                    "consecutive_failures": breaker.consecutive_failures,
+                    "failures": breaker.failures,
+                    "successes": breaker.successes,
+                    "opened": breaker.opened,
+                    "retry_in_s": round(self.retry_in((context, kind, target)), 1),
+                    "last_error": breaker.last_error,
+                }
+                for (context, kind, target), breaker in self._breakers.items()
+            ],
+        }
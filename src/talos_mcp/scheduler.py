@@ -0,0 +1,306 @@
+"""
+Priority scheduler for cluster calls
+
+Bounds how many talosctl processes and gRPC calls are in flight, in total and
+per node, and hands free slots to cheap reads before heavy operations. A few
+slots are held back for reads so a flood of health checks or log streams can
+never lock them out, and waiting operations slowly gain priority so heavy
+work is not starved either. When several MCP clients share the server, a
+free slot goes to the waiting client with the fewest operations in flight,
+so one busy client cannot crowd out the others.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import math
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from talos_mcp.metrics import call_metrics
+
+logger = logging.getLogger("talos-mcp-server")
+
+MAX_IN_FLIGHT = int(os.environ.get("TALOS_MCP_MAX_IN_FLIGHT", "8"))
+MAX_IN_FLIGHT_PER_NODE = int(os.environ.get("TALOS_MCP_MAX_IN_FLIGHT_PER_NODE", "4"))
+
+# Lower runs first; matches the registry's concurrency classes
+PRIORITIES = {"read": 0, "stream": 1, "heavy": 2}
+
+# Key for calls that target the context's default nodes
+DEFAULT_TARGET = ""
+
+# Idle clients whose stats are dropped once more than this many are known
+MAX_TRACKED_CLIENTS = 64
+
+# Idle nodes whose stats are dropped once more than this many are known
+MAX_TRACKED_NODES = 256
+
+# MCP client the current call serves, set per request by the server
+current_client: ContextVar[str] = ContextVar("talos_mcp_client", default="")
+
+
+@dataclass
+class _Ticket:
+    priority: str
+    nodes: tuple[str, ...]
+    client: str
+    seq: int
+    enqueued: float
+    future: Optional[asyncio.Future] = None
+
+
+@dataclass
+class _ClassStats:
+    granted: int = 0
+    queued: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "granted": self.granted,
+            "wait_ms_avg": round(self.wait_total / self.granted * 1000, 1) if self.granted else 0.0,
+            "wait_ms_max": round(self.wait_max * 1000, 1),
+        }
+
+
+@dataclass
+class _NodeStats:
+    in_flight: int = 0
+    peak: int = 0
+
+
+@dataclass
+class _ClientStats:
+    in_flight: int = 0
+    peak: int = 0
+    granted: int = 0
+    wait_total: float = 0.0
+
+
+class Scheduler:
+    """Global and per-node cap on in-flight operations with priority classes"""
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        max_per_node: int = MAX_IN_FLIGHT_PER_NODE,
+        reserved_for_reads: Optional[int] = None,
+        reserved_per_node: Optional[int] = None,
+        aging: float = 5.0,
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            max_in_flight: Operations running at once across all nodes
+            max_per_node: Operations running at once against any single node
+            reserved_for_reads: Global slots only reads may use; a quarter of the cap by default
+            reserved_per_node: Per-node slots only reads may use; one by default
+            aging: Seconds of waiting that raise an operation by one priority class
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_per_node = max(1, max_per_node)
+        if reserved_for_reads is None:
+            reserved_for_reads = self.max_in_flight // 4
+        self.reserved_for_reads = min(reserved_for_reads, self.max_in_flight - 1)
+        if reserved_per_node is None:
+            reserved_per_node = 1
+        self.reserved_per_node = min(reserved_per_node, self.max_per_node - 1)
+        self.aging = aging
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.heavy_in_flight = 0
+        self.max_queue_depth = 0
+        self._waiters: list[_Ticket] = []
+        self._nodes: dict[str, _NodeStats] = {}
+        self._clients: dict[str, _ClientStats] = {}
+        self._classes = {name: _ClassStats() for name in PRIORITIES}
+        self._seq = itertools.count()
+
+    def _is_read(self, ticket: _Ticket) -> bool:
+        return PRIORITIES.get(ticket.priority, 0) == 0
+
+    def _fits(self, ticket: _Ticket) -> bool:
+        """Whether a ticket can start without exceeding any cap"""
+        if self._is_read(ticket):
+            global_ok = self.in_flight < self.max_in_flight
+            node_cap = self.max_per_node
+        else:
+            global_ok = (
+                self.in_flight < self.max_in_flight
+                and self.heavy_in_flight < self.max_in_flight - self.reserved_for_reads
+            )
+            node_cap = self.max_per_node - self.reserved_per_node
+        if not global_ok:
+            return False
+        for node in ticket.nodes:
+            stats = self._nodes.get(node)
+            if stats is not None and stats.in_flight >= node_cap:
+                return False
+        return True
+
+    def _rank(self, ticket: _Ticket, now: float) -> tuple[float, int, float, int]:
+        """
+        Order of a waiter: by aged priority class, then by how many operations
+        its client already has in flight, then by aged priority and arrival
+        """
+        effective = PRIORITIES.get(ticket.priority, 0) - (now - ticket.enqueued) / self.aging
+        client = self._clients.get(ticket.client)
+        busy = client.in_flight if client is not None else 0
+        return (math.floor(effective), busy, effective, ticket.seq)
+
+    def _grant(self, ticket: _Ticket):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        if not self._is_read(ticket):
+            self.heavy_in_flight += 1
+        for node in ticket.nodes:
+            stats = self._nodes.setdefault(node, _NodeStats())
+            stats.in_flight += 1
+            stats.peak = max(stats.peak, stats.in_flight)
+
+        client = self._clients.setdefault(ticket.client, _ClientStats())
+        client.in_flight += 1
+        client.peak = max(client.peak, client.in_flight)
+
+        waited = time.monotonic() - ticket.enqueued
+        client.granted += 1
+        client.wait_total += waited
+        cls = self._classes[ticket.priority]
+        cls.granted += 1
+        cls.wait_total += waited
+        cls.wait_max = max(cls.wait_max, waited)
+        if waited > 1.0:
+            logger.info(
+                f"{ticket.priority} operation waited {waited:.1f}s for a slot "
+                f"({len(self._waiters)} still queued)"
+            )
+
+    def _dispatch(self):
+        """Start the best eligible waiters while capacity remains"""
+        while self._waiters and self.in_flight < self.max_in_flight:
+            now = time.monotonic()
+            best = None
+            best_rank = None
+            for ticket in self._waiters:
+                if ticket.future.done() or not self._fits(ticket):
+                    continue
+                rank = self._rank(ticket, now)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = ticket, rank
+            if best is None:
+                return
+            self._dequeue(best)
+            self._grant(best)
+            best.future.set_result(None)
+
+    def _dequeue(self, ticket: _Ticket):
+        self._waiters.remove(ticket)
+        self._classes[ticket.priority].queued -= 1
+
+    async def acquire(self, priority: str, nodes: Optional[list[str]] = None) -> _Ticket:
+        """
+        Wait for a slot
+
+        Args:
+            priority: Concurrency class of the operation ("read", "stream" or "heavy");
+                anything else is treated as a read
+            nodes: Nodes the operation targets; empty for the context's default nodes
+
+        Returns:
+            Ticket to hand back to release()
+        """
+        ticket = _Ticket(
+            priority=priority if priority in PRIORITIES else "read",
+            nodes=tuple(nodes) if nodes else (DEFAULT_TARGET,),
+            client=current_client.get(),
+            seq=next(self._seq),
+            enqueued=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(ticket)
+        self._classes[ticket.priority].queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        self._dispatch()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Granted just before the cancellation arrived
+                self.release(ticket)
+            elif ticket in self._waiters:
+                self._dequeue(ticket)
+            raise
+        call_metrics.record(
+            "queue",
+            time.monotonic() - ticket.enqueued,
+            ",".join(n for n in ticket.nodes if n) or None,
+            priority=ticket.priority,
+        )
+        return ticket
+
+    def release(self, ticket: _Ticket):
+        """Free a slot and start whoever is next"""
+        self.in_flight -= 1
+        if not self._is_read(ticket):
+            self.heavy_in_flight -= 1
+        for node in ticket.nodes:
+            stats = self._nodes[node]
+            stats.in_flight -= 1
+            if not stats.in_flight and len(self._nodes) > MAX_TRACKED_NODES:
+                # Nodes come and go too: keep stats only for a bounded number of them
+                del self._nodes[node]
+        client = self._clients[ticket.client]
+        client.in_flight -= 1
+        if not client.in_flight and len(self._clients) > MAX_TRACKED_CLIENTS:
+            # Sessions come and go: keep stats only for a bounded number of clients
+            del self._clients[ticket.client]
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: str, nodes: Optional[list[str]] = None) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the block"""
+        ticket = await self.acquire(priority, nodes)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict[str, Any]:
+        """Current occupancy, queue depth and per-class wait times"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_in_flight_per_node": self.max_per_node,
+            "reserved_for_reads": self.reserved_for_reads,
+            "reserved_per_node": self.reserved_per_node,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "queued": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "classes": {name: stats.as_dict() for name, stats in self._classes.items()},
+            "nodes": {
+                node or "(default)": {"in_flight": stats.in_flight, "peak": stats.peak}
+                for node, stats in self._nodes.items()
+            },
+            "clients": {
+                client
+                or "(none)": {
+                    "in_flight": stats.in_flight,
+                    "peak": stats.peak,
+                    "granted": stats.granted,
+                    "wait_ms_avg": (
+                        round(stats.wait_total / stats.granted * 1000, 1) if stats.granted else 0.0
+                    ),
+                }
+                for client, stats in self._clients.items()
+            },
+        }
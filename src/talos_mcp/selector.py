@@ -0,0 +1,149 @@
+"""
+Label and field selectors for resources
+
+The syntax follows kubectl: comma-separated requirements, all of which must
+hold. Label selectors match metadata.labels; field selectors match dotted
+paths into the resource document (metadata.phase, spec.dev_path).
+
+    key=value   key==value   key!=value
+    key in (a,b)   key notin (a,b)
+    key   !key        (exists, does not exist)
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+_SET = re.compile(r"^\s*([^\s!=(),]+)\s+(in|notin)\s+\(([^)]*)\)\s*$")
+_COMPARE = re.compile(r"^\s*([^\s!=(),]+)\s*(==|=|!=)\s*([^\s,()]*)\s*$")
+_EXISTS = re.compile(r"^\s*(!?)\s*([^\s!=(),]+)\s*$")
+
+# A value that no document field can have, for missing keys
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class Requirement:
+    """One condition on one key"""
+
+    key: str
+    op: str
+    values: tuple[str, ...] = ()
+
+    def matches(self, value: Any) -> bool:
+        if self.op == "exists":
+            return value is not _MISSING
+        if self.op == "!exists":
+            return value is _MISSING
+        present = value is not _MISSING and _text(value) in self.values
+        return present if self.op in ("=", "in") else not present
+
+
+def _text(value: Any) -> str:
+    """Field values compared as text, with booleans and nulls spelled as in JSON"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if value is None:
+        return "null"
+    return str(value)
+
+
+def _split(text: str) -> list[str]:
+    """Split at commas outside parentheses"""
+    parts, depth, current = [], 0, []
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [part for part in parts if part.strip()]
+
+
+def parse_selector(text: str) -> tuple[Requirement, ...]:
+    """
+    Parse a selector expression
+
+    Raises:
+        ValueError: If a requirement is malformed
+    """
+    requirements = []
+    for part in _split(text):
+        match = _SET.match(part)
+        if match:
+            values = tuple(v.strip() for v in match.group(3).split(",") if v.strip())
+            requirements.append(Requirement(match.group(1), match.group(2), values))
+            continue
+        match = _COMPARE.match(part)
+        if match:
+            op = "=" if match.group(2) in ("=", "==") else "!="
+            requirements.append(Requirement(match.group(1), op, (match.group(3),)))
+            continue
+        match = _EXISTS.match(part)
+        if match:
+            op = "!exists" if match.group(1) else "exists"
+            requirements.append(Requirement(match.group(2), op))
+            continue
+        raise ValueError(f"invalid selector requirement {part.strip()!r}")
+    return tuple(requirements)
+
+
+def field_value(document: dict[str, Any], path: str) -> Any:
+    """Value at a dotted path in a document, or _MISSING"""
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+@dataclass(frozen=True)
+class ResourceSelector:
+    """Label and field requirements a resource document must meet"""
+
+    labels: tuple[Requirement, ...] = ()
+    fields: tuple[Requirement, ...] = ()
+    text: str = ""
+
+    @classmethod
+    def parse(
+        cls, labels: Optional[str] = None, fields: Optional[str] = None
+    ) -> Optional["ResourceSelector"]:
+        """
+        Build a selector from label and field expressions
+
+        Returns:
+            The selector, or None if neither expression has a requirement
+
+        Raises:
+            ValueError: If an expression is malformed
+        """
+        label_reqs = parse_selector(labels or "")
+        field_reqs = parse_selector(fields or "")
+        if not label_reqs and not field_reqs:
+            return None
+        return cls(label_reqs, field_reqs, f"{labels or ''}|{fields or ''}")
+
+    def equals(self, path: str) -> Optional[str]:
+        """The single value a field selector pins a path to, if any (for index lookups)"""
+        for requirement in self.fields:
+            if requirement.key == path and requirement.op == "=":
+                return requirement.values[0]
+        return None
+
+    def matches(self, document: dict[str, Any]) -> bool:
+        metadata = document.get("metadata") or {}
+        labels = metadata.get("labels") or {}
+        for requirement in self.labels:
+            if not requirement.matches(labels.get(requirement.key, _MISSING)):
+                return False
+        for requirement in self.fields:
+            if not requirement.matches(field_value(document, requirement.key)):
+                return False
+        return True
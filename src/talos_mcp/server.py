@@ -5,19 +5,93 @@ Talos MCP Server
 An MCP server that provides tools for interacting with Talos Linux clusters via the gRPC API.
 """
 
+import argparse
 import asyncio
+import contextlib
+import itertools
 import json
 import logging
 import os
-import ssl
+import signal
+import time
+import weakref
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Optional
 
-import yaml
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+from talos_mcp import batch, dashboard, normalize
+from talos_mcp.cache import ResponseCache
+from talos_mcp.fanout import NodeResult, fan_out, merge_results, split_nodes
+from talos_mcp.files import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    SORT_KEYS,
+    FileEntry,
+    ListPage,
+    ReadRange,
+    entry_from_long_listing,
+    list_page,
+    read_range,
+)
+from talos_mcp.inventory import (
+    DISCOVERY_TIMEOUT,
+    Inventories,
+    Inventory,
+    NodeRecord,
+    build_records,
+    is_selector,
+)
+from talos_mcp.logmerge import DEFAULT_LINE_BUDGET, MAX_LINE_BUDGET, LogMerge
+from talos_mcp.logtail import MAX_POLL_LINES, LogFilter, LogFollowers
+from talos_mcp.metrics import (
+    METRICS_FILE,
+    METRICS_PORT,
+    call_metrics,
+    current_trace,
+    serve_metrics,
+    write_metrics_file,
+)
+from talos_mcp.mirror import ResourceMirrors
+from talos_mcp.postprocess import (
+    DEFAULT_RESPONSE_MODE,
+    RESPONSE_MODES,
+    Content,
+    ResponseProcessor,
+    response_size,
+)
+from talos_mcp.registry import (
+    CONTEXT_ARGUMENT,
+    LOG_FILTER_ARGUMENTS,
+    NODES_ARGUMENT,
+    OUTPUT_ARGUMENT,
+    REQUIRED_NODES_ARGUMENT,
+    ToolRegistry,
+    ToolSpec,
+)
+from talos_mcp.resilience import RETRY_CLASSES, CircuitBreakers, host_of
+from talos_mcp.scheduler import Scheduler, current_client
+from talos_mcp.selector import ResourceSelector
+from talos_mcp.snapshots import Snapshot, open_store
+from talos_mcp.streaming import (
+    MAX_OUTPUT_BYTES,
+    MAX_OUTPUT_LINES,
+    MAX_STDERR_BYTES,
+    READ_CHUNK_SIZE,
+    BoundedOutput,
+    LineDecoder,
+    chunk_text,
+    read_stream,
+)
+from talos_mcp.talosconfig import DEFAULT_CONFIG_PATH, TalosConfigFile, context_fingerprint
+
+if TYPE_CHECKING:
+    # The gRPC stack is imported with the first transport, not at start-up
+    from talos_mcp.grpc_transport import GrpcTransport
+    from talos_mcp.pool import ChannelPool
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("talos-mcp-server")
@@ -26,80 +100,613 @@ logger = logging.getLogger("talos-mcp-server")
 class TalosClient:
     """Client for interacting with Talos Linux API"""
 
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        transport: Optional[str] = None,
+        max_output_bytes: int = MAX_OUTPUT_BYTES,
+        max_output_lines: int = MAX_OUTPUT_LINES,
+    ):
         """
         Initialize Talos client with configuration
 
         Args:
-            config_path: Path to talosconfig file. Defaults to ~/.talos/config
+            config_path: Path to talosconfig file. Defaults to $TALOSCONFIG or ~/.talos/config
+            transport: "grpc" to talk to apid natively, or "subprocess" to always
+                shell out to talosctl. Defaults to $TALOS_MCP_TRANSPORT or "grpc"
+            max_output_bytes: Output kept per talosctl call; the middle of larger output is dropped
+            max_output_lines: Lines kept per talosctl call
         """
-        self.config_path = config_path or os.path.expanduser("~/.talos/config")
-        self.config = None
-        self.current_context = None
-        self._load_config()
+        self.config_path = config_path or DEFAULT_CONFIG_PATH
+        self._config_file = TalosConfigFile(self.config_path)
+        self.transport = transport or os.environ.get("TALOS_MCP_TRANSPORT", "grpc")
+        self.max_output_bytes = max_output_bytes
+        self.max_output_lines = max_output_lines
+        self.scheduler = Scheduler()
+        self.breakers = CircuitBreakers()
+        self.mirrors = ResourceMirrors()
+        self.inventories = Inventories()
+        self._pool: Optional["ChannelPool"] = None
+        # Per context: fingerprint of its settings and its transport (None: use talosctl)
+        self._transports: dict[str, tuple[str, Optional["GrpcTransport"]]] = {}
+        self._fingerprints: dict[str, str] = {}
 
-    def _load_config(self):
-        """Load Talos configuration from file"""
-        try:
-            config_file = Path(self.config_path)
-            if config_file.exists():
-                with open(config_file, "r") as f:
-                    self.config = yaml.safe_load(f)
-                    self.current_context = self.config.get("context")
-                    logger.info(f"Loaded Talos config with context: {self.current_context}")
-            else:
-                logger.warning(f"Talos config not found at {self.config_path}")
-        except Exception as e:
-            logger.error(f"Error loading Talos config: {e}")
+    @property
+    def config_file(self) -> TalosConfigFile:
+        """The talosconfig file, read on first use rather than when the server starts"""
+        if not self._config_file.checks:
+            self.reload_config()
+        return self._config_file
 
-    def get_context_info(self) -> dict:
-        """Get information about the current context"""
-        if not self.config or not self.current_context:
-            return {"error": "No Talos configuration loaded"}
+    @property
+    def pool(self) -> "ChannelPool":
+        """Connection pool shared by the gRPC transports, created with the first one"""
+        if self._pool is None:
+            from talos_mcp.pool import ChannelPool
+
+            self._pool = ChannelPool()
+        return self._pool
+
+    def pool_stats(self) -> list[dict[str, Any]]:
+        """Per-endpoint pool statistics; empty, without creating the pool, before any gRPC call"""
+        return self._pool.stats() if self._pool is not None else []
 
-        contexts = self.config.get("contexts", {})
-        context_data = contexts.get(self.current_context, {})
+    @property
+    def config(self) -> Optional[dict]:
+        return self.config_file.config
 
+    @property
+    def current_context(self) -> Optional[str]:
+        return self.config_file.current_context
+
+    def reload_config(self) -> set[str]:
+        """
+        Re-read talosconfig if it changed on disk
+
+        Contexts whose endpoints, nodes or credentials changed lose their gRPC
+        transport, which is rebuilt on next use, and their pooled connections.
+
+        Returns:
+            Names of the contexts that were added, removed or changed
+        """
+        if not self._config_file.refresh():
+            return set()
+
+        fingerprints = {
+            name: context_fingerprint(data or {})
+            for name, data in self._config_file.contexts.items()
+        }
+        changed = {
+            name
+            for name in fingerprints.keys() | self._fingerprints.keys()
+            if fingerprints.get(name) != self._fingerprints.get(name)
+        }
+        self._fingerprints = fingerprints
+        for name in changed:
+            _, grpc = self._transports.pop(name, ("", None))
+            if grpc is not None:
+                self.pool.discard(grpc.keys)
+            self.mirrors.discard(name)
+            self.inventories.discard(name)
+        if changed and self._config_file.reloads:
+            logger.info(f"Talos config changed for context(s): {', '.join(sorted(changed))}")
+        return changed
+
+    def context_name(self, context: Optional[str] = None) -> Optional[str]:
+        """
+        Name of the context a call targets
+
+        Raises:
+            ContextError: If an explicitly named context is not in talosconfig
+        """
+        return self.config_file.resolve(context)
+
+    def get_context_info(self, context: Optional[str] = None) -> dict:
+        """Get information about a context, by default the current one"""
+        name = self.context_name(context)
+        if not self.config or not name:
+            return {"error": "No Talos configuration loaded"}
+
+        context_data = self.config_file.context_data(name)
         return {
-            "context": self.current_context,
+            "context": name,
+            "current": name == self.current_context,
             "endpoints": context_data.get("endpoints", []),
             "nodes": context_data.get("nodes", []),
+            "contexts": sorted(self.config_file.contexts),
         }
 
-    async def execute_talosctl(self, args: list[str]) -> dict[str, Any]:
+    def resolve_nodes(self, nodes: Optional[str], context: Optional[str] = None) -> list[str]:
+        """Split a comma-separated nodes argument, defaulting to the context's nodes"""
+        if nodes:
+            return split_nodes(nodes)
+        return list(self.config_file.context_data(context).get("nodes") or [])
+
+    def inventory(self, context: Optional[str] = None) -> Inventory:
         """
-        Execute talosctl command and return the output
+        The node inventory of a context, discovering its nodes on first use
+
+        Raises:
+            ContextError: If an explicitly named context is not in talosconfig
+            ValueError: If no Talos configuration is loaded
+        """
+        name = self.context_name(context)
+        if name is None:
+            raise ValueError("no Talos configuration loaded")
+        return self.inventories.get(name, lambda: self.discover_nodes(name))
+
+    async def select_nodes(
+        self, selector: str, context: Optional[str] = None, timeout: Optional[float] = None
+    ) -> str:
+        """
+        Resolve a node selector (all, role=controlplane, ...) from the inventory
 
         Args:
-            args: List of command arguments to pass to talosctl
+            selector: The selector, see talos_mcp.inventory
+            context: talosconfig context to target, or None for the current one
+            timeout: Seconds to wait if the context's nodes were never discovered
+
+        Returns:
+            Comma-separated addresses of the matching nodes
+
+        Raises:
+            ValueError: If the selector is malformed or matches no node
+        """
+        name = self.context_name(context)
+        if name is None:
+            raise ValueError("no Talos configuration loaded")
+        nodes = await self.inventories.select(
+            name, selector, lambda: self.discover_nodes(name), timeout
+        )
+        return ",".join(nodes)
+
+    async def discover_nodes(self, context: str) -> list[NodeRecord]:
+        """
+        Discover a context's nodes: cluster members, then each node's name and role
+
+        Args:
+            context: Context name
+
+        Returns:
+            Node records, see inventory.build_records
+
+        Raises:
+            RuntimeError: If the context has no nodes or none of them answered
+        """
+        data = self.config_file.context_data(context)
+        seeds = list(data.get("nodes") or []) or [host_of(e) for e in data.get("endpoints") or []]
+        if not seeds:
+            raise RuntimeError(f"context {context} has no nodes or endpoints")
+
+        async def read(resource_type: str, nodes: list[str]) -> tuple[list[dict], dict]:
+            # Partial results still list the nodes that answered
+            targets = ",".join(nodes)
+            result = await self.get_resources(
+                ["get", resource_type, "-n", targets, "-o", "json"],
+                DISCOVERY_TIMEOUT,
+                "read",
+                context,
+                resource_type=resource_type,
+                nodes=targets,
+                output="json",
+            )
+            return normalize.parse_documents(result.get("stdout") or ""), result
+
+        members: list[dict] = []
+        for seed in seeds:
+            members, result = await read("members", [seed])
+            if members or result.get("success"):
+                break
+
+        targets = [record.ip for record in build_records(seeds, members, [], [])]
+        (nodenames, failed), (machinetypes, _) = await asyncio.gather(
+            read("nodename", targets), read("machinetype", targets)
+        )
+        records = build_records(seeds, members, nodenames, machinetypes)
+        if not members and not any(record.reachable for record in records):
+            raise RuntimeError((failed.get("stderr") or failed.get("error") or "").strip())
+        return records
+
+    def get_grpc_transport(self, context: Optional[str] = None) -> Optional["GrpcTransport"]:
+        """
+        Get the persistent gRPC transport for a context
+
+        Args:
+            context: Context name, or None for the current context
+
+        Returns:
+            The transport, or None when the subprocess path should be used
+        """
+        if self.transport != "grpc":
+            return None
+        name = self.context_name(context)
+        if name is None:
+            return None
+        fingerprint = self._fingerprints.get(name, "")
+        cached = self._transports.get(name)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        context_data = self.config_file.context_data(name)
+        grpc = None
+        if not all(context_data.get(k) for k in ("ca", "crt", "key", "endpoints")):
+            logger.info(f"Context {name} has no client certificate or endpoints, using talosctl")
+        else:
+            try:
+                from talos_mcp.grpc_transport import GrpcTransport
+
+                grpc = GrpcTransport.from_context(
+                    context_data,
+                    context=name,
+                    pool=self.pool,
+                    max_output_bytes=self.max_output_bytes,
+                    max_output_lines=self.max_output_lines,
+                )
+            except Exception as e:
+                logger.warning(f"Could not set up gRPC transport for {name}, using talosctl: {e}")
+        self._transports[name] = (fingerprint, grpc)
+        return grpc
+
+    def talosctl_command(
+        self, args: list[str], context: Optional[str] = None, endpoint: Optional[str] = None
+    ) -> list[str]:
+        """Full talosctl command line for args, pinned to the config file, context and endpoint"""
+        cmd = ["talosctl"] + args
+        if Path(self.config_path).exists():
+            cmd.extend(["--talosconfig", self.config_path])
+        if context:
+            cmd.extend(["--context", context])
+        if endpoint:
+            cmd.extend(["--endpoints", endpoint])
+        return cmd
+
+    def context_endpoints(self, context: Optional[str] = None) -> list[str]:
+        """The endpoints of a context, by default the current one"""
+        return list(self.config_file.context_data(context).get("endpoints") or [])
+
+    async def call(
+        self,
+        operation: str,
+        args: list[str],
+        timeout: Optional[float] = None,
+        priority: str = "read",
+        context: Optional[str] = None,
+        fallback: Optional[Callable[[Optional[float]], Awaitable[dict[str, Any]]]] = None,
+        **params,
+    ) -> dict[str, Any]:
+        """
+        Run a Talos operation, preferring the native gRPC transport
+
+        Args:
+            operation: GrpcTransport method name (e.g. "version", "get")
+            args: Equivalent talosctl arguments, used by the subprocess fallback
+            timeout: Deadline in seconds for the whole operation, including any
+                fallback and time spent queued
+            priority: Scheduler class of the operation ("read", "stream" or "heavy")
+            context: talosconfig context to target, or None for the current one
+            fallback: Coroutine function taking the remaining timeout and running
+                the operation without gRPC; runs talosctl with args by default
+            **params: Keyword arguments for the GrpcTransport method
 
         Returns:
             Dictionary with stdout, stderr, and return code
         """
+        if operation == "get" and fallback is None:
+            # Resource reads may be answered from a mirror and take selectors
+            return await self.get_resources(args, timeout, priority, context, **params)
+
+        if fallback is None:
+
+            async def fallback(timeout: Optional[float]) -> dict[str, Any]:
+                return await self.execute_talosctl(
+                    args, timeout=timeout, priority=priority, context=context
+                )
+
+        transport = self.get_grpc_transport(context)
+        if transport is None:
+            return await fallback(timeout)
+        # Imported with the transport, not at start-up
+        from grpclib.const import Status
+        from grpclib.exceptions import GRPCError
+
+        from talos_mcp.pool import CONNECTION_ERRORS
+
+        if "nodes" in params:
+            params["nodes"] = self.resolve_nodes(params["nodes"], context)
+
+        node = ",".join(params.get("nodes") or []) or None
+
+        async def attempt(_endpoint: Optional[str], timeout: Optional[float]) -> dict[str, Any]:
+            # Not pinned: the pool picks the endpoint, skipping those it backs off from
+            granted = False
+
+            async def scheduled():
+                nonlocal granted
+                async with self.scheduler.slot(priority, params.get("nodes")):
+                    granted = True
+                    logger.info(f"gRPC {operation} via {', '.join(transport.endpoints)}")
+                    with call_metrics.stage("execute", node, operation=operation):
+                        return await getattr(transport, operation)(**params)
+
+            try:
+                return await asyncio.wait_for(scheduled(), timeout)
+            except asyncio.TimeoutError:
+                result = timeout_result(f"{operation} timed out after {timeout:g}s", timeout)
+                return {**result, "queued": not granted}
+            except GRPCError as e:
+                if e.status == Status.UNIMPLEMENTED:
+                    raise
+                return {
+                    "success": False,
+                    "returncode": e.status.value,
+                    "stdout": "",
+                    "stderr": f"{e.status.name}: {e.message}",
+                }
+            except Exception as e:
+                logger.error(f"Error calling {operation} over gRPC: {e}")
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "stderr": str(e),
+                    "connection_error": isinstance(e, CONNECTION_ERRORS),
+                }
+
+        started = time.monotonic()
         try:
-            # Build the command
-            cmd = ["talosctl"] + args
+            return await self.breakers.run(
+                attempt,
+                context=self.context_name(context) or "",
+                nodes=params.get("nodes") or [],
+                endpoints=transport.endpoints,
+                timeout=timeout,
+                retry=priority in RETRY_CLASSES,
+                pin=False,
+            )
+        except GRPCError:
+            logger.info(f"apid does not implement {operation}, falling back to talosctl")
+            if timeout is not None:
+                timeout = max(0.0, timeout - (time.monotonic() - started))
+            return await fallback(timeout)
 
-            # Add config file if it exists
-            if Path(self.config_path).exists():
-                cmd.extend(["--talosconfig", self.config_path])
+    async def get_resources(
+        self,
+        args: list[str],
+        timeout: Optional[float] = None,
+        priority: str = "read",
+        context: Optional[str] = None,
+        *,
+        resource_type: str,
+        nodes: Optional[str] = None,
+        output: Optional[str] = None,
+        namespace: str = "",
+        selector: Optional[ResourceSelector] = None,
+    ) -> dict[str, Any]:
+        """
+        Get resources (talosctl get), from memory when the type is mirrored
 
-            logger.info(f"Executing: {' '.join(cmd)}")
+        A read of a mirrored type starts the mirrors of the nodes it targets
+        and is answered by them once they are in sync. Through talosctl,
+        selectors are applied to its JSON output, which args must ask for.
+
+        Args:
+            args: Equivalent talosctl arguments, used by the subprocess fallback
+            timeout: Deadline in seconds for the whole operation
+            priority: Scheduler class of the operation
+            context: talosconfig context to target, or None for the current one
+            resource_type: Resource type or alias
+            nodes: Comma-separated nodes, or None for the context's nodes
+            output: talosctl output format (None for the table, json or yaml)
+            namespace: Resource namespace, or "" for the type's default
+            selector: Label and field requirements
+
+        Returns:
+            Dictionary with stdout, stderr, and return code
+        """
+        transport = self.get_grpc_transport(context)
+        if transport is not None and self.mirrors.enabled(resource_type):
+            name = self.context_name(context) or ""
+            node_list = self.resolve_nodes(nodes, context)
+            node = ",".join(node_list) or None
+            with call_metrics.stage("execute", node, operation="mirror"):
+                stdout = self.mirrors.answer(name, node_list, resource_type, output, selector)
+            if stdout is not None:
+                return {"success": True, "returncode": 0, "stdout": stdout, "stderr": ""}
+
+            async def snapshot(node: str) -> list[dict[str, Any]]:
+                docs, errors = await transport.resource_documents(resource_type, [node], namespace)
+                if errors:
+                    raise RuntimeError("; ".join(errors))
+                return docs
+
+            self.mirrors.ensure(
+                name,
+                node_list,
+                resource_type,
+                lambda node: transport.watch_resources(resource_type, node, namespace),
+                snapshot,
+            )
+
+        async def fallback(timeout: Optional[float]) -> dict[str, Any]:
+            result = await self.execute_talosctl(
+                args, timeout=timeout, priority=priority, context=context
+            )
+            if selector is None or not result.get("success"):
+                return result
+            docs = [
+                doc for doc in normalize.parse_documents(result["stdout"]) if selector.matches(doc)
+            ]
+            return {**result, "stdout": normalize.render_resources(docs, output)}
+
+        return await self.call(
+            "get",
+            args,
+            timeout,
+            priority,
+            context,
+            fallback=fallback,
+            resource_type=resource_type,
+            nodes=nodes,
+            output=output,
+            namespace=namespace,
+            selector=selector,
+        )
+
+    async def execute_talosctl(
+        self,
+        args: list[str],
+        timeout: Optional[float] = None,
+        priority: str = "read",
+        context: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Execute talosctl command under the execution policy
 
-            # Execute the command
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+        Reads are retried after transient failures, each attempt pinned to the
+        next endpoint when the context has several, and commands whose nodes
+        or endpoints are known to be down fail at once (see resilience).
+
+        Args:
+            args: List of command arguments to pass to talosctl
+            timeout: Seconds to wait in total, including time spent queued and
+                between attempts, or None to wait indefinitely
+            priority: Scheduler class of the command ("read", "stream" or "heavy")
+            context: talosconfig context to target, or None for the current one
+
+        Returns:
+            Result of the last attempt, or of the policy when it failed fast
+        """
+        name = self.context_name(context) or ""
+
+        async def attempt(endpoint: Optional[str], timeout: Optional[float]) -> dict[str, Any]:
+            return await self._schedule_talosctl(args, timeout, priority, context, endpoint)
+
+        return await self.breakers.run(
+            attempt,
+            context=name,
+            nodes=command_nodes(args),
+            endpoints=self.context_endpoints(name) if name else [],
+            timeout=timeout,
+            retry=priority in RETRY_CLASSES,
+        )
+
+    async def _schedule_talosctl(
+        self,
+        args: list[str],
+        timeout: Optional[float] = None,
+        priority: str = "read",
+        context: Optional[str] = None,
+        endpoint: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Execute talosctl command once the scheduler grants a slot
+
+        Args:
+            args: List of command arguments to pass to talosctl
+            timeout: Seconds to wait, including time spent queued, or None to wait indefinitely
+            priority: Scheduler class of the command ("read", "stream" or "heavy")
+            context: talosconfig context to target, or None for the current one
+            endpoint: Endpoint to pin the command to, or None for talosctl's choice
+
+        Returns:
+            Result of _run_talosctl, or a timeout result if no slot was granted in time
+        """
+        started = time.monotonic()
+        try:
+            ticket = await asyncio.wait_for(
+                self.scheduler.acquire(priority, command_nodes(args)), timeout
             )
+        except asyncio.TimeoutError:
+            result = timeout_result(f"talosctl {args[0]} still queued after {timeout:g}s", timeout)
+            return {**result, "queued": True}
+
+        try:
+            if timeout is not None:
+                timeout = max(0.0, timeout - (time.monotonic() - started))
+            return await self._run_talosctl(args, timeout, context, endpoint)
+        finally:
+            self.scheduler.release(ticket)
+
+    async def _run_talosctl(
+        self,
+        args: list[str],
+        timeout: Optional[float] = None,
+        context: Optional[str] = None,
+        endpoint: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Execute talosctl command and return the output
+
+        Output is read incrementally and bounded: when it exceeds the client's
+        byte or line budget, only its head and tail are kept. talosctl runs in
+        its own process group, which is killed and reaped when the deadline
+        passes or the calling task is cancelled.
+
+        Args:
+            args: List of command arguments to pass to talosctl
+            timeout: Seconds to wait before killing talosctl, or None to wait indefinitely
+            context: talosconfig context to target, or None for the current one
+            endpoint: Endpoint to pin the command to, or None for talosctl's choice
+
+        Returns:
+            Dictionary with stdout, stderr, return code, and whether stdout was truncated.
+            On timeout, "timed_out" is set and stdout holds the partial output.
+        """
+        try:
+            cmd = self.talosctl_command(args, context, endpoint)
+
+            logger.info(f"Executing: {' '.join(cmd)}")
+            node = ",".join(command_nodes(args)) or None
+
+            # Execute the command. stdin must not be inherited: with the stdio
+            # transport it is the MCP protocol stream.
+            with call_metrics.stage("spawn", node):
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+
+            stdout = BoundedOutput(self.max_output_bytes, self.max_output_lines)
+            stderr = BoundedOutput(MAX_STDERR_BYTES, self.max_output_lines)
+
+            async def drain():
+                await asyncio.gather(
+                    read_stream(process.stdout, stdout),
+                    read_stream(process.stderr, stderr),
+                )
+                await process.wait()
+
+            try:
+                with call_metrics.stage("execute", node, command=args[0]):
+                    await asyncio.wait_for(drain(), timeout)
+            except asyncio.TimeoutError:
+                stdout.finish()
+                stderr.finish()
+                logger.warning(f"talosctl {args[0]} timed out after {timeout:g}s, killed")
+                return timeout_result(
+                    f"talosctl {args[0]} timed out after {timeout:g}s",
+                    timeout,
+                    stdout=stdout.render(),
+                    stderr=stderr.render(),
+                )
+            finally:
+                # Also runs when the MCP client cancels the request
+                await asyncio.shield(kill_process_group(process))
 
-            stdout, stderr = await process.communicate()
+            if stdout.truncated:
+                logger.info(
+                    f"Truncated talosctl output: kept {self.max_output_bytes} of "
+                    f"{stdout.total_bytes} bytes"
+                )
 
             return {
                 "success": process.returncode == 0,
                 "returncode": process.returncode,
-                "stdout": stdout.decode("utf-8"),
-                "stderr": stderr.decode("utf-8"),
+                "stdout": stdout.render(),
+                "stderr": stderr.render(),
+                "truncated": stdout.truncated,
             }
 
         except Exception as e:
@@ -109,402 +716,1755 @@ class TalosClient:
                 "error": str(e),
             }
 
+    async def stream_talosctl_chunks(
+        self, args: list[str], context: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Run a talosctl command and yield its raw output as it arrives
+
+        The command does not take a scheduler slot; callers bound how many run.
+        talosctl is killed when the consumer stops iterating or is cancelled.
+
+        Args:
+            args: List of command arguments to pass to talosctl
+            context: talosconfig context to target, or None for the current one
+
+        Yields:
+            Chunks of stdout
+
+        Raises:
+            RuntimeError: If talosctl exits with an error
+        """
+        cmd = self.talosctl_command(args, context)
+        logger.info(f"Streaming: {' '.join(cmd)}")
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        stderr = BoundedOutput(MAX_STDERR_BYTES, self.max_output_lines)
+        stderr_task = asyncio.create_task(read_stream(process.stderr, stderr))
+        try:
+            while True:
+                chunk = await process.stdout.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+            await stderr_task
+            if await process.wait() != 0:
+                raise RuntimeError(
+                    stderr.render().strip() or f"talosctl exited {process.returncode}"
+                )
+        finally:
+            stderr_task.cancel()
+            await asyncio.shield(kill_process_group(process, drain=process.stdout))
+
+    async def stream_talosctl(
+        self, args: list[str], context: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Run a long-lived talosctl command and yield its output line by line
+
+        Args:
+            args: List of command arguments to pass to talosctl
+            context: talosconfig context to target, or None for the current one
+
+        Yields:
+            stdout lines without trailing newlines
+
+        Raises:
+            RuntimeError: If talosctl exits with an error
+        """
+        decoder = LineDecoder()
+        async with contextlib.aclosing(self.stream_talosctl_chunks(args, context)) as chunks:
+            async for chunk in chunks:
+                for line in decoder.feed(chunk):
+                    yield line
+        for line in decoder.finish():
+            yield line
+
+    def log_source(
+        self,
+        service: str,
+        node: str,
+        kubernetes: bool = False,
+        follow: bool = True,
+        context: Optional[str] = None,
+    ):
+        """
+        Line source for one node's service log, over gRPC or talosctl logs
+
+        Args:
+            service: Service or container ID
+            node: Node to read from
+            kubernetes: Read a container in the k8s.io namespace
+            follow: Keep streaming new lines (talosctl logs -f) instead of ending after the tail
+            context: talosconfig context to target, or None for the current one
+
+        Returns:
+            Function taking a number of history lines and returning an async line iterator
+        """
+
+        def source(tail: int) -> AsyncIterator[str]:
+            transport = self.get_grpc_transport(context)
+            if transport is not None:
+                logger.info(f"gRPC stream_logs {service} on {node}")
+                return transport.stream_logs(
+                    service, node, kubernetes=kubernetes, tail=tail, follow=follow
+                )
+            args = ["logs", service, "-n", node, "--tail", str(tail)]
+            if follow:
+                args.append("-f")
+            if kubernetes:
+                args.append("-k")
+            return self.stream_talosctl(args, context)
+
+        return source
+
+    def read_source(
+        self, path: str, node: str, context: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a file from one node, over gRPC or talosctl read
+
+        Args:
+            path: File to read
+            node: Node to read from
+            context: talosconfig context to target, or None for the current one
+
+        Returns:
+            Async iterator of the file's bytes; closing it stops the read
+        """
+        transport = self.get_grpc_transport(context)
+        if transport is not None:
+            logger.info(f"gRPC read_chunks {path} on {node}")
+            return transport.read_chunks(path, node)
+        return self.stream_talosctl_chunks(["read", path, "-n", node], context)
+
+    async def list_source(
+        self, path: str, node: str, depth: int = 1, context: Optional[str] = None
+    ) -> AsyncIterator[FileEntry]:
+        """
+        Stream the entries under a path on one node, over gRPC or talosctl list -l
+
+        Args:
+            path: Directory to list
+            node: Node to list on
+            depth: Directory depth to traverse
+            context: talosconfig context to target, or None for the current one
+
+        Yields:
+            Entries as they arrive; closing the iterator stops the listing
+        """
+        transport = self.get_grpc_transport(context)
+        if transport is not None:
+            logger.info(f"gRPC list_entries {path} on {node}")
+            entries = transport.list_entries(path, node, depth)
+            async with contextlib.aclosing(entries):
+                async for entry in entries:
+                    yield entry
+            return
+
+        args = ["list", "-l", path, "-n", node, "-d", str(depth)]
+        lines = self.stream_talosctl(args, context)
+        async with contextlib.aclosing(lines):
+            async for line in lines:
+                entry = entry_from_long_listing(line)
+                if entry is not None:
+                    yield entry
+
+
+def command_nodes(args: list[str]) -> list[str]:
+    """Nodes a talosctl command targets, from its -n/--nodes flag"""
+    for i, arg in enumerate(args):
+        if arg in ("-n", "--nodes") and i + 1 < len(args):
+            return split_nodes(args[i + 1])
+        if arg.startswith("--nodes="):
+            return split_nodes(arg.split("=", 1)[1])
+    return []
+
+
+async def kill_process_group(
+    process: asyncio.subprocess.Process, drain: Optional[asyncio.StreamReader] = None
+):
+    """
+    Kill a child started with start_new_session (and anything it spawned), then reap it
+
+    Args:
+        process: The child to kill
+        drain: A pipe the caller stopped reading; it is read to EOF, since wait()
+            does not return while a full, paused pipe is still open
+    """
+    if process.returncode is None:
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+    if drain is not None:
+        while await drain.read(READ_CHUNK_SIZE):
+            pass
+    await process.wait()
+
+
+def timeout_result(
+    message: str, timeout: Optional[float], stdout: str = "", stderr: str = ""
+) -> dict[str, Any]:
+    """Result dictionary for an operation that hit its deadline"""
+    return {
+        "success": False,
+        "timed_out": True,
+        "timeout": timeout,
+        "returncode": None,
+        "stdout": stdout,
+        "stderr": (stderr + "\n" if stderr and not stderr.endswith("\n") else stderr) + message,
+    }
+
 
 # Initialize the MCP server
 app = Server("talos-mcp-server")
 talos_client = TalosClient()
+response_cache = ResponseCache()
+response_processor = ResponseProcessor()
 
+# talos_diff kinds and the tools whose parsed results they snapshot
+SNAPSHOT_TOOLS = {
+    "services": "talos_get_services",
+    "etcd_members": "talos_etcd_members",
+    "resources": "talos_get_resources",
+}
+log_followers = LogFollowers()
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List all available Talos tools"""
-    return [
-        Tool(
+# Seconds the first poll of a follower waits for the stream's history
+FOLLOW_START_WAIT = 2.0
+
+# Per-resource overrides for talos_get_resources; definitions and config change rarely
+RESOURCE_CACHE_TTLS = {
+    "rd": 300.0,
+    "resourcedefinition": 300.0,
+    "resourcedefinitions": 300.0,
+    "machineconfig": 60.0,
+    "machineconfigs": 60.0,
+}
+
+
+def _with_nodes(args: list[str], arguments: dict[str, Any]) -> list[str]:
+    """Append the -n flag when the call targets specific nodes"""
+    if arguments.get("nodes"):
+        args.extend(["-n", arguments["nodes"]])
+    return args
+
+
+def _resource_output(arguments: dict[str, Any]) -> Optional[str]:
+    """talosctl -o format for get: json and compact are parsed from talosctl's JSON stream"""
+    output = arguments.get("output")
+    if output in ("json", "compact"):
+        return "json"
+    return output if output and output != "table" else None
+
+
+def _version_command(arguments: dict[str, Any]) -> list[str]:
+    return _with_nodes(["version"], arguments)
+
+
+def _disks_command(arguments: dict[str, Any]) -> list[str]:
+    args = ["get", "disks", "-n", arguments["nodes"]]
+    if _resource_output(arguments):
+        args.extend(["-o", "json"])
+    if arguments.get("insecure"):
+        args.append("--insecure")
+    return args
+
+
+def _disks_params(arguments: dict[str, Any]) -> Optional[dict[str, Any]]:
+    if arguments.get("insecure"):
+        # Insecure (maintenance mode) access has no client identity
+        return None
+    return {
+        "resource_type": "disks",
+        "nodes": arguments["nodes"],
+        "output": _resource_output(arguments),
+    }
+
+
+def _services_command(arguments: dict[str, Any]) -> list[str]:
+    return _with_nodes(["services"], arguments)
+
+
+def _services_snapshot(arguments: dict[str, Any]) -> str:
+    return "services"
+
+
+def _resources_command(arguments: dict[str, Any]) -> list[str]:
+    args = _with_nodes(["get", arguments["resource"]], arguments)
+    output = _resource_output(arguments)
+    if arguments.get("labels") or arguments.get("fields"):
+        # talosctl cannot filter: selectors are applied to its JSON output
+        output = "json"
+    if output:
+        args.extend(["-o", output])
+    return args
+
+
+def _resources_params(arguments: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "resource_type": arguments["resource"],
+        "nodes": arguments.get("nodes"),
+        "output": _resource_output(arguments),
+        "selector": ResourceSelector.parse(arguments.get("labels"), arguments.get("fields")),
+    }
+
+
+def _resources_snapshot(arguments: dict[str, Any]) -> Optional[str]:
+    if arguments.get("labels") or arguments.get("fields"):
+        # A filtered read is not the whole state of the type
+        return None
+    return f"resources:{arguments['resource']}"
+
+
+def _resources_ttl(arguments: dict[str, Any]) -> Optional[float]:
+    resource = str(arguments.get("resource", "")).lower()
+    if talos_client.mirrors.enabled(resource):
+        # Mirrored types are answered from memory, fresher than a cached response
+        return None
+    return RESOURCE_CACHE_TTLS.get(resource, 10.0)
+
+
+def _logs_command(arguments: dict[str, Any]) -> list[str]:
+    args = ["logs", arguments["service"], "-n", arguments["nodes"]]
+    if arguments.get("kubernetes"):
+        args.append("-k")
+    if arguments.get("tail"):
+        args.extend(["--tail", str(arguments["tail"])])
+    return args
+
+
+def _logs_params(arguments: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "service": arguments["service"],
+        "nodes": arguments["nodes"],
+        "kubernetes": arguments.get("kubernetes", False),
+        "tail": arguments.get("tail"),
+    }
+
+
+def _health_command(arguments: dict[str, Any]) -> list[str]:
+    args = _with_nodes(["health"], arguments)
+    if not arguments.get("control_plane", True):
+        args.append("--run-all")
+    return args
+
+
+def _list_command(arguments: dict[str, Any]) -> list[str]:
+    args = ["list", "-n", arguments["nodes"]]
+    if arguments.get("path"):
+        args.append(arguments["path"])
+    if arguments.get("depth"):
+        args.extend(["-d", str(arguments["depth"])])
+    return args
+
+
+def _list_params(arguments: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "path": arguments.get("path") or "/",
+        "nodes": arguments["nodes"],
+        "depth": arguments.get("depth") or 1,
+    }
+
+
+def _read_command(arguments: dict[str, Any]) -> list[str]:
+    return ["read", arguments["path"], "-n", arguments["nodes"]]
+
+
+def _read_params(arguments: dict[str, Any]) -> dict[str, Any]:
+    return {"path": arguments["path"], "nodes": arguments["nodes"]}
+
+
+def _etcd_members_command(arguments: dict[str, Any]) -> list[str]:
+    return _with_nodes(["etcd", "members"], arguments)
+
+
+def _etcd_members_snapshot(arguments: dict[str, Any]) -> str:
+    return "etcd_members"
+
+
+def _kubeconfig_command(arguments: dict[str, Any]) -> list[str]:
+    args = _with_nodes(["kubeconfig"], arguments)
+    if arguments.get("force"):
+        args.append("--force")
+    return args
+
+
+def _nodes_params(arguments: dict[str, Any]) -> dict[str, Any]:
+    return {"nodes": arguments.get("nodes")}
+
+
+async def config_info_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    info = talos_client.get_context_info(arguments.get("context"))
+    return [TextContent(type="text", text=json.dumps(info, indent=2))]
+
+
+async def inventory_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    try:
+        inventory = talos_client.inventory(arguments.get("context"))
+        if arguments.get("refresh"):
+            await asyncio.wait_for(inventory.refresh(), timeout)
+        elif not await inventory.ready(timeout):
+            raise RuntimeError(inventory.error or f"discovery took longer than {timeout:g}s")
+    except asyncio.TimeoutError:
+        raise ToolFailed(
+            [TextContent(type="text", text=f"Error: discovery took longer than {timeout:g}s")]
+        )
+    except Exception as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: node inventory: {e}")])
+
+    # Selectors were resolved to addresses before the call; hostnames match too
+    wanted = set(split_nodes(arguments.get("nodes")))
+    records = [
+        record
+        for record in inventory.records.values()
+        if not wanted or record.ip in wanted or record.hostname in wanted
+    ]
+    mode = arguments.get("output", "table")
+    if mode == "table":
+        rows = [
+            [r.ip, r.hostname, r.role, r.version, "yes" if r.reachable else "no"] for r in records
+        ]
+        text = normalize.format_table(["IP", "HOSTNAME", "ROLE", "VERSION", "REACHABLE"], rows)
+    else:
+        text = normalize.dumps(normalize.structure(records, mode), mode)
+    return [TextContent(type="text", text=text)]
+
+
+async def cache_stats_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    stats = {**response_cache.stats(), "responses": response_processor.stats()}
+    return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+
+
+async def pool_stats_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    stats = {"transport": talos_client.transport, "endpoints": talos_client.pool_stats()}
+    return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+
+
+async def scheduler_stats_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    return [TextContent(type="text", text=json.dumps(talos_client.scheduler.stats(), indent=2))]
+
+
+async def mirror_stats_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    return [TextContent(type="text", text=json.dumps(talos_client.mirrors.stats(), indent=2))]
+
+
+async def breaker_stats_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    return [TextContent(type="text", text=json.dumps(talos_client.breakers.stats(), indent=2))]
+
+
+async def server_stats_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    if arguments.get("format") == "prometheus":
+        return [TextContent(type="text", text=call_metrics.render_prometheus())]
+    stats = call_metrics.snapshot(
+        tool=arguments.get("tool"),
+        by_node=arguments.get("by_node", False),
+        traces=max(0, int(arguments.get("traces", 0))),
+    )
+    stats["log_followers"] = log_followers.stats()
+    stats["inventories"] = talos_client.inventories.stats()
+    return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+
+
+async def batch_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    try:
+        calls, order = batch.plan(
+            arguments.get("operations"), {"context": arguments.get("context")}
+        )
+    except ValueError as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+    for call in calls:
+        if call.tool not in registry or call.tool == "talos_batch":
+            raise ToolFailed([TextContent(type="text", text=f"Error: cannot batch {call.tool}")])
+
+    async def execute(call: batch.BatchCall) -> tuple[str, str]:
+        spec = registry.get(call.tool)
+        call_arguments = dict(call.arguments)
+        # The batch's deadline, given or default, caps every operation
+        call_arguments["timeout"] = min(spec.deadline(call_arguments), timeout)
+        contents, status = await execute_tool(spec, call_arguments)
+        return "".join(content.text for content in contents), status
+
+    start = time.perf_counter()
+    results = await batch.run_batch(calls, execute)
+    merged = batch.merge_batch(calls, results, order, (time.perf_counter() - start) * 1000)
+    with call_metrics.stage("serialize", operations=len(order)):
+        contents = [TextContent(type="text", text=json.dumps(merged, separators=(",", ":")))]
+    if merged["summary"]["failed"]:
+        raise ToolFailed(contents)
+    return contents
+
+
+async def logs_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    try:
+        log_filter = LogFilter.from_arguments(arguments)
+    except ValueError as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+
+    if arguments.get("follow") or arguments.get("cursor") or arguments.get("stop"):
+        return await follow_logs(arguments, log_filter, timeout)
+
+    result = await talos_client.call(
+        "logs",
+        _logs_command(arguments),
+        timeout=timeout,
+        priority="stream",
+        context=arguments.get("context"),
+        **_logs_params(arguments),
+    )
+    if log_filter.active and result.get("success"):
+        lines = log_filter.apply(result["stdout"].splitlines())
+        result = {**result, "stdout": "".join(f"{line}\n" for line in lines)}
+    return result_content(result)
+
+
+async def follow_logs(
+    arguments: dict[str, Any], log_filter: LogFilter, timeout: float
+) -> list[TextContent]:
+    """Poll, start or stop the background follower for one node's service log"""
+    context = arguments.get("context")
+    nodes = talos_client.resolve_nodes(arguments.get("nodes"), context)
+    if len(nodes) != 1:
+        raise ToolFailed([TextContent(type="text", text="Error: follow takes exactly one node")])
+
+    service = arguments["service"]
+    kubernetes = bool(arguments.get("kubernetes", False))
+    key = (context or "", nodes[0], service, kubernetes)
+    if arguments.get("stop"):
+        stopped = await log_followers.stop(key)
+        return [TextContent(type="text", text=json.dumps({"stopped": stopped}))]
+
+    follower = await log_followers.get(
+        key,
+        talos_client.log_source(service, nodes[0], kubernetes, context=context),
+        tail=int(arguments.get("tail", 100)),
+    )
+    wait = float(arguments.get("wait") or 0)
+    if not arguments.get("cursor"):
+        # Give a new stream a moment to deliver its history
+        wait = max(wait, FOLLOW_START_WAIT)
+    limit = min(max(1, int(arguments.get("limit") or MAX_POLL_LINES)), MAX_POLL_LINES)
+
+    response = await follower.read(
+        arguments.get("cursor"), log_filter, limit=limit, wait=min(wait, timeout)
+    )
+    contents = [TextContent(type="text", text=json.dumps(response, separators=(",", ":")))]
+    if response.get("error") and not response["following"] and not response["lines"]:
+        raise ToolFailed(contents)
+    return contents
+
+
+async def merged_logs_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    try:
+        log_filter = LogFilter.from_arguments(arguments)
+    except ValueError as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+    context = arguments.get("context")
+    nodes = talos_client.resolve_nodes(arguments.get("nodes"), context)
+    if not nodes:
+        raise ToolFailed([TextContent(type="text", text="Error: no nodes to read logs from")])
+
+    service = arguments["service"]
+    kubernetes = bool(arguments.get("kubernetes", False))
+    limit = min(max(1, int(arguments.get("limit") or DEFAULT_LINE_BUDGET)), MAX_LINE_BUDGET)
+    tail = int(arguments.get("tail") or limit)
+    merge = LogMerge(
+        {
+            node: talos_client.log_source(service, node, kubernetes, follow=False, context=context)(
+                tail
+            )
+            for node in nodes
+        },
+        limit=limit,
+        log_filter=log_filter,
+    )
+
+    async def scheduled():
+        # One slot across all nodes: every stream must be open for the merge to advance
+        async with talos_client.scheduler.slot("stream", nodes):
+            await merge.run()
+
+    try:
+        await asyncio.wait_for(scheduled(), timeout)
+    except asyncio.TimeoutError:
+        return result_content(
+            timeout_result(
+                f"merged logs timed out after {timeout:g}s", timeout, stdout=merge.render()
+            )
+        )
+
+    summary = TextContent(type="text", text=json.dumps(merge.summary(), separators=(",", ":")))
+    if len(merge.errors) == len(nodes):
+        raise ToolFailed([summary])
+    return [summary] + [
+        TextContent(type="text", text=chunk) for chunk in chunk_text(merge.render())
+    ]
+
+
+async def dashboard_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    nodes = talos_client.resolve_nodes(arguments.get("nodes"), arguments.get("context"))
+    if not nodes:
+        raise ToolFailed([TextContent(type="text", text="Error: no nodes to sample")])
+
+    start = time.perf_counter()
+    try:
+        results = await asyncio.wait_for(
+            dashboard.snapshot(
+                talos_client,
+                nodes,
+                interval=float(arguments.get("interval", 2.0)),
+                top=int(arguments.get("top", 5)),
+                timeout=timeout,
+                on_result=report_node_progress,
+                context=arguments.get("context"),
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        return result_content(
+            timeout_result(f"dashboard snapshot timed out after {timeout:g}s", timeout)
+        )
+
+    if arguments.get("output") == "table":
+        table = normalize.format_table(dashboard.TABLE_HEADERS, dashboard.table_rows(results))
+        contents = [TextContent(type="text", text=table)]
+    else:
+        merged = merge_results(results, (time.perf_counter() - start) * 1000)
+        contents = [TextContent(type="text", text=json.dumps(merged, separators=(",", ":")))]
+    if any(r.status != "ok" for r in results):
+        raise ToolFailed(contents)
+    return contents
+
+
+async def diff_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    if open_store() is None:
+        raise ToolFailed(
+            [TextContent(type="text", text="Error: snapshots are off (TALOS_MCP_SNAPSHOT_DB)")]
+        )
+    try:
+        if arguments.get("to") is not None:
+            diffs = [await asyncio.to_thread(stored_diff, arguments.get("from"), arguments["to"])]
+        else:
+            diffs = await asyncio.wait_for(diff_with_now(arguments, timeout), timeout)
+    except asyncio.TimeoutError:
+        return result_content(timeout_result(f"diff timed out after {timeout:g}s", timeout))
+    except (TypeError, ValueError) as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+
+    contents = [TextContent(type="text", text=json.dumps({"diffs": diffs}, separators=(",", ":")))]
+    if all("error" in diff for diff in diffs):
+        raise ToolFailed(contents)
+    return contents
+
+
+def stored_diff(from_id: Optional[int], to_id: int, new: Optional[Snapshot] = None) -> dict:
+    """
+    Diff two stored snapshots (runs in a worker thread)
+
+    Args:
+        from_id: Earlier snapshot, or None for the one before the later snapshot
+        to_id: Later snapshot
+        new: The later snapshot, if already loaded
+
+    Raises:
+        ValueError: If a snapshot does not exist or the two are of different kinds
+    """
+    store = open_store()
+    new = new or store.get(int(to_id))
+    if new is None:
+        raise ValueError(f"no snapshot {to_id}")
+    if from_id is None:
+        return store.diff(store.previous(new), new)
+    old = store.get(int(from_id))
+    if old is None:
+        raise ValueError(f"no snapshot {from_id}")
+    if old.kind != new.kind:
+        raise ValueError(f"snapshot {old.id} is of {old.kind}, not {new.kind}")
+    return store.diff(old, new)
+
+
+async def diff_with_now(arguments: dict[str, Any], timeout: float) -> list[dict[str, Any]]:
+    """Snapshot the current state of every node and diff it with an earlier snapshot"""
+    kind = arguments.get("kind")
+    if kind not in SNAPSHOT_TOOLS:
+        raise ValueError(f"kind must be one of {', '.join(SNAPSHOT_TOOLS)}")
+    if kind == "resources" and not arguments.get("resource"):
+        raise ValueError("kind resources needs a resource type")
+
+    spec = registry.get(SNAPSHOT_TOOLS[kind])
+    context = arguments.get("context")
+    call_arguments = {"resource": arguments.get("resource"), "context": context, "output": "json"}
+    nodes = talos_client.resolve_nodes(arguments.get("nodes"), context) or [None]
+    results = await asyncio.gather(
+        *(run_spec(spec, call_arguments, timeout, node) for node in nodes)
+    )
+
+    diffs = []
+    for node, result in zip(nodes, results):
+        if not result.get("success"):
+            error = result.get("stderr", "").strip() or "failed"
+            diffs.append({"node": node, "error": error})
+            continue
+        if not result.get("snapshots"):
+            diffs.append({"node": node, "error": "the snapshot could not be recorded"})
+        for snapshot in result.get("snapshots", []):
+            diffs.append(
+                await asyncio.to_thread(stored_diff, arguments.get("from"), snapshot.id, snapshot)
+            )
+    return diffs
+
+
+async def snapshots_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    store = open_store()
+    if store is None:
+        raise ToolFailed(
+            [TextContent(type="text", text="Error: snapshots are off (TALOS_MCP_SNAPSHOT_DB)")]
+        )
+    snapshots = await asyncio.to_thread(
+        store.recent,
+        context=arguments.get("context"),
+        node=arguments.get("node"),
+        kind=arguments.get("kind"),
+        limit=min(max(1, int(arguments.get("limit") or 20)), 500),
+    )
+    listing = [snapshot.as_dict() for snapshot in snapshots]
+    return [TextContent(type="text", text=json.dumps(listing, separators=(",", ":")))]
+
+
+async def read_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    try:
+        read = ReadRange.from_arguments(arguments)
+    except (TypeError, ValueError) as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+    if read is None:
+        return await run_command(registry.get("talos_read"), arguments, timeout)
+
+    context = arguments.get("context")
+    nodes = talos_client.resolve_nodes(arguments.get("nodes"), context)
+    if len(nodes) != 1:
+        raise ToolFailed([TextContent(type="text", text="Error: ranged reads take one node")])
+
+    path = arguments["path"]
+
+    async def scheduled():
+        async with talos_client.scheduler.slot("stream", nodes):
+            return await read_range(talos_client.read_source(path, nodes[0], context), read)
+
+    try:
+        result = await asyncio.wait_for(scheduled(), timeout)
+    except asyncio.TimeoutError:
+        return result_content(timeout_result(f"read timed out after {timeout:g}s", timeout))
+    except RuntimeError as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+
+    text = result.pop("text")
+    meta = {"path": path, "node": nodes[0], **result}
+    return [TextContent(type="text", text=json.dumps(meta, separators=(",", ":")))] + [
+        TextContent(type="text", text=chunk) for chunk in chunk_text(text)
+    ]
+
+
+async def list_tool(arguments: dict[str, Any], timeout: float) -> list[TextContent]:
+    try:
+        page = ListPage.from_arguments(arguments)
+    except (TypeError, ValueError) as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+    if page is None:
+        return await run_command(registry.get("talos_list"), arguments, timeout)
+
+    context = arguments.get("context")
+    nodes = talos_client.resolve_nodes(arguments.get("nodes"), context)
+    if len(nodes) != 1:
+        raise ToolFailed([TextContent(type="text", text="Error: paginated listings take one node")])
+
+    path = arguments.get("path") or "/"
+    depth = int(arguments.get("depth") or 1)
+
+    async def scheduled():
+        async with talos_client.scheduler.slot("stream", nodes):
+            return await list_page(talos_client.list_source(path, nodes[0], depth, context), page)
+
+    try:
+        result = await asyncio.wait_for(scheduled(), timeout)
+    except asyncio.TimeoutError:
+        return result_content(timeout_result(f"listing timed out after {timeout:g}s", timeout))
+    except RuntimeError as e:
+        raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+
+    response = {"path": path, "node": nodes[0], **result}
+    return [TextContent(type="text", text=json.dumps(response, separators=(",", ":")))]
+
+
+registry = ToolRegistry(
+    (
+        ToolSpec(
             name="talos_get_version",
             description="Get Talos Linux version information from nodes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    }
-                },
-            },
+            properties={"nodes": NODES_ARGUMENT},
+            command=_version_command,
+            operation="version",
+            params=_nodes_params,
+            per_node=True,
+            cache_ttl=30.0,
+            timeout=30.0,
         ),
-        Tool(
+        ToolSpec(
             name="talos_get_disks",
             description="List all disks on Talos nodes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames",
-                    },
-                    "insecure": {
-                        "type": "boolean",
-                        "description": "Use insecure connection (for initial setup)",
-                        "default": False,
-                    },
+            properties={
+                "nodes": REQUIRED_NODES_ARGUMENT,
+                "insecure": {
+                    "type": "boolean",
+                    "description": "Use insecure connection (for initial setup)",
+                    "default": False,
                 },
-                "required": ["nodes"],
             },
+            required=("nodes",),
+            command=_disks_command,
+            operation="get",
+            params=_disks_params,
+            per_node=True,
+            parser=normalize.disks_from_documents,
         ),
-        Tool(
+        ToolSpec(
             name="talos_get_services",
             description="Get status of all services running on Talos nodes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    }
-                },
-            },
+            properties={"nodes": NODES_ARGUMENT},
+            command=_services_command,
+            operation="services",
+            params=_nodes_params,
+            per_node=True,
+            parser=normalize.services_from_table,
+            snapshot=_services_snapshot,
         ),
-        Tool(
+        ToolSpec(
             name="talos_get_resources",
             description="Get Talos resources (similar to kubectl get). Use 'rd' to list all resource definitions.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "resource": {
-                        "type": "string",
-                        "description": "Resource type to get (e.g., 'members', 'services', 'rd', 'machineconfig')",
-                    },
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    },
-                    "output": {
-                        "type": "string",
-                        "description": "Output format: table, json, yaml",
-                        "default": "table",
-                    },
+            properties={
+                "resource": {
+                    "type": "string",
+                    "description": "Resource type to get (e.g., 'members', 'services', 'rd', 'machineconfig')",
+                },
+                "nodes": NODES_ARGUMENT,
+                "output": {
+                    "type": "string",
+                    "description": (
+                        "Output format: table, yaml, json (parsed records) or "
+                        "compact (parsed records as columns and rows)"
+                    ),
+                    "enum": ["table", "yaml", "json", "compact"],
+                    "default": "table",
+                },
+                "labels": {
+                    "type": "string",
+                    "description": (
+                        "Label selector, as with kubectl -l: 'k=v', 'k!=v', 'k in (a,b)', "
+                        "'k', '!k', comma-separated"
+                    ),
+                },
+                "fields": {
+                    "type": "string",
+                    "description": (
+                        "Field selector on dotted paths into the resource, e.g. "
+                        "'metadata.phase=running,spec.readonly=false'"
+                    ),
                 },
-                "required": ["resource"],
             },
+            required=("resource",),
+            command=_resources_command,
+            operation="get",
+            params=_resources_params,
+            parser=normalize.resources_from_documents,
+            snapshot=_resources_snapshot,
+            cache_ttl=_resources_ttl,
         ),
-        Tool(
+        ToolSpec(
             name="talos_logs",
-            description="Get logs from Talos services or containers",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames",
-                    },
-                    "service": {
-                        "type": "string",
-                        "description": "Service name to get logs from (e.g., 'kubelet', 'etcd')",
-                    },
-                    "kubernetes": {
-                        "type": "boolean",
-                        "description": "Get logs from kubernetes namespace instead of system",
-                        "default": False,
-                    },
-                    "tail": {
-                        "type": "integer",
-                        "description": "Number of lines to show from the end",
-                        "default": 100,
-                    },
+            description=(
+                "Get logs from Talos services or containers. With follow, keeps a "
+                "background stream and returns only the lines written since the cursor "
+                "of the previous call"
+            ),
+            properties={
+                "nodes": REQUIRED_NODES_ARGUMENT,
+                "service": {
+                    "type": "string",
+                    "description": "Service name to get logs from (e.g., 'kubelet', 'etcd')",
+                },
+                "kubernetes": {
+                    "type": "boolean",
+                    "description": "Get logs from kubernetes namespace instead of system",
+                    "default": False,
+                },
+                "tail": {
+                    "type": "integer",
+                    "description": (
+                        "Number of lines to show from the end (in follow mode, the history "
+                        "loaded when the stream starts)"
+                    ),
+                    "default": 100,
                 },
-                "required": ["nodes", "service"],
+                "follow": {
+                    "type": "boolean",
+                    "description": (
+                        "Follow the log of a single node; the response is JSON with the new "
+                        "lines and a cursor to pass to the next call"
+                    ),
+                    "default": False,
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Cursor from the previous follow response (implies follow)",
+                },
+                "wait": {
+                    "type": "number",
+                    "description": "Seconds to wait for new matching lines in follow mode",
+                    "default": 0,
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum lines to return per follow call",
+                    "default": MAX_POLL_LINES,
+                },
+                "stop": {
+                    "type": "boolean",
+                    "description": "Stop following this log and free its buffer",
+                    "default": False,
+                },
+                **LOG_FILTER_ARGUMENTS,
+            },
+            required=("nodes", "service"),
+            handler=logs_tool,
+            concurrency="stream",
+        ),
+        ToolSpec(
+            name="talos_logs_merged",
+            description=(
+                "Get one service's logs from several nodes merged into a single "
+                "timeline, newest lines last, each prefixed with its node"
+            ),
+            properties={
+                "nodes": NODES_ARGUMENT,
+                "service": {
+                    "type": "string",
+                    "description": "Service name to get logs from (e.g., 'kubelet', 'etcd')",
+                },
+                "kubernetes": {
+                    "type": "boolean",
+                    "description": "Get logs from kubernetes namespace instead of system",
+                    "default": False,
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Total lines to return across all nodes (the newest are kept)",
+                    "default": DEFAULT_LINE_BUDGET,
+                },
+                "tail": {
+                    "type": "integer",
+                    "description": "Lines to read from the end of each node's log (defaults to limit)",
+                },
+                **LOG_FILTER_ARGUMENTS,
             },
+            required=("service",),
+            handler=merged_logs_tool,
+            concurrency="stream",
         ),
-        Tool(
+        ToolSpec(
             name="talos_dashboard",
-            description="Get a snapshot of the Talos dashboard (resource usage, system info)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    }
+            description=(
+                "Get a snapshot of node resource usage: CPU, memory, load, disk and "
+                "network rates, and the busiest processes"
+            ),
+            properties={
+                "nodes": NODES_ARGUMENT,
+                "interval": {
+                    "type": "number",
+                    "description": "Seconds between the two samples rates are computed from",
+                    "default": 2,
+                },
+                "top": {
+                    "type": "integer",
+                    "description": "Number of processes to report per node, by CPU usage",
+                    "default": 5,
+                },
+                "output": {
+                    "type": "string",
+                    "description": "Output format (json, table)",
+                    "enum": ["json", "table"],
+                    "default": "json",
                 },
             },
+            handler=dashboard_tool,
+            timeout=15.0,
+            concurrency="heavy",
         ),
-        Tool(
+        ToolSpec(
             name="talos_health",
             description="Check health status of Talos cluster",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    },
-                    "control_plane": {
-                        "type": "boolean",
-                        "description": "Check control plane specific health",
-                        "default": True,
-                    },
+            properties={
+                "nodes": NODES_ARGUMENT,
+                "control_plane": {
+                    "type": "boolean",
+                    "description": "Check control plane specific health",
+                    "default": True,
                 },
             },
+            command=_health_command,
+            per_node=True,
+            timeout=600.0,
+            concurrency="heavy",
         ),
-        Tool(
+        ToolSpec(
             name="talos_list",
             description="List files and directories on Talos nodes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames",
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "Path to list (e.g., /var/log, /dev)",
-                        "default": "/",
-                    },
-                    "depth": {
-                        "type": "integer",
-                        "description": "Directory depth to traverse",
-                        "default": 1,
-                    },
+            properties={
+                "nodes": REQUIRED_NODES_ARGUMENT,
+                "path": {
+                    "type": "string",
+                    "description": "Path to list (e.g., /var/log, /dev)",
+                    "default": "/",
+                },
+                "depth": {
+                    "type": "integer",
+                    "description": "Directory depth to traverse",
+                    "default": 1,
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": (
+                        "Entries per page; setting any paging argument returns a JSON page "
+                        f"with a cursor instead of the table (default {DEFAULT_PAGE_SIZE}, "
+                        f"max {MAX_PAGE_SIZE}, one node)"
+                    ),
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Cursor from the previous page, to fetch the next one",
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": (
+                        "Glob filter on entry names (e.g., *.log); patterns with a slash "
+                        "match the path relative to the listed directory"
+                    ),
+                },
+                "sort": {
+                    "type": "string",
+                    "enum": list(SORT_KEYS),
+                    "description": (
+                        "Page order; none streams entries as they come and stops early, "
+                        "the others read the whole listing but keep only one page"
+                    ),
+                    "default": "none",
+                },
+                "reverse": {
+                    "type": "boolean",
+                    "description": "Sort descending (e.g., largest or newest first)",
+                    "default": False,
                 },
-                "required": ["nodes"],
             },
+            required=("nodes",),
+            command=_list_command,
+            operation="list_files",
+            params=_list_params,
+            handler=list_tool,
+            concurrency="stream",
         ),
-        Tool(
+        ToolSpec(
             name="talos_read",
             description="Read a file from Talos nodes",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames",
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "Path to file to read",
-                    },
+            properties={
+                "nodes": REQUIRED_NODES_ARGUMENT,
+                "path": {
+                    "type": "string",
+                    "description": "Path to file to read",
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": (
+                        "First byte to return; with length, head or tail the result starts "
+                        "with a JSON summary including next_offset (one node)"
+                    ),
+                },
+                "length": {
+                    "type": "integer",
+                    "description": "Bytes to return from offset",
+                },
+                "head": {
+                    "type": "integer",
+                    "description": "Return only the first N lines",
+                },
+                "tail": {
+                    "type": "integer",
+                    "description": "Return only the last N lines (reads the whole file)",
                 },
-                "required": ["nodes", "path"],
             },
+            required=("nodes", "path"),
+            command=_read_command,
+            operation="read",
+            params=_read_params,
+            handler=read_tool,
+            concurrency="stream",
         ),
-        Tool(
+        ToolSpec(
             name="talos_etcd_members",
             description="List etcd cluster members",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    }
-                },
-            },
+            properties={"nodes": NODES_ARGUMENT},
+            command=_etcd_members_command,
+            operation="etcd_members",
+            params=_nodes_params,
+            parser=normalize.members_from_table,
+            snapshot=_etcd_members_snapshot,
+            cache_ttl=10.0,
+            timeout=30.0,
         ),
-        Tool(
+        ToolSpec(
             name="talos_get_kubeconfig",
             description="Retrieve kubeconfig for the Kubernetes cluster",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "nodes": {
-                        "type": "string",
-                        "description": "Comma-separated list of node IPs/hostnames (optional)",
-                    },
-                    "force": {
-                        "type": "boolean",
-                        "description": "Force overwrite of existing kubeconfig",
-                        "default": False,
+            properties={
+                "nodes": NODES_ARGUMENT,
+                "force": {
+                    "type": "boolean",
+                    "description": "Force overwrite of existing kubeconfig",
+                    "default": False,
+                },
+            },
+            command=_kubeconfig_command,
+            concurrency="heavy",
+            invalidates_cache=True,
+        ),
+        ToolSpec(
+            name="talos_batch",
+            description=(
+                "Run several Talos tools in one request. Identical operations run once, "
+                "the rest run concurrently, and one combined result lists each "
+                "operation's status, latency and output"
+            ),
+            handler=batch_tool,
+            properties={
+                "operations": {
+                    "type": "array",
+                    "description": f"Tool calls to run (at most {batch.MAX_BATCH_OPERATIONS})",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {
+                                "type": "string",
+                                "description": "Name of the operation in the result (default: its index)",
+                            },
+                            "tool": {
+                                "type": "string",
+                                "description": "Tool name, e.g. talos_get_version",
+                            },
+                            "arguments": {
+                                "type": "object",
+                                "description": "The tool's arguments",
+                            },
+                        },
+                        "required": ["tool"],
                     },
                 },
             },
+            required=("operations",),
+        ),
+        ToolSpec(
+            name="talos_diff",
+            description=(
+                "Show what changed in services, etcd members or a resource type: the "
+                "records added, removed and changed since the last snapshot (or between "
+                "two snapshots). Each call without 'to' snapshots the current state, so "
+                "the first call per node only records a baseline"
+            ),
+            properties={
+                "kind": {
+                    "type": "string",
+                    "description": "What to compare (not needed with 'to')",
+                    "enum": ["services", "etcd_members", "resources"],
+                },
+                "resource": {
+                    "type": "string",
+                    "description": "Resource type for kind resources (e.g., 'members', 'machineconfig')",
+                },
+                "nodes": NODES_ARGUMENT,
+                "from": {
+                    "type": "integer",
+                    "description": "Snapshot to compare against (default: the previous one)",
+                },
+                "to": {
+                    "type": "integer",
+                    "description": "Stored snapshot to compare instead of the current state",
+                },
+            },
+            handler=diff_tool,
+        ),
+        ToolSpec(
+            name="talos_snapshots",
+            description="List recorded snapshots of cluster state, newest first, for talos_diff",
+            properties={
+                "kind": {
+                    "type": "string",
+                    "description": "Only this kind (services, etcd_members, resources:<type>)",
+                },
+                "node": {
+                    "type": "string",
+                    "description": "Only snapshots of this node",
+                },
+                "context": CONTEXT_ARGUMENT,
+                "limit": {
+                    "type": "integer",
+                    "description": "Snapshots to list",
+                    "default": 20,
+                },
+            },
+            handler=snapshots_tool,
+            concurrency="local",
         ),
-        Tool(
+        ToolSpec(
             name="talos_config_info",
-            description="Get information about current Talos configuration and context",
-            inputSchema={
-                "type": "object",
-                "properties": {},
+            description=(
+                "Get information about the current Talos context (or the one named by "
+                "context) and the contexts available"
+            ),
+            properties={"context": CONTEXT_ARGUMENT},
+            handler=config_info_tool,
+            cache_ttl=5.0,
+            concurrency="local",
+        ),
+        ToolSpec(
+            name="talos_inventory",
+            description=(
+                "List the cluster's nodes with their IP, hostname, role and Talos version, "
+                "from an index kept current in the background. The nodes argument of the "
+                "other tools takes the same selectors: all, role=controlplane, role=worker, "
+                "hostname=..., version=..."
+            ),
+            properties={
+                "nodes": {
+                    "type": "string",
+                    "description": "Only these nodes: addresses, hostnames or a selector (optional)",
+                },
+                "refresh": {
+                    "type": "boolean",
+                    "description": "Discover the nodes again before answering",
+                    "default": False,
+                },
+                "output": OUTPUT_ARGUMENT,
             },
+            handler=inventory_tool,
         ),
-    ]
+        ToolSpec(
+            name="talos_cache_stats",
+            description="Get response cache statistics (hits, misses, evictions, size)",
+            handler=cache_stats_tool,
+            concurrency="local",
+        ),
+        ToolSpec(
+            name="talos_pool_stats",
+            description="Get per-endpoint gRPC connection pool statistics (channels, streams, handshakes)",
+            handler=pool_stats_tool,
+            concurrency="local",
+        ),
+        ToolSpec(
+            name="talos_scheduler_stats",
+            description="Get scheduler statistics (in-flight and queued operations, wait times per class and node)",
+            handler=scheduler_stats_tool,
+            concurrency="local",
+        ),
+        ToolSpec(
+            name="talos_mirror_stats",
+            description="Get resource mirror statistics (state, items, watch events, resyncs, reconnects and hits per mirrored type and node)",
+            handler=mirror_stats_tool,
+            concurrency="local",
+        ),
+        ToolSpec(
+            name="talos_breaker_stats",
+            description="Get circuit breaker state per endpoint and node (failures, time until retry, last error) and retry and failover counts",
+            handler=breaker_stats_tool,
+            concurrency="local",
+        ),
+        ToolSpec(
+            name="talos_server_stats",
+            description="Get per-tool latency histograms (queue, spawn, connect, execute, parse, serialize, postprocess), error, timeout and cache counters, recent call traces, open log streams and node inventories",
+            handler=server_stats_tool,
+            concurrency="local",
+            properties={
+                "tool": {
+                    "type": "string",
+                    "description": "Only report this tool",
+                },
+                "by_node": {
+                    "type": "boolean",
+                    "description": "Break each stage down per node",
+                    "default": False,
+                },
+                "traces": {
+                    "type": "integer",
+                    "description": "Number of most recent call traces to include",
+                    "default": 0,
+                },
+                "format": {
+                    "type": "string",
+                    "enum": ["json", "prometheus"],
+                    "description": "json (default) or Prometheus text exposition format",
+                    "default": "json",
+                },
+            },
+        ),
+    )
+)
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List all available Talos tools"""
+    return list(registry.tools)
+
+
+async def report_node_progress(result: NodeResult, done: int, total: int):
+    """Send a progress notification for a finished node, if the client asked for progress"""
+    try:
+        ctx = app.request_context
+    except LookupError:
+        return
+    token = ctx.meta.progressToken if ctx.meta else None
+    if token is None:
+        return
+    await ctx.session.send_progress_notification(
+        token,
+        done,
+        total,
+        message=f"{result.node}: {result.status} in {result.latency_ms} ms",
+    )
+
+
+async def run_per_node(nodes: list[str], run) -> list[TextContent]:
+    """
+    Fan a tool out to each node concurrently and merge the per-node results
+
+    Args:
+        nodes: Nodes to target
+        run: Function taking a single node and returning an awaitable talosctl-style result
+
+    Returns:
+        One TextContent with the per-node status, latency and output as JSON
+    """
+    start = time.perf_counter()
+    results = await fan_out(nodes, run, on_result=report_node_progress)
+    merged = merge_results(results, (time.perf_counter() - start) * 1000)
+    with call_metrics.stage("serialize", nodes=len(nodes)):
+        contents = [TextContent(type="text", text=json.dumps(merged, indent=2))]
+    if merged["summary"]["failed"]:
+        raise ToolFailed(contents)
+    return contents
+
+
+async def normalized(
+    result: dict[str, Any], parser, mode: str, per_node: bool = False
+) -> dict[str, Any]:
+    """
+    Replace a successful result's raw output with parsed records
+
+    Args:
+        result: talosctl-style result
+        parser: Parser from talos_mcp.normalize for the command's output
+        mode: Output mode; anything but "json" and "compact" leaves the result untouched
+        per_node: Leave the records only in "data", for run_per_node
+
+    Returns:
+        The result with normalized output in stdout and the records in "data"
+    """
+    if mode not in ("json", "compact") or not result.get("success"):
+        return result
+    data = await normalize.convert_async(result["stdout"], parser, mode, encode=False)
+    if per_node:
+        return {**result, "stdout": "", "data": data}
+    with call_metrics.stage("serialize"):
+        return {**result, "stdout": normalize.dumps(data, mode), "data": data}
+
+
+class ToolFailed(Exception):
+    """Carries the response of a failed tool call so that it bypasses the cache"""
+
+    def __init__(self, contents: list[TextContent]):
+        super().__init__("tool call failed")
+        self.contents = contents
+
+
+def result_content(result: dict[str, Any]) -> list[TextContent]:
+    """
+    Turn a talosctl-style result into tool output
+
+    Large output is split into several TextContent items at line boundaries.
+
+    Raises:
+        ToolFailed: If the command failed, carrying stderr as the response, or a
+            structured timeout report with the partial output
+    """
+    if result.get("timed_out"):
+        trace = current_trace()
+        if trace is not None:
+            trace.status = "timeout"
+        report = {
+            "status": "timeout",
+            "timeout": result.get("timeout"),
+            "message": result.get("stderr", ""),
+            "partial_output": result.get("stdout", ""),
+        }
+        raise ToolFailed([TextContent(type="text", text=json.dumps(report, indent=2))])
+    if not result["success"]:
+        raise ToolFailed([TextContent(type="text", text=result.get("stderr", ""))])
+    return [TextContent(type="text", text=chunk) for chunk in chunk_text(result["stdout"])]
+
+
+# Scheduler name of each connected MCP session, for per-client fairness
+_client_names: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+_client_numbers = itertools.count(1)
+
+
+def client_name() -> str:
+    """Name of the MCP session making the current request: its client's name and a number"""
+    try:
+        session = app.request_context.session
+    except LookupError:
+        return ""
+    name = _client_names.get(session)
+    if name is None:
+        params = getattr(session, "client_params", None)
+        label = params.clientInfo.name if params is not None else "client"
+        name = _client_names[session] = f"{label}-{next(_client_numbers)}"
+    return name
 
 
 @app.call_tool()
-async def call_tool(name: str, arguments: Any) -> list[TextContent]:
+async def call_tool(name: str, arguments: Any) -> list[Content]:
     """Handle tool calls for Talos operations"""
+    spec = registry.get(name)
+    if spec is None:
+        return [TextContent(type="text", text=f"Unknown tool: {name}")]
+
+    arguments = dict(arguments or {})
+    # Taken out before the call so it never reaches cache or batch keys
+    mode = arguments.pop("response", None) or DEFAULT_RESPONSE_MODE
+    if mode not in RESPONSE_MODES:
+        return [
+            TextContent(
+                type="text",
+                text=f"Error: unknown response mode {mode!r}; use {', '.join(RESPONSE_MODES)}",
+            )
+        ]
 
+    token = current_client.set(client_name())
     try:
-        if name == "talos_config_info":
-            info = talos_client.get_context_info()
-            return [TextContent(type="text", text=json.dumps(info, indent=2))]
-
-        elif name == "talos_get_version":
-            args = ["version"]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+        contents, _ = await execute_tool(spec, arguments, mode)
+    finally:
+        current_client.reset(token)
+    return contents
 
-        elif name == "talos_get_disks":
-            args = ["get", "disks", "-n", arguments["nodes"]]
-            if arguments.get("insecure"):
-                args.append("--insecure")
 
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+async def process_response(
+    spec: ToolSpec, arguments: dict[str, Any], mode: str, contents: list[TextContent]
+) -> list[Content]:
+    """
+    Return a successful response in the requested response mode, counting the bytes saved
 
-        elif name == "talos_get_services":
-            args = ["services"]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
+    Args:
+        spec: The tool's registry entry
+        arguments: Tool arguments as the call ran them (context pinned, selectors resolved)
+        mode: Response mode, one of RESPONSE_MODES
+        contents: The full response
 
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+    Returns:
+        The contents to send
+    """
+    # Deltas are per client: another session's last response is not this one's base
+    key = (current_client.get(),) + response_cache.make_key(
+        arguments.get("context"), spec.name, arguments
+    )
+    size = response_size(contents)
+    with call_metrics.stage("postprocess", mode=mode, bytes=size):
+        processed, applied = await response_processor.process(
+            mode, key, f"talos://responses/{spec.name}", contents
+        )
+    call_metrics.count("response_bytes", value=size)
+    if applied != "full":
+        call_metrics.count(f"responses_{applied}")
+        call_metrics.count("response_bytes_saved", value=size - response_size(processed))
+    return processed
 
-        elif name == "talos_get_resources":
-            args = ["get", arguments["resource"]]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
-            if arguments.get("output"):
-                args.extend(["-o", arguments["output"]])
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
 
-        elif name == "talos_logs":
-            args = ["logs", arguments["service"], "-n", arguments["nodes"]]
-            if arguments.get("kubernetes"):
-                args.append("-k")
-            if arguments.get("tail"):
-                args.extend(["--tail", str(arguments["tail"])])
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+async def execute_tool(
+    spec: ToolSpec, arguments: dict[str, Any], response: Optional[str] = None
+) -> tuple[list[Content], str]:
+    """
+    Run one traced tool call, through the response cache when the tool is cached
 
-        elif name == "talos_dashboard":
-            args = ["dashboard"]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
-            # Use a short interval for a snapshot
-            args.extend(["--interval", "1s"])
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+    Args:
+        spec: The tool's registry entry
+        arguments: Tool arguments, including "cache"; updated in place
+        response: Response mode to return a successful response in, or None to
+            return it as the tool built it (batch operations)
 
-        elif name == "talos_health":
-            args = ["health"]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
-            if not arguments.get("control_plane", True):
-                args.append("--run-all")
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+    Returns:
+        The response contents and the call's status: "ok", "error" or "timeout"
+    """
+    use_cache = arguments.pop("cache", True)
 
-        elif name == "talos_list":
-            args = ["list", "-n", arguments["nodes"]]
-            if arguments.get("path"):
-                args.append(arguments["path"])
-            if arguments.get("depth"):
-                args.extend(["-d", str(arguments["depth"])])
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+    with call_metrics.trace(spec.name) as trace:
+        try:
+            # Cheap stat of talosconfig; only a changed file is parsed again
+            for changed in talos_client.reload_config():
+                response_cache.invalidate(changed)
+            # Pin the call to one context even if the file changes while it runs
+            context = talos_client.context_name(arguments.get("context"))
+            if context:
+                arguments["context"] = context
+            try:
+                timeout = spec.deadline(arguments)
+            except ValueError as e:
+                raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
+            if is_selector(arguments.get("nodes")):
+                # Resolved here so caching, batching and fan-out see addresses
+                try:
+                    arguments["nodes"] = await talos_client.select_nodes(
+                        arguments["nodes"], context, timeout
+                    )
+                except ValueError as e:
+                    raise ToolFailed([TextContent(type="text", text=f"Error: {e}")])
 
-        elif name == "talos_read":
-            args = ["read", arguments["path"], "-n", arguments["nodes"]]
+            if spec.invalidates_cache:
+                response_cache.invalidate(context)
 
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+            ttl = spec.ttl(arguments)
+            if ttl is None:
+                contents = await run_tool(spec, arguments)
+            elif not use_cache:
+                response_cache.bypasses += 1
+                call_metrics.count("cache_bypasses")
+                contents = await run_tool(spec, arguments)
+            else:
+                computed = False
 
-        elif name == "talos_etcd_members":
-            args = ["etcd", "members"]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
+                def compute():
+                    nonlocal computed
+                    computed = True
+                    return run_tool(spec, arguments)
 
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+                key = response_cache.make_key(context, spec.name, arguments)
+                contents = list(await response_cache.get_or_compute(key, ttl, compute))
+                call_metrics.count("cache_misses" if computed else "cache_hits")
 
-        elif name == "talos_get_kubeconfig":
-            args = ["kubeconfig"]
-            if arguments.get("nodes"):
-                args.extend(["-n", arguments["nodes"]])
-            if arguments.get("force"):
-                args.append("--force")
-
-            result = await talos_client.execute_talosctl(args)
-            return [
-                TextContent(
-                    type="text",
-                    text=result["stdout"] if result["success"] else result.get("stderr", ""),
-                )
-            ]
+            if response is not None and trace.status == "ok":
+                contents = await process_response(spec, arguments, response, contents)
 
-        else:
-            return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        except ToolFailed as e:
+            if trace.status == "ok":
+                trace.status = "error"
+            contents = e.contents
+        except Exception as e:
+            trace.status = "error"
+            logger.error(f"Error executing tool {spec.name}: {e}")
+            contents = [TextContent(type="text", text=f"Error: {str(e)}")]
 
-    except Exception as e:
-        logger.error(f"Error executing tool {name}: {e}")
-        return [TextContent(type="text", text=f"Error: {str(e)}")]
+    return contents, trace.status
+
+
+async def run_tool(spec: ToolSpec, arguments: dict[str, Any]) -> list[TextContent]:
+    """
+    Run a tool as its spec describes and build its response
+
+    Args:
+        spec: The tool's registry entry
+        arguments: Tool arguments, without "cache"
 
+    Returns:
+        The tool's response contents
+    """
+    timeout = spec.deadline(arguments)
+    if spec.handler is not None:
+        return await spec.handler(arguments, timeout)
+    return await run_command(spec, arguments, timeout)
 
-async def main():
-    """Run the MCP server"""
+
+async def run_command(
+    spec: ToolSpec, arguments: dict[str, Any], timeout: float
+) -> list[TextContent]:
+    """
+    Run a tool's command or transport operation, on each node when the tool fans out
+
+    Args:
+        spec: The tool's registry entry
+        arguments: Tool arguments, without "cache"
+        timeout: Seconds the call may take
+
+    Returns:
+        The tool's response contents
+    """
+    if spec.per_node:
+        nodes = talos_client.resolve_nodes(arguments.get("nodes"), arguments.get("context"))
+        if len(nodes) > 1:
+            return await run_per_node(
+                nodes, lambda node: run_spec(spec, arguments, timeout, node, per_node=True)
+            )
+
+    result = await run_spec(spec, arguments, timeout, arguments.get("nodes"))
+    return result_content(result)
+
+
+async def run_spec(
+    spec: ToolSpec,
+    arguments: dict[str, Any],
+    timeout: float,
+    nodes: Optional[str],
+    per_node: bool = False,
+) -> dict[str, Any]:
+    """
+    Run a tool's command or transport operation once and normalize its output
+
+    Parsed results of tools with a snapshot kind are recorded in the snapshot
+    store, and the new snapshots listed under "snapshots".
+
+    Args:
+        spec: The tool's registry entry
+        arguments: Tool arguments, without "cache"
+        timeout: Seconds the call may take
+        nodes: Nodes to target, overriding arguments["nodes"]
+        per_node: Leave parsed records in "data" for run_per_node
+
+    Returns:
+        talosctl-style result
+    """
+    call_arguments = {**arguments, "nodes": nodes}
+    args = spec.command(call_arguments)
+    params = spec.params(call_arguments) if spec.params else None
+    context = arguments.get("context")
+    if spec.operation and params is not None:
+        result = await talos_client.call(
+            spec.operation,
+            args,
+            timeout=timeout,
+            priority=spec.concurrency,
+            context=context,
+            **params,
+        )
+    else:
+        result = await talos_client.execute_talosctl(
+            args, timeout=timeout, priority=spec.concurrency, context=context
+        )
+    if spec.parser is None:
+        return result
+
+    result = await normalized(result, spec.parser, arguments.get("output", "table"), per_node)
+    kind = spec.snapshot(arguments) if spec.snapshot is not None else None
+    if kind is not None and open_store() is not None and "data" in result:
+        result["snapshots"] = await record_snapshots(kind, context, nodes, result["data"])
+    return result
+
+
+async def record_snapshots(
+    kind: str, context: Optional[str], nodes: Optional[str], data: Any
+) -> list[Snapshot]:
+    """
+    Record parsed records in the snapshot store, one snapshot per node
+
+    Failures are logged and do not fail the tool call.
+
+    Args:
+        kind: Snapshot kind of the records
+        context: talosconfig context of the call
+        nodes: Nodes the call targeted; names records that carry no node
+        data: Parsed output, in json or compact form
+
+    Returns:
+        The snapshots taken
+    """
+    by_node: dict[str, list[dict[str, Any]]] = {}
+    targets = split_nodes(nodes or "")
+    fallback = targets[0] if len(targets) == 1 else ""
+    for record in normalize.unstructure(data):
+        by_node.setdefault(record.get("node") or fallback, []).append(record)
+    if not by_node and fallback:
+        # An empty result is a state too: everything was removed
+        by_node[fallback] = []
+
+    # Only needed once there is something to record
+    import sqlite3
+
+    store = open_store()
+
+    def record_all() -> list[Snapshot]:
+        return [
+            store.record(context or "", node, kind, records) for node, records in by_node.items()
+        ]
+
+    try:
+        with call_metrics.stage("snapshot", records=sum(map(len, by_node.values()))):
+            return await asyncio.to_thread(record_all)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not record {kind} snapshot: {e}")
+        return []
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="MCP server for Talos Linux")
+    parser.add_argument(
+        "--http",
+        action="store_true",
+        default=os.environ.get("TALOS_MCP_SERVE", "stdio") == "http",
+        help="Serve MCP over streamable HTTP and SSE instead of stdio, for many clients",
+    )
+    parser.add_argument("--host", help="Address to listen on with --http (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Port to listen on with --http (default 8765)")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[list[str]] = None, stdio: Optional[tuple[Any, Any]] = None):
+    """
+    Run the MCP server
+
+    Args:
+        argv: Command line arguments, by default the process's own
+        stdio: stdin and stdout to serve instead of the process's, as the launcher hands over
+    """
+    args = parse_args(argv)
     logger.info("Starting Talos MCP Server")
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(read_stream, write_stream, app.create_initialization_options())
+    metrics_writer = None
+    if METRICS_FILE:
+        metrics_writer = asyncio.create_task(write_metrics_file(call_metrics, METRICS_FILE))
+    metrics_server = await serve_metrics(call_metrics, METRICS_PORT) if METRICS_PORT else None
+    # Followers are otherwise only reaped when another follow call comes in
+    follower_reaper = asyncio.create_task(log_followers.reap_periodically())
+    try:
+        if args.http:
+            # Only HTTP mode pays for importing the web stack
+            from talos_mcp import http_transport
+
+            await http_transport.serve(
+                app,
+                host=args.host or http_transport.HTTP_HOST,
+                port=args.port or http_transport.HTTP_PORT,
+            )
+        else:
+            async with stdio_server(*(stdio or ())) as (read_stream, write_stream):
+                await app.run(read_stream, write_stream, app.create_initialization_options())
+    finally:
+        if metrics_writer is not None:
+            metrics_writer.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        follower_reaper.cancel()
+        await log_followers.close()
+        await talos_client.mirrors.close()
+        await talos_client.inventories.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,384 @@
+"""
+On-disk snapshots of cluster state, and diffs between them
+
+Parsed records of services, etcd members and resources are stored in SQLite
+per (context, node, kind) series. Each record is stored once, compressed and
+addressed by the hash of its canonical JSON; a snapshot points to a manifest
+of (record key, record hash) pairs, which is itself addressed by a digest of
+its content, so an unchanged cluster adds one row per snapshot. Diffs join two
+manifests in SQL and load only the records whose hashes differ: their cost and
+size follow the size of the change, not of the cluster.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger("talos-mcp-server")
+
+_DEFAULT_DB = os.path.join(
+    os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state"),
+    "talos-mcp",
+    "snapshots.db",
+)
+
+# Snapshot database; "off" or an empty value disables snapshots
+SNAPSHOT_DB = os.environ.get("TALOS_MCP_SNAPSHOT_DB", _DEFAULT_DB)
+
+# Snapshots kept per (context, node, kind); older ones are pruned
+SNAPSHOT_KEEP = int(os.environ.get("TALOS_MCP_SNAPSHOT_KEEP", "100"))
+
+# Changed records returned in one diff, beyond which only counts are reported
+MAX_DIFF_RECORDS = int(os.environ.get("TALOS_MCP_MAX_DIFF_RECORDS", "200"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS manifest_items (
+    digest TEXT NOT NULL,
+    key TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (digest, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS manifest_items_hash ON manifest_items (hash);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    context TEXT NOT NULL,
+    node TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    taken_at REAL NOT NULL,
+    digest TEXT NOT NULL,
+    items INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_series ON snapshots (context, node, kind, id);
+"""
+
+
+@dataclass
+class Snapshot:
+    """One recorded state of a series"""
+
+    id: int
+    context: str
+    node: str
+    kind: str
+    taken_at: float
+    digest: str
+    items: int
+
+    def as_dict(self) -> dict[str, Any]:
+        """The snapshot as listed; the digest only matters inside the store"""
+        data = asdict(self)
+        del data["digest"]
+        data["taken_at"] = round(self.taken_at, 3)
+        return data
+
+    def ref(self) -> dict[str, Any]:
+        """Short reference used in diffs"""
+        return {"id": self.id, "taken_at": round(self.taken_at, 3)}
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def canonical(record: dict[str, Any]) -> bytes:
+    """Stable JSON encoding of a record, the input of its hash"""
+    return json.dumps(record, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def record_key(record: dict[str, Any]) -> str:
+    """Identity of a record within its snapshot: namespace/type/id for resources, else id"""
+    if "namespace" in record and "type" in record:
+        return f"{record['namespace']}/{record['type']}/{record['id']}"
+    return str(record.get("id", ""))
+
+
+def field_changes(before: Any, after: Any, path: str = "") -> dict[str, dict[str, Any]]:
+    """
+    Leaf-level differences between two records
+
+    Objects are compared key by key; anything else, lists included, is
+    compared whole.
+
+    Returns:
+        Dictionary mapping dotted paths to {"from": old, "to": new}
+    """
+    if isinstance(before, dict) and isinstance(after, dict):
+        changes = {}
+        for key in sorted(before.keys() | after.keys()):
+            sub = f"{path}.{key}" if path else str(key)
+            changes.update(field_changes(before.get(key), after.get(key), sub))
+        return changes
+    if before == after:
+        return {}
+    return {path: {"from": before, "to": after}}
+
+
+class SnapshotStore:
+    """SQLite store of snapshots, safe to call from worker threads"""
+
+    def __init__(self, path: str, keep: int = SNAPSHOT_KEEP):
+        """
+        Initialize the store; the database is opened on first use
+
+        Args:
+            path: Database file, created with its directory if missing
+            keep: Snapshots kept per series
+        """
+        self.path = path
+        self.keep = keep
+        self._db: Optional["sqlite3.Connection"] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self._db is None:
+            # Imported with the first snapshot, not at start-up
+            import sqlite3
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._db = db
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def record(self, context: str, node: str, kind: str, records: list[dict[str, Any]]) -> Snapshot:
+        """
+        Store a snapshot of a series
+
+        Records already stored (by any snapshot) are not written again, nor is
+        the manifest of a snapshot identical to an earlier one.
+
+        Args:
+            context: talosconfig context the records came from
+            node: Node the records describe
+            kind: What the records are (e.g. "services", "resources:disks")
+            records: Parsed records; their "node" field is not part of the content
+
+        Returns:
+            The new snapshot
+        """
+        items: dict[str, tuple[str, bytes]] = {}
+        for record in records:
+            content = {k: v for k, v in record.items() if k != "node"}
+            data = canonical(content)
+            items[record_key(content)] = (_digest(data), data)
+        manifest = canonical({key: value[0] for key, value in items.items()})
+        digest = _digest(manifest)
+        taken_at = time.time()
+
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                known = db.execute(
+                    "SELECT 1 FROM snapshots WHERE digest = ? LIMIT 1", (digest,)
+                ).fetchone()
+                if known is None:
+                    # Most records are unchanged since the series' last snapshot
+                    stored = {
+                        h
+                        for (h,) in db.execute(
+                            "SELECT hash FROM manifest_items WHERE digest = (SELECT digest "
+                            "FROM snapshots WHERE context = ? AND node = ? AND kind = ? "
+                            "ORDER BY id DESC LIMIT 1)",
+                            (context, node, kind),
+                        )
+                    }
+                    db.executemany(
+                        "INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)",
+                        ((h, zlib.compress(data)) for h, data in items.values() if h not in stored),
+                    )
+                    db.executemany(
+                        "INSERT OR IGNORE INTO manifest_items (digest, key, hash) VALUES (?, ?, ?)",
+                        ((digest, key, h) for key, (h, _) in items.items()),
+                    )
+                cursor = db.execute(
+                    "INSERT INTO snapshots (context, node, kind, taken_at, digest, items) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (context, node, kind, taken_at, digest, len(items)),
+                )
+                snapshot = Snapshot(
+                    cursor.lastrowid, context, node, kind, taken_at, digest, len(items)
+                )
+                self._prune(db, context, node, kind)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return snapshot
+
+    def _prune(self, db: "sqlite3.Connection", context: str, node: str, kind: str):
+        """Drop a series' oldest snapshots beyond keep, and what only they referenced"""
+        pruned = db.execute(
+            "DELETE FROM snapshots WHERE context = ? AND node = ? AND kind = ? AND id NOT IN "
+            "(SELECT id FROM snapshots WHERE context = ? AND node = ? AND kind = ? "
+            "ORDER BY id DESC LIMIT ?)",
+            (context, node, kind, context, node, kind, self.keep),
+        ).rowcount
+        if pruned:
+            db.execute(
+                "DELETE FROM manifest_items WHERE digest NOT IN (SELECT digest FROM snapshots)"
+            )
+            db.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM manifest_items)")
+
+    def get(self, snapshot_id: int) -> Optional[Snapshot]:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,))
+                .fetchone()
+            )
+        return Snapshot(*row) if row else None
+
+    def previous(self, snapshot: Snapshot) -> Optional[Snapshot]:
+        """The snapshot taken before this one in the same series"""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT * FROM snapshots WHERE context = ? AND node = ? AND kind = ? "
+                    "AND id < ? ORDER BY id DESC LIMIT 1",
+                    (snapshot.context, snapshot.node, snapshot.kind, snapshot.id),
+                )
+                .fetchone()
+            )
+        return Snapshot(*row) if row else None
+
+    def recent(
+        self,
+        context: Optional[str] = None,
+        node: Optional[str] = None,
+        kind: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[Snapshot]:
+        """Most recent snapshots first, optionally of one context, node or kind"""
+        where, params = [], []
+        for column, value in (("context", context), ("node", node), ("kind", kind)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        query = "SELECT * FROM snapshots"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._connect().execute(query, (*params, limit)).fetchall()
+        return [Snapshot(*row) for row in rows]
+
+    def _records(self, db: "sqlite3.Connection", hashes: set[str]) -> dict[str, Any]:
+        found = {}
+        hashes = list(hashes)
+        # Stay under SQLite's bound parameter limit
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i : i + 500]
+            marks = ",".join("?" * len(batch))
+            for h, data in db.execute(
+                f"SELECT hash, data FROM blobs WHERE hash IN ({marks})", batch
+            ):
+                found[h] = json.loads(zlib.decompress(data))
+        return found
+
+    def diff(
+        self, old: Optional[Snapshot], new: Snapshot, max_records: int = MAX_DIFF_RECORDS
+    ) -> dict[str, Any]:
+        """
+        Records added, removed and changed between two snapshots
+
+        Args:
+            old: Earlier snapshot, or None when new is the first of its series
+            new: Later snapshot
+            max_records: Most added and changed records returned; the counts
+                are always complete
+
+        Returns:
+            Dictionary with both snapshots, the keys of removed records, added
+            records, changed records with their changed fields, and counts
+        """
+        result: dict[str, Any] = {
+            "node": new.node,
+            "kind": new.kind,
+            "from": old.ref() if old else None,
+            "to": new.ref(),
+        }
+        if old is not None and old.node != new.node:
+            result["from_node"] = old.node
+        if old is None:
+            # Listing the whole series as added would cost as much as the cluster
+            result.update(baseline=True, counts={"records": new.items})
+            return result
+        if old.digest == new.digest:
+            result["counts"] = {"added": 0, "removed": 0, "changed": 0, "unchanged": new.items}
+            return result
+
+        with self._lock:
+            db = self._connect()
+            gone = db.execute(
+                "SELECT o.key, o.hash, n.hash FROM manifest_items o "
+                "LEFT JOIN manifest_items n ON n.digest = ? AND n.key = o.key "
+                "WHERE o.digest = ? AND (n.hash IS NULL OR n.hash != o.hash) ORDER BY o.key",
+                (new.digest, old.digest),
+            ).fetchall()
+            added = db.execute(
+                "SELECT n.key, n.hash FROM manifest_items n "
+                "LEFT JOIN manifest_items o ON o.digest = ? AND o.key = n.key "
+                "WHERE n.digest = ? AND o.key IS NULL ORDER BY n.key",
+                (old.digest, new.digest),
+            ).fetchall()
+            removed = [key for key, _, after in gone if after is None]
+            changed = [(key, before, after) for key, before, after in gone if after is not None]
+
+            shown_added = added[:max_records]
+            shown_changed = changed[: max(0, max_records - len(shown_added))]
+            wanted = {h for _, h in shown_added}
+            for _, before, after in shown_changed:
+                wanted.update((before, after))
+            records = self._records(db, wanted)
+
+        result["counts"] = {
+            "added": len(added),
+            "removed": len(removed),
+            "changed": len(changed),
+            "unchanged": new.items - len(added) - len(changed),
+        }
+        result["removed"] = removed
+        result["added"] = [{"key": key, "record": records.get(h)} for key, h in shown_added]
+        result["changed"] = [
+            {"key": key, "fields": field_changes(records.get(before), records.get(after))}
+            for key, before, after in shown_changed
+        ]
+        if len(shown_added) + len(shown_changed) < len(added) + len(changed):
+            result["truncated"] = True
+        return result
+
+
+_store: Optional[SnapshotStore] = None
+
+
+def open_store() -> Optional[SnapshotStore]:
+    """The store configured by TALOS_MCP_SNAPSHOT_DB, created on first use; None when off"""
+    global _store
+    if not SNAPSHOT_DB or SNAPSHOT_DB.lower() == "off":
+        return None
+    if _store is None:
+        _store = SnapshotStore(SNAPSHOT_DB, SNAPSHOT_KEEP)
+    return _store
@@ -0,0 +1,185 @@
+"""
+Bounded, incremental handling of command output
+
+Output is decoded as it arrives and only a head and a tail window are kept,
+so memory stays flat however large the remote file or log is.
+"""
+
+import asyncio
+import codecs
+import os
+from collections import deque
+
+# Default budget for a single command's stdout
+MAX_OUTPUT_BYTES = int(os.environ.get("TALOS_MCP_MAX_OUTPUT_BYTES", str(1024 * 1024)))
+MAX_OUTPUT_LINES = int(os.environ.get("TALOS_MCP_MAX_OUTPUT_LINES", "20000"))
+
+# stderr only ever carries diagnostics
+MAX_STDERR_BYTES = 64 * 1024
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Size of each TextContent item a large response is split into
+CONTENT_CHUNK_SIZE = 64 * 1024
+
+
+class BoundedOutput:
+    """Incrementally decoded text that keeps only its head and tail within a budget"""
+
+    def __init__(self, max_bytes: int = MAX_OUTPUT_BYTES, max_lines: int = MAX_OUTPUT_LINES):
+        """
+        Initialize the buffer
+
+        Args:
+            max_bytes: Bytes of UTF-8 output to keep, split between head and tail
+            max_lines: Number of lines to keep, split between head and tail
+        """
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self._head_bytes = max_bytes // 2
+        self._head_lines = max_lines // 2
+        self._tail_bytes = max_bytes - self._head_bytes
+        self._tail_lines = max_lines - self._head_lines
+
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+        self._head: list[str] = []
+        self._head_size = 0
+        self._head_full = False
+        self._tail: deque[str] = deque()
+        self._tail_size = 0
+
+        self.total_bytes = 0
+        self.total_lines = 0
+        self.dropped_lines = 0
+        self.dropped_bytes = 0
+
+    @property
+    def truncated(self) -> bool:
+        return self.dropped_lines > 0
+
+    def feed(self, data: bytes):
+        """Add a chunk of raw output"""
+        self.total_bytes += len(data)
+        text = self._partial + self._decoder.decode(data)
+        *lines, self._partial = text.split("\n")
+        for line in lines:
+            self._add_line(line + "\n")
+
+        # A single unterminated line must not grow without bound either
+        while len(self._partial.encode()) > self._tail_bytes:
+            # The longest prefix within the budget that ends on a character boundary
+            piece = self._partial.encode()[: self._tail_bytes].decode("utf-8", "ignore")
+            piece = piece or self._partial[0]
+            self._add_line(piece)
+            self._partial = self._partial[len(piece) :]
+
+    def finish(self):
+        """Flush any buffered partial line at end of stream"""
+        self._partial += self._decoder.decode(b"", final=True)
+        if self._partial:
+            self._add_line(self._partial)
+            self._partial = ""
+
+    def _add_line(self, line: str):
+        self.total_lines += 1
+        # Budgets count encoded bytes, like total_bytes, not decoded characters
+        size = len(line.encode())
+
+        if not self._head_full:
+            if self._head_size + size <= self._head_bytes and len(self._head) < self._head_lines:
+                self._head.append(line)
+                self._head_size += size
+                return
+            self._head_full = True
+
+        self._tail.append(line)
+        self._tail_size += size
+        while self._tail and (
+            self._tail_size > self._tail_bytes or len(self._tail) > self._tail_lines
+        ):
+            dropped = len(self._tail.popleft().encode())
+            self._tail_size -= dropped
+            self.dropped_lines += 1
+            self.dropped_bytes += dropped
+
+    def render(self) -> str:
+        """The kept output, with a marker where lines were dropped"""
+        head = "".join(self._head)
+        tail = "".join(self._tail)
+        if not self.truncated:
+            return head + tail + self._partial
+        if head and not head.endswith("\n"):
+            head += "\n"
+        marker = (
+            f"... [truncated {self.dropped_lines} lines, {self.dropped_bytes} bytes"
+            f" of {self.total_bytes}] ...\n"
+        )
+        return head + marker + tail + self._partial
+
+
+class LineDecoder:
+    """Incremental UTF-8 decoder that splits a byte stream into complete lines"""
+
+    def __init__(self, max_line: int = READ_CHUNK_SIZE):
+        """
+        Initialize the decoder
+
+        Args:
+            max_line: Characters after which an unterminated line is cut and emitted
+        """
+        self.max_line = max_line
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial = ""
+
+    def feed(self, data: bytes) -> list[str]:
+        """Add a chunk of raw output and return the lines it completed, without newlines"""
+        text = self._partial + self._decoder.decode(data)
+        *lines, self._partial = text.split("\n")
+        while len(self._partial) > self.max_line:
+            lines.append(self._partial[: self.max_line])
+            self._partial = self._partial[self.max_line :]
+        return [line.rstrip("\r") for line in lines]
+
+    def finish(self) -> list[str]:
+        """Flush the last, unterminated line at end of stream"""
+        rest = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        return [rest.rstrip("\r")] if rest else []
+
+
+async def read_stream(reader: asyncio.StreamReader, sink: BoundedOutput):
+    """Drain a subprocess pipe into a bounded buffer"""
+    while True:
+        chunk = await reader.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        sink.feed(chunk)
+    sink.finish()
+
+
+def chunk_text(text: str, chunk_size: int = CONTENT_CHUNK_SIZE) -> list[str]:
+    """
+    Split text into pieces of at most chunk_size characters, preferring line boundaries
+
+    Args:
+        text: Text to split
+        chunk_size: Maximum characters per piece
+
+    Returns:
+        List of pieces that concatenate back to text
+    """
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        chunks.append(text[start:end])
+        start = end
+    return chunks
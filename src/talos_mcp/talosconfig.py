@@ -0,0 +1,162 @@
+"""
+talosconfig loading with change detection
+
+The file is stat'ed before each tool call and only re-read when its mtime,
+size or inode changed, so rotated certificates and switched contexts are
+picked up without restarting the server. Parsed configs are memoized by
+content digest: a file that is rewritten with content seen before (switching
+back and forth between contexts) is never parsed twice.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+logger = logging.getLogger("talos-mcp-server")
+
+# Where talosctl looks for its config, unless told otherwise
+DEFAULT_CONFIG_PATH = os.environ.get("TALOSCONFIG") or os.path.expanduser("~/.talos/config")
+
+# Parsed configs kept for reuse, by content digest
+PARSED_CONFIG_CACHE_SIZE = 8
+
+
+class ContextError(ValueError):
+    """A tool call named a context that is not in talosconfig"""
+
+
+def context_fingerprint(context_data: dict[str, Any]) -> str:
+    """Digest of a context's endpoints, nodes and credentials, to tell when it changed"""
+    encoded = json.dumps(context_data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+class TalosConfigFile:
+    """A talosconfig file that is parsed again only when it changes on disk"""
+
+    def __init__(self, path: str = DEFAULT_CONFIG_PATH, cache_size: int = PARSED_CONFIG_CACHE_SIZE):
+        """
+        Initialize the loader; call refresh() to read the file
+
+        Args:
+            path: Path to the talosconfig file
+            cache_size: Parsed configs to keep, by content digest
+        """
+        self.path = path
+        self.cache_size = max(1, cache_size)
+        self.config: Optional[dict[str, Any]] = None
+        self.digest: Optional[str] = None
+        self._stat: Optional[tuple[int, int, int]] = None
+        self._parsed: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+        self.checks = 0
+        self.parses = 0
+        self.reloads = 0
+
+    def refresh(self) -> bool:
+        """
+        Pick up changes to the file
+
+        A file that cannot be parsed (for example one caught half-written)
+        leaves the previous config in place.
+
+        Returns:
+            Whether the config changed
+        """
+        self.checks += 1
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self._stat is not None or self.checks == 1:
+                logger.warning(f"Talos config not found at {self.path}")
+            changed = self.config is not None
+            self.config, self.digest, self._stat = None, None, None
+            return changed
+
+        stat_key = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stat_key == self._stat:
+            return False
+        self._stat = stat_key
+
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            logger.error(f"Error reading Talos config: {e}")
+            return False
+
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest == self.digest:
+            # Touched or rewritten with the same content
+            return False
+
+        config = self._parsed.get(digest)
+        if config is None:
+            import yaml
+
+            try:
+                config = yaml.safe_load(raw) or {}
+            except yaml.YAMLError as e:
+                logger.error(f"Error loading Talos config, keeping the previous one: {e}")
+                return False
+            if not isinstance(config, dict):
+                logger.error("Error loading Talos config: not a mapping, keeping the previous one")
+                return False
+            self.parses += 1
+            self._parsed[digest] = config
+            while len(self._parsed) > self.cache_size:
+                self._parsed.popitem(last=False)
+        self._parsed.move_to_end(digest)
+
+        if self.config is not None:
+            self.reloads += 1
+        self.config = config
+        self.digest = digest
+        logger.info(f"Loaded Talos config with context: {self.current_context}")
+        return True
+
+    @property
+    def current_context(self) -> Optional[str]:
+        """The context selected in the file"""
+        return (self.config or {}).get("context")
+
+    @property
+    def contexts(self) -> dict[str, dict[str, Any]]:
+        """All contexts by name"""
+        return (self.config or {}).get("contexts") or {}
+
+    def resolve(self, context: Optional[str] = None) -> Optional[str]:
+        """
+        Name of the context a call targets
+
+        Args:
+            context: Context asked for, or None for the file's current context
+
+        Returns:
+            The context name, or None if there is no config
+
+        Raises:
+            ContextError: If the context is not in the file
+        """
+        if not context:
+            return self.current_context
+        if context not in self.contexts:
+            available = ", ".join(sorted(self.contexts)) or "none"
+            raise ContextError(f"Unknown Talos context {context!r} (available: {available})")
+        return context
+
+    def context_data(self, context: Optional[str] = None) -> dict[str, Any]:
+        """Endpoints, nodes and credentials of a context (empty if it has none)"""
+        name = self.resolve(context)
+        return (self.contexts.get(name) or {}) if name else {}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "checks": self.checks,
+            "parses": self.parses,
+            "reloads": self.reloads,
+        }
@@ -0,0 +1,67 @@
+"""Shared fixtures: a TalosClient driving the fake talosctl in benchmarks/bin"""
+
+import os
+from pathlib import Path
+
+import pytest
+import yaml
+
+# Read when talos_mcp.server is imported: no snapshot database under the tests
+os.environ.setdefault("TALOS_MCP_SNAPSHOT_DB", "off")
+
+from talos_mcp import server  # noqa: E402
+from talos_mcp.server import TalosClient  # noqa: E402
+
+FAKE_BIN = Path(__file__).resolve().parent.parent / "benchmarks" / "bin"
+NODE = "10.5.0.2"
+
+
+def spawned(spawn_log: Path) -> list[int]:
+    """Pids of the fake talosctl processes started so far"""
+    if not spawn_log.exists():
+        return []
+    return [int(line) for line in spawn_log.read_text().split()]
+
+
+def alive(pid: int) -> bool:
+    """Whether a process exists and is not a zombie waiting to be reaped"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+@pytest.fixture
+def spawn_log(tmp_path: Path) -> Path:
+    return tmp_path / "spawns"
+
+
+@pytest.fixture
+def talosconfig(tmp_path: Path, spawn_log: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A one-node talosconfig, with the fake talosctl first on PATH"""
+    path = tmp_path / "talosconfig"
+    path.write_text(
+        yaml.safe_dump(
+            {"context": "test", "contexts": {"test": {"endpoints": [NODE], "nodes": [NODE]}}}
+        )
+    )
+    monkeypatch.setenv("PATH", f"{FAKE_BIN}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_TALOSCTL_DELAY", "0")
+    monkeypatch.setenv("FAKE_TALOSCTL_SPAWN_LOG", str(spawn_log))
+    return path
+
+
+@pytest.fixture
+def client(talosconfig: Path, monkeypatch: pytest.MonkeyPatch) -> TalosClient:
+    """A subprocess-transport client, installed as the server's, with an empty response cache"""
+    talos_client = TalosClient(config_path=str(talosconfig), transport="subprocess")
+    monkeypatch.setattr(server, "talos_client", talos_client)
+    monkeypatch.setattr(server, "response_cache", server.ResponseCache())
+    return talos_client
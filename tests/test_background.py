@@ -0,0 +1,93 @@
+"""Background tasks started from a tool call do not inherit the call's trace or client"""
+
+import asyncio
+
+from talos_mcp.inventory import Inventory, NodeRecord
+from talos_mcp.logtail import LogFollower
+from talos_mcp.metrics import Metrics, call_metrics, current_trace
+from talos_mcp.mirror import ResourceMirror
+from talos_mcp.scheduler import current_client
+
+
+async def test_inventory_refresh_is_not_part_of_starting_call():
+    seen = []
+
+    async def discover():
+        seen.append((current_trace(), current_client.get()))
+        with call_metrics.stage("discover"):
+            pass
+        return [NodeRecord("10.5.0.2")]
+
+    metrics = Metrics()
+    inventory = Inventory("test", discover, refresh_interval=0.01)
+    token = current_client.set("client-1")
+    try:
+        with metrics.trace("talos_inventory") as trace:
+            assert await inventory.ready(1.0)
+    finally:
+        current_client.reset(token)
+    while len(seen) < 3:
+        await asyncio.sleep(0.01)
+    await inventory.stop()
+
+    assert set(seen) == {(None, "")}
+    assert [span.name for span in trace.spans] == []
+
+
+async def test_mirror_resyncs_are_not_part_of_starting_call():
+    seen = []
+    doc = {"metadata": {"namespace": "network", "type": "Addresses", "id": "eth0"}}
+
+    async def watch():
+        seen.append((current_trace(), current_client.get()))
+        yield 1, doc
+        await asyncio.Event().wait()
+
+    async def snapshot():
+        seen.append((current_trace(), current_client.get()))
+        with call_metrics.stage("execute"):
+            pass
+        return [doc]
+
+    metrics = Metrics()
+    mirror = ResourceMirror(
+        ("test", "10.5.0.2", "addresses"), watch, snapshot, resync_interval=0.01
+    )
+    token = current_client.set("client-1")
+    try:
+        with metrics.trace("talos_get_resources") as trace:
+            mirror.start()
+            await asyncio.sleep(0)
+    finally:
+        current_client.reset(token)
+    while len(seen) < 4:
+        await asyncio.sleep(0.01)
+    await mirror.stop()
+
+    assert set(seen) == {(None, "")}
+    assert [span.name for span in trace.spans] == []
+
+
+async def test_log_follower_stream_is_not_part_of_starting_call():
+    seen = []
+
+    async def source(tail):
+        seen.append((current_trace(), current_client.get()))
+        with call_metrics.stage("execute"):
+            pass
+        yield "line"
+        await asyncio.Event().wait()
+
+    metrics = Metrics()
+    follower = LogFollower(("test", "10.5.0.2", "kubelet"), source, tail=10)
+    token = current_client.set("client-1")
+    try:
+        with metrics.trace("talos_logs") as trace:
+            follower.start()
+            await asyncio.sleep(0.01)
+    finally:
+        current_client.reset(token)
+    await follower.stop()
+
+    assert seen == [(None, "")]
+    assert [span.name for span in trace.spans] == []
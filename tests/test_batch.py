@@ -0,0 +1,48 @@
+"""Batch planning and per-operation deadlines"""
+
+import pytest
+
+from conftest import NODE
+from talos_mcp import batch, server
+
+
+def test_identical_operations_share_a_call():
+    calls, order = batch.plan(
+        [
+            {"id": "a", "tool": "talos_get_version", "arguments": {"nodes": NODE}},
+            {"id": "b", "tool": "talos_get_version", "arguments": {"nodes": NODE, "timeout": 5}},
+        ],
+        {"context": "test"},
+    )
+
+    assert order == ["a", "b"]
+    assert [(c.tool, c.ids, c.arguments["context"]) for c in calls] == [
+        ("talos_get_version", ["a", "b"], "test")
+    ]
+
+
+def test_operation_response_mode_is_rejected():
+    with pytest.raises(ValueError, match="response modes apply to the whole batch"):
+        batch.plan(
+            [{"tool": "talos_read", "arguments": {"path": "/etc/os-release", "response": "gzip"}}],
+            {},
+        )
+
+
+async def test_batch_deadline_caps_every_operation(monkeypatch):
+    seen = {}
+
+    async def execute_tool(spec, arguments, response=None):
+        seen[spec.name] = arguments["timeout"]
+        return [], "ok"
+
+    monkeypatch.setattr(server, "execute_tool", execute_tool)
+    operations = [
+        {"tool": "talos_health"},
+        {"tool": "talos_get_version", "arguments": {"timeout": 5}},
+    ]
+
+    await server.batch_tool({"operations": operations}, server.registry.get("talos_batch").timeout)
+
+    # No batch timeout given: the default 60s still caps the 10 minute health check
+    assert seen == {"talos_health": 60.0, "talos_get_version": 5.0}
@@ -0,0 +1,132 @@
+"""ResponseCache: single-flight coalescing, cancellation and invalidation races"""
+
+import asyncio
+
+import pytest
+
+from talos_mcp.cache import ResponseCache
+
+KEY = ResponseCache.make_key("test", "talos_get_version", {"nodes": "10.5.0.2"})
+
+
+class Computation:
+    """A compute() whose calls block until released"""
+
+    def __init__(self, value="v1"):
+        self.value = value
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self):
+        self.calls += 1
+        self.started.set()
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+
+async def test_concurrent_misses_share_one_computation():
+    cache = ResponseCache()
+    compute = Computation()
+
+    waiters = [asyncio.create_task(cache.get_or_compute(KEY, 60, compute)) for _ in range(5)]
+    await compute.started.wait()
+    compute.release.set()
+
+    assert await asyncio.gather(*waiters) == ["v1"] * 5
+    assert compute.calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 4
+    assert await cache.get_or_compute(KEY, 60, Computation("v2")) == "v1"
+    assert cache.stats()["hits"] == 1
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ResponseCache()
+    compute = Computation(RuntimeError("node unreachable"))
+
+    waiters = [asyncio.create_task(cache.get_or_compute(KEY, 60, compute)) for _ in range(3)]
+    await compute.started.wait()
+    compute.release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["in_flight"] == 0
+
+
+async def test_cancelling_the_first_caller_leaves_the_others_waiting():
+    cache = ResponseCache()
+    compute = Computation()
+
+    owner = asyncio.create_task(cache.get_or_compute(KEY, 60, compute))
+    await compute.started.wait()
+    waiter = asyncio.create_task(cache.get_or_compute(KEY, 60, compute))
+    await asyncio.sleep(0)
+
+    owner.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    compute.release.set()
+
+    assert await waiter == "v1"
+    assert not compute.cancelled
+    assert cache.stats()["entries"] == 1
+
+
+async def test_computation_is_cancelled_when_every_caller_gives_up():
+    cache = ResponseCache()
+    compute = Computation()
+
+    waiters = [asyncio.create_task(cache.get_or_compute(KEY, 60, compute)) for _ in range(2)]
+    await compute.started.wait()
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert compute.cancelled
+    assert cache.stats()["in_flight"] == 0
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("context", ["test", None])
+async def test_result_racing_an_invalidation_is_returned_but_not_stored(context):
+    cache = ResponseCache()
+    compute = Computation()
+
+    caller = asyncio.create_task(cache.get_or_compute(KEY, 60, compute))
+    await compute.started.wait()
+    cache.invalidate(context)
+    compute.release.set()
+
+    assert await caller == "v1"
+    assert cache.stats()["entries"] == 0
+
+
+async def test_invalidating_another_context_keeps_the_result():
+    cache = ResponseCache()
+    compute = Computation()
+
+    caller = asyncio.create_task(cache.get_or_compute(KEY, 60, compute))
+    await compute.started.wait()
+    cache.invalidate("other")
+    compute.release.set()
+
+    assert await caller == "v1"
+    assert cache.stats()["entries"] == 1
+
+
+async def test_expired_entries_are_computed_again():
+    cache = ResponseCache()
+
+    assert await cache.get_or_compute(KEY, 0, lambda: asyncio.sleep(0, "v1")) == "v1"
+    assert await cache.get_or_compute(KEY, 60, lambda: asyncio.sleep(0, "v2")) == "v2"
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,68 @@
+"""Parsing and paging of talosctl list -l output"""
+
+import calendar
+
+from talos_mcp.files import ListPage, decode_cursor, entry_from_long_listing, list_page
+
+LISTING = """\
+NODE       MODE         UID   GID   SIZE(B)   LASTMOD                NAME
+10.5.0.2   drwxr-xr-x   0     0     4096      Jan 02 2024 10:11:12   /var/log
+10.5.0.2   -rw-r--r--   0     0     1234      Jan 02 2024 10:11:12   /var/log/my file.log
+10.5.0.2   -rw-r--r--   0     0     10        Jan 03 2024 08:00:00   /var/log/a  b.log
+10.5.0.2   Lrwxrwxrwx   0     0     17        Jan 04 2024 09:30:00   /var/log/cur log -> /var/log/my file.log
+10.5.0.2   -rw-r--r--   0     0     99        2024-01-05 12:00:00    /var/log/z.log
+"""
+
+
+def entries():
+    return [e for e in map(entry_from_long_listing, LISTING.splitlines()) if e is not None]
+
+
+async def stream(items):
+    for item in items:
+        yield item
+
+
+def test_header_is_skipped():
+    assert entry_from_long_listing(LISTING.splitlines()[0]) is None
+
+
+def test_name_with_spaces_keeps_mtime():
+    entry = entry_from_long_listing(LISTING.splitlines()[2])
+
+    assert entry.name == "/var/log/my file.log"
+    assert entry.size == 1234
+    assert entry.mtime == calendar.timegm((2024, 1, 2, 10, 11, 12, 0, 0, 0))
+    assert not entry.is_dir
+
+
+def test_runs_of_spaces_in_name_are_kept():
+    assert entry_from_long_listing(LISTING.splitlines()[3]).name == "/var/log/a  b.log"
+
+
+def test_symlink_target_is_dropped():
+    entry = entry_from_long_listing(LISTING.splitlines()[4])
+
+    assert entry.name == "/var/log/cur log"
+    assert entry.mtime == calendar.timegm((2024, 1, 4, 9, 30, 0, 0, 0, 0))
+
+
+def test_iso_lastmod():
+    entry = entry_from_long_listing(LISTING.splitlines()[5])
+
+    assert entry.name == "/var/log/z.log"
+    assert entry.mtime == calendar.timegm((2024, 1, 5, 12, 0, 0, 0, 0, 0))
+
+
+async def test_pattern_and_name_cursor_use_full_names():
+    arguments = {"pattern": "* *", "sort": "name", "limit": 1}
+    page = ListPage.from_arguments(arguments)
+
+    first = await list_page(stream(entries()), page)
+    assert [e["name"] for e in first["entries"]] == ["/var/log/a  b.log"]
+    assert first["matched"] == 3
+    assert decode_cursor(first["cursor"])["after"] == ["/var/log/a  b.log"]
+
+    page = ListPage.from_arguments({**arguments, "cursor": first["cursor"]})
+    second = await list_page(stream(entries()), page)
+    assert [e["name"] for e in second["entries"]] == ["/var/log/cur log"]
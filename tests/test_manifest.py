@@ -0,0 +1,22 @@
+"""The start-up manifest is only trusted while it matches the code and the mcp SDK"""
+
+import shutil
+
+from talos_mcp import manifest
+
+
+def test_sdk_version_matches_installed_distribution():
+    from importlib.metadata import version
+
+    assert manifest.sdk_version() == version("mcp")
+
+
+def test_mcp_upgrade_invalidates_manifest(tmp_path, monkeypatch):
+    shutil.copy(manifest.MANIFEST_PATH, tmp_path / "manifest.json")
+    for module in manifest.PACKAGE_DIR.glob("*.py"):
+        shutil.copy(module, tmp_path / module.name)
+    assert manifest.load(tmp_path / "manifest.json") is not None
+
+    monkeypatch.setattr(manifest, "sdk_version", lambda: "999.0.0")
+
+    assert manifest.load(tmp_path / "manifest.json") is None
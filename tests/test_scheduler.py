@@ -0,0 +1,121 @@
+"""Scheduler caps, reserved read slots, aging and bounded stats"""
+
+import asyncio
+
+import pytest
+
+from talos_mcp import scheduler
+from talos_mcp.scheduler import Scheduler
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def test_reads_keep_a_reserved_slot_when_heavy_work_is_queued():
+    sched = Scheduler(max_in_flight=4, max_per_node=8)
+    assert sched.reserved_for_reads == 1
+
+    heavy = [await sched.acquire("heavy", [f"10.5.0.{i}"]) for i in range(3)]
+    queued = asyncio.create_task(sched.acquire("heavy", ["10.5.0.9"]))
+    await settle()
+    assert not queued.done()
+
+    # The last global slot is held back for reads
+    read = await asyncio.wait_for(sched.acquire("read", ["10.5.0.9"]), 1.0)
+    assert sched.in_flight == 4
+
+    sched.release(read)
+    await settle()
+    assert not queued.done()
+    sched.release(heavy[0])
+    sched.release(await queued)
+    for ticket in heavy[1:]:
+        sched.release(ticket)
+    assert sched.in_flight == 0
+
+
+async def test_reads_keep_a_reserved_slot_per_node():
+    sched = Scheduler(max_in_flight=16, max_per_node=4)
+    node = ["10.5.0.2"]
+
+    streams = [await sched.acquire("stream", node) for _ in range(3)]
+    queued = asyncio.create_task(sched.acquire("stream", node))
+    await settle()
+    assert not queued.done()
+
+    read = await asyncio.wait_for(sched.acquire("read", node), 1.0)
+    # Other nodes are not held up by this one's cap
+    other = await asyncio.wait_for(sched.acquire("stream", ["10.5.0.3"]), 1.0)
+
+    for ticket in [read, other, *streams]:
+        sched.release(ticket)
+    sched.release(await queued)
+
+
+async def test_free_slot_goes_to_the_cheapest_waiter():
+    sched = Scheduler(max_in_flight=1, aging=60)
+    holder = await sched.acquire("read")
+    order = []
+
+    async def wait(priority):
+        ticket = await sched.acquire(priority)
+        order.append(priority)
+        sched.release(ticket)
+
+    waiters = [asyncio.create_task(wait(p)) for p in ("heavy", "stream", "read")]
+    await settle()
+    sched.release(holder)
+    await asyncio.gather(*waiters)
+
+    assert order == ["read", "stream", "heavy"]
+
+
+async def test_waiting_raises_priority():
+    sched = Scheduler(max_in_flight=1, aging=0.01)
+    holder = await sched.acquire("read")
+    order = []
+
+    async def wait(priority):
+        ticket = await sched.acquire(priority)
+        order.append(priority)
+        sched.release(ticket)
+
+    heavy = asyncio.create_task(wait("heavy"))
+    # Long enough for the heavy operation to age past a fresh read
+    await asyncio.sleep(0.1)
+    read = asyncio.create_task(wait("read"))
+    await settle()
+    sched.release(holder)
+    await asyncio.gather(heavy, read)
+
+    assert order == ["heavy", "read"]
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    sched = Scheduler(max_in_flight=1)
+    holder = await sched.acquire("read")
+    waiter = asyncio.create_task(sched.acquire("read"))
+    await settle()
+    assert sched.stats()["queued"] == 1
+
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert sched.stats()["queued"] == 0
+
+    sched.release(holder)
+    assert sched.in_flight == 0
+
+
+async def test_idle_node_stats_are_bounded(monkeypatch):
+    monkeypatch.setattr(scheduler, "MAX_TRACKED_NODES", 4)
+    sched = Scheduler(max_in_flight=8, max_per_node=2)
+
+    for i in range(50):
+        async with sched.slot("read", [f"10.5.0.{i}"]):
+            pass
+
+    assert len(sched.stats()["nodes"]) <= 5
+    assert sched.in_flight == 0
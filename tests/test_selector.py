@@ -0,0 +1,94 @@
+"""Label and field selector parsing and matching"""
+
+import pytest
+
+from talos_mcp.selector import Requirement, ResourceSelector, parse_selector
+
+DISK = {
+    "metadata": {
+        "namespace": "runtime",
+        "type": "Disks.block.talos.dev",
+        "id": "sda",
+        "phase": "running",
+        "labels": {"role": "system", "tier": "fast"},
+    },
+    "spec": {"dev_path": "/dev/sda", "readonly": False, "serial": None, "size": 10737418240},
+}
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("role=system", [Requirement("role", "=", ("system",))]),
+        ("role==system", [Requirement("role", "=", ("system",))]),
+        (" role != system ", [Requirement("role", "!=", ("system",))]),
+        ("role=", [Requirement("role", "=", ("",))]),
+        ("tier in (fast, slow)", [Requirement("tier", "in", ("fast", "slow"))]),
+        ("tier notin (slow)", [Requirement("tier", "notin", ("slow",))]),
+        ("tier in ()", [Requirement("tier", "in", ())]),
+        ("role", [Requirement("role", "exists")]),
+        ("! role", [Requirement("role", "!exists")]),
+        (
+            "role=system,tier in (fast,slow),!gone",
+            [
+                Requirement("role", "=", ("system",)),
+                Requirement("tier", "in", ("fast", "slow")),
+                Requirement("gone", "!exists"),
+            ],
+        ),
+        ("", []),
+        (" , ,", []),
+    ],
+)
+def test_parse(text, expected):
+    assert list(parse_selector(text)) == expected
+
+
+@pytest.mark.parametrize(
+    "text", ["role system", "tier in fast", "tier in (fast", "=system", "role!", "a=(b)"]
+)
+def test_malformed_requirements_are_rejected(text):
+    with pytest.raises(ValueError, match="invalid selector requirement"):
+        parse_selector(text)
+
+
+def test_empty_expressions_select_nothing_in_particular():
+    assert ResourceSelector.parse() is None
+    assert ResourceSelector.parse("", " ") is None
+
+
+@pytest.mark.parametrize(
+    "labels, fields, matches",
+    [
+        ("role=system", None, True),
+        ("role=user", None, False),
+        ("tier in (fast,slow)", None, True),
+        ("tier notin (fast)", None, False),
+        ("missing!=x", None, True),
+        ("missing", None, False),
+        ("!missing", None, True),
+        (None, "metadata.phase=running", True),
+        (None, "spec.dev_path=/dev/sda,metadata.id!=sdb", True),
+        (None, "spec.readonly=false", True),
+        (None, "spec.serial=null", True),
+        (None, "spec.size=10737418240", True),
+        (None, "spec.dev_path.extra=x", False),
+        ("role=system", "metadata.phase=stopped", False),
+    ],
+)
+def test_matches(labels, fields, matches):
+    assert ResourceSelector.parse(labels, fields).matches(DISK) is matches
+
+
+def test_document_without_labels_only_meets_negative_requirements():
+    doc = {"metadata": {"id": "eth0"}}
+
+    assert ResourceSelector.parse("!role,role!=system").matches(doc)
+    assert not ResourceSelector.parse("role notin (system),role").matches(doc)
+
+
+def test_equals_pins_only_equality_requirements():
+    selector = ResourceSelector.parse(None, "metadata.id=sda,metadata.namespace!=runtime")
+
+    assert selector.equals("metadata.id") == "sda"
+    assert selector.equals("metadata.namespace") is None
@@ -0,0 +1,132 @@
+"""Snapshot storage, diffs and pruning"""
+
+import pytest
+
+from talos_mcp.snapshots import SnapshotStore, field_changes
+
+NODE = "10.5.0.2"
+
+
+def service(name: str, state: str = "Running", healthy: bool = True) -> dict:
+    return {"node": NODE, "id": name, "state": state, "healthy": healthy, "last_event": ""}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "state" / "snapshots.db"), keep=3)
+    yield store
+    store.close()
+
+
+def count(store: SnapshotStore, table: str) -> int:
+    with store._lock:
+        return store._connect().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_first_snapshot_is_a_baseline(store):
+    first = store.record("test", NODE, "services", [service("apid"), service("etcd")])
+
+    result = store.diff(None, first)
+
+    assert result["baseline"] is True
+    assert result["counts"] == {"records": 2}
+
+
+def test_diff_counts_added_removed_and_changed(store):
+    old = store.record(
+        "test", NODE, "services", [service("apid"), service("etcd"), service("kubelet")]
+    )
+    new = store.record(
+        "test",
+        NODE,
+        "services",
+        [service("apid"), service("etcd", "Failed", False), service("trustd")],
+    )
+
+    result = store.diff(old, new)
+
+    assert result["counts"] == {"added": 1, "removed": 1, "changed": 1, "unchanged": 1}
+    assert result["removed"] == ["kubelet"]
+    assert result["added"] == [
+        {
+            "key": "trustd",
+            "record": {"id": "trustd", "state": "Running", "healthy": True, "last_event": ""},
+        }
+    ]
+    assert result["changed"] == [
+        {
+            "key": "etcd",
+            "fields": {
+                "healthy": {"from": True, "to": False},
+                "state": {"from": "Running", "to": "Failed"},
+            },
+        }
+    ]
+    assert store.previous(new) == old
+
+
+def test_unchanged_snapshot_shares_its_manifest(store):
+    records = [service("apid"), service("etcd")]
+    old = store.record("test", NODE, "services", records)
+    new = store.record("test", NODE, "services", list(reversed(records)))
+
+    assert new.digest == old.digest
+    assert store.diff(old, new)["counts"] == {
+        "added": 0,
+        "removed": 0,
+        "changed": 0,
+        "unchanged": 2,
+    }
+    assert count(store, "manifest_items") == 2
+    assert count(store, "blobs") == 2
+
+
+def test_diff_is_truncated_past_max_records(store):
+    old = store.record("test", NODE, "services", [])
+    new = store.record("test", NODE, "services", [service(f"svc{i}") for i in range(5)])
+
+    result = store.diff(old, new, max_records=2)
+
+    assert result["counts"]["added"] == 5
+    assert [entry["key"] for entry in result["added"]] == ["svc0", "svc1"]
+    assert result["truncated"] is True
+
+
+def test_resources_are_keyed_by_namespace_type_and_id(store):
+    disk = {"node": NODE, "namespace": "runtime", "type": "Disks", "id": "sda", "spec": {"size": 1}}
+    old = store.record("test", NODE, "resources:disks", [disk])
+    new = store.record(
+        "test", NODE, "resources:disks", [{**disk, "spec": {"size": 2, "model": "QEMU"}}]
+    )
+
+    result = store.diff(old, new)
+
+    assert result["changed"] == [
+        {
+            "key": "runtime/Disks/sda",
+            "fields": {
+                "spec.model": {"from": None, "to": "QEMU"},
+                "spec.size": {"from": 1, "to": 2},
+            },
+        }
+    ]
+
+
+def test_old_snapshots_are_pruned_with_their_records(store):
+    for i in range(6):
+        store.record("test", NODE, "services", [service("apid"), service(f"svc{i}")])
+    store.record("test", "10.5.0.3", "services", [service("apid")])
+
+    kept = store.recent("test", NODE, "services")
+
+    assert len(kept) == 3
+    assert [s.node for s in store.recent(node="10.5.0.3")] == ["10.5.0.3"]
+    # apid is shared; svc0-svc2 were referenced only by pruned snapshots
+    assert count(store, "blobs") == 1 + 3
+    assert count(store, "manifest_items") == 3 * 2 + 1
+
+
+def test_field_changes_compare_lists_whole():
+    assert field_changes({"urls": ["a"], "x": 1}, {"urls": ["a", "b"], "x": 1}) == {
+        "urls": {"from": ["a"], "to": ["a", "b"]}
+    }
@@ -0,0 +1,55 @@
+"""BoundedOutput budgets and truncation markers"""
+
+import re
+
+from talos_mcp.streaming import BoundedOutput
+
+MARKER = re.compile(r"^\.\.\. \[truncated (\d+) lines, (\d+) bytes of (\d+)\] \.\.\.\n", re.M)
+
+
+def fill(buf: BoundedOutput, data: bytes, chunk: int = 7) -> BoundedOutput:
+    # Odd chunk sizes split multi-byte characters across feeds
+    for i in range(0, len(data), chunk):
+        buf.feed(data[i : i + chunk])
+    buf.finish()
+    return buf
+
+
+def split(text: str) -> tuple[str, int, int, int]:
+    """The kept text without the marker, and the marker's lines, dropped bytes and total"""
+    match = MARKER.search(text)
+    assert match, text
+    lines, dropped, total = map(int, match.groups())
+    return text[: match.start()] + text[match.end() :], lines, dropped, total
+
+
+def test_short_output_is_kept_whole():
+    data = "ünïcödé\nline two\n".encode()
+
+    buf = fill(BoundedOutput(1024, 100), data)
+
+    assert not buf.truncated
+    assert buf.render() == data.decode()
+
+
+def test_budget_and_marker_count_encoded_bytes():
+    line = "日本語のログ行\n"  # 8 characters, 22 bytes
+    data = (line * 100).encode()
+
+    kept, lines, dropped, total = split(fill(BoundedOutput(200, 1000), data).render())
+
+    assert total == len(data)
+    assert dropped == lines * len(line.encode())
+    assert len(kept.encode()) + dropped == total
+    assert len(kept.encode()) <= 200
+
+
+def test_unterminated_line_is_cut_on_character_boundaries():
+    data = ("é" * 500).encode()  # 1000 bytes, no newline
+
+    kept, _, dropped, total = split(fill(BoundedOutput(100, 1000), data).render())
+
+    assert "�" not in kept
+    # The cut pieces are joined back without the newline render() puts after the head
+    assert len(kept.replace("\n", "").encode()) + dropped == total == 1000
+    assert len(kept.encode()) <= 101
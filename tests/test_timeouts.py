@@ -0,0 +1,128 @@
+"""Deadlines: structured timeout results, process-group cleanup, cache keys"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import NODE, alive, spawned
+from talos_mcp import server
+from talos_mcp.cache import ResponseCache
+
+# Seconds a test waits for a call that should already have been cut off
+HANG_LIMIT = 10.0
+
+
+async def wait_for_file(path: Path, timeout: float = 5.0) -> str:
+    deadline = time.monotonic() + timeout
+    while not path.exists() or not path.read_text().strip():
+        assert time.monotonic() < deadline, f"{path} was never written"
+        await asyncio.sleep(0.01)
+    return path.read_text().strip()
+
+
+async def test_timeout_returns_structured_report(client, monkeypatch):
+    monkeypatch.setenv("FAKE_TALOSCTL_DELAY", "5")
+    spec = server.registry.get("talos_get_version")
+
+    start = time.monotonic()
+    contents, status = await server.execute_tool(spec, {"nodes": NODE, "timeout": 0.3})
+    elapsed = time.monotonic() - start
+
+    assert status == "timeout"
+    assert elapsed < 2.0
+    report = json.loads(contents[0].text)
+    assert report["status"] == "timeout"
+    assert report["timeout"] == 0.3
+    assert "timed out" in report["message"]
+    assert report["partial_output"] == ""
+
+
+async def test_timeout_keeps_partial_output(client, spawn_log):
+    result = await client._run_talosctl(["dashboard", "-n", NODE], timeout=0.5)
+
+    assert result["timed_out"] is True
+    assert result["success"] is False
+    assert result["timeout"] == 0.5
+    assert "talos dashboard" in result["stdout"]
+    assert not alive(spawned(spawn_log)[0])
+
+
+async def test_timeout_kills_process_group(client, spawn_log, tmp_path, monkeypatch):
+    pid_file = tmp_path / "child.pid"
+    monkeypatch.setenv("FAKE_TALOSCTL_CHILD_PID_FILE", str(pid_file))
+
+    # A grandchild left alive keeps the stdout pipe open: without the group kill this hangs
+    result = await asyncio.wait_for(
+        client._run_talosctl(["dashboard", "-n", NODE], timeout=1.0), HANG_LIMIT
+    )
+
+    assert result["timed_out"] is True
+    grandchild = int(await wait_for_file(pid_file))
+    (talosctl,) = spawned(spawn_log)
+    assert not alive(talosctl)
+    # Killed with the group, although it holds talosctl's stdout open
+    for _ in range(100):
+        if not alive(grandchild):
+            break
+        await asyncio.sleep(0.01)
+    assert not alive(grandchild)
+
+
+async def test_cancellation_kills_process_group(client, spawn_log, tmp_path, monkeypatch):
+    pid_file = tmp_path / "child.pid"
+    monkeypatch.setenv("FAKE_TALOSCTL_CHILD_PID_FILE", str(pid_file))
+
+    task = asyncio.create_task(client._run_talosctl(["dashboard", "-n", NODE], timeout=None))
+    grandchild = int(await wait_for_file(pid_file))
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, HANG_LIMIT)
+
+    (talosctl,) = spawned(spawn_log)
+    assert not alive(talosctl)
+    for _ in range(100):
+        if not alive(grandchild):
+            break
+        await asyncio.sleep(0.01)
+    assert not alive(grandchild)
+
+
+def test_timeout_is_not_part_of_cache_key():
+    fast = ResponseCache.make_key("test", "talos_get_version", {"nodes": NODE, "timeout": 1})
+    slow = ResponseCache.make_key("test", "talos_get_version", {"nodes": NODE, "timeout": 60})
+    default = ResponseCache.make_key("test", "talos_get_version", {"nodes": NODE})
+
+    assert fast == slow == default
+
+
+async def test_calls_differing_in_timeout_share_cached_response(client, spawn_log):
+    spec = server.registry.get("talos_get_version")
+
+    first, status = await server.execute_tool(spec, {"nodes": NODE, "timeout": 10})
+    assert status == "ok"
+    second, status = await server.execute_tool(spec, {"nodes": NODE, "timeout": 20})
+
+    assert status == "ok"
+    assert second[0].text == first[0].text
+    assert len(spawned(spawn_log)) == 1
+    assert server.response_cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("timeout", [0, -5, "soon", True, float("nan"), float("inf")])
+async def test_invalid_timeout_is_rejected(client, spawn_log, timeout):
+    spec = server.registry.get("talos_get_version")
+
+    contents, status = await server.execute_tool(spec, {"nodes": NODE, "timeout": timeout})
+
+    assert status == "error"
+    assert contents[0].text.startswith("Error: timeout must be a positive number of seconds")
+    assert spawned(spawn_log) == []
+
+
+def test_timeout_schema_requires_positive_number():
+    tool = server.registry.get("talos_get_version").to_tool()
+
+    assert tool.inputSchema["properties"]["timeout"]["exclusiveMinimum"] == 0